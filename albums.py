@@ -0,0 +1,94 @@
+import os
+import threading
+
+# Bills sent together as an album arrive as separate photo messages that
+# share a media_group_id. AlbumCollector gathers them per (chat, group) and
+# hands the whole album to flush(messages) once no photo came for
+# ALBUM_WAIT_MS (or ALBUM_MAX_PHOTOS arrived), so it is read in one go.
+#
+# timer(seconds, fn) schedules that flush and returns something with
+# cancel(): threading.Timer for bot.py (thread_timer), loop.call_later for
+# async_bot.py.
+
+ALBUM_WAIT_MS = int(os.getenv("ALBUM_WAIT_MS", "800"))
+ALBUM_MAX_PHOTOS = 10   # Telegram's album limit
+
+
+def thread_timer(seconds, fn):
+    t = threading.Timer(seconds, fn)
+    t.daemon = True
+    t.start()
+    return t
+
+
+class AlbumCollector:
+
+    def __init__(self, flush, timer=thread_timer, wait_ms=ALBUM_WAIT_MS, max_photos=ALBUM_MAX_PHOTOS):
+        self.flush = flush
+        self.timer = timer
+        self.wait = wait_ms / 1000
+        self.max_photos = max_photos
+        self._lock = threading.Lock()
+        self._albums = {}   # key → (messages, pending timer)
+
+    def add(self, key, message):
+        with self._lock:
+            messages, pending = self._albums.pop(key, ([], None))
+            if pending is not None:
+                pending.cancel()
+            messages.append(message)
+            # A full album flushes right away, but still through the timer:
+            # never inline, where the caller may hold the chat's lock
+            wait = self.wait if len(messages) < self.max_photos else 0
+            self._albums[key] = (messages, self.timer(wait, lambda: self._expire(key)))
+
+    def _expire(self, key):
+        with self._lock:
+            messages, _ = self._albums.pop(key, (None, None))
+        if messages:
+            self._flush(messages)
+
+    def _flush(self, messages):
+        # Updates may be handled out of order; keep the order they were sent in
+        self.flush(sorted(messages, key=lambda m: m.message_id))
+
+    def collecting(self):
+        with self._lock:
+            return len(self._albums)
+
+
+# ================= CONFIRMATION =================
+
+def album_text(items, failed=0):
+    lines = [f"📋 *Confirm {len(items)} Bills*", ""]
+    total = 0.0
+    for n, d in enumerate(items, 1):
+        lines.append(f"*{n}.* 📅 {d.get('date') or '—'}  🕐 {d.get('time') or '—'}")
+        lines.append(f"     📍 {d.get('place') or '—'} · 📁 {d.get('category') or '—'} · 💵 ₹{d.get('amount') or '—'}")
+        try:
+            total += float(d.get("amount"))
+        except (TypeError, ValueError):
+            pass
+    lines += ["", f"💰 Total: ₹{total:.2f}"]
+    if failed:
+        lines.append(f"⚠️ {failed} photo(s) couldn't be read, add those with manual entry.")
+    return "\n".join(lines)
+
+
+def album_records(items):
+    # → (records ready for Storage.add_many, 1-based numbers of bills without a usable amount)
+    records, missing = [], []
+    for n, d in enumerate(items, 1):
+        try:
+            amount = float(d.get("amount"))
+        except (TypeError, ValueError):
+            missing.append(n)
+            continue
+        records.append({
+            "date": d.get("date"),
+            "time": d.get("time"),
+            "place": d.get("place"),
+            "category": d.get("category"),
+            "amount": amount
+        })
+    return records, missing
@@ -0,0 +1,674 @@
+from dotenv import load_dotenv
+load_dotenv()  # must be at the very top, before reading env variables
+
+import time
+STARTED_AT = time.monotonic()
+
+import os
+import re
+import signal
+import asyncio
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import pytz
+from telebot import types, asyncio_helper
+from telebot.async_telebot import AsyncTeleBot
+from storage import open_storage, normalize_date
+from ocr_engine import create_engine, OCR_MODE, OCR_BATCH_SIZE
+from ocr_cache import OcrCache, CacheKeys
+from bill_parser import parse_bill, start_keyword_watcher
+from menus import main_menu, confirm_menu, edit_menu, date_menu, time_menu, category_menu, cancel_only_menu
+from menus import EXPIRED_BUTTON_TEXT, album_menu
+from menus import export_period_menu, export_format_menu, reports_menu
+from reports import build_report, REPORTS
+from export import export_user, period_range, FORMATS
+from importer import import_stream, result_text, supported, spool_async, IMPORT_MAX_BYTES, SPOOL_CHUNK
+from workers import BoundedExecutor, QueueFull
+from albums import AlbumCollector, album_text, album_records
+from conversation import ConversationStore
+from flows import build_flow, read_bill, expense_record, welcome_text, queued_text, bill_text
+from flows import confirm_again_text, manual_confirm_text, missing_amount_text, album_saved_text
+from flows import CANCELLED_TEXT, BILL_PROMPT_TEXT, PROCESSING_TEXT, WARMING_UP_TEXT, QUEUE_FULL_TEXT
+from flows import READ_ERROR_TEXT, ALBUM_READ_ERROR_TEXT, SAVE_ERROR_TEXT, ALBUM_SAVE_ERROR_TEXT, IMPORT_HELP_TEXT
+from locks import user_locks, AsyncLockManager
+import metrics
+
+# asyncio runtime: same conversations as bot.py on AsyncTeleBot. All
+# Telegram I/O is non-blocking on one event loop; OCR runs on the OCR
+# executor and storage calls on a small storage thread pool, so thousands
+# of open conversations cost no threads.
+#
+#   python async_bot.py
+
+IST = pytz.timezone("Asia/Kolkata")
+# ================= TOKENS =================
+TELEGRAM_BOT_TOKEN = os.getenv("BOT_TOKEN")
+# =========================================
+
+if TELEGRAM_BOT_TOKEN is None:
+    raise ValueError("BOT_TOKEN not found in environment variables!")
+
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "").rstrip("/")
+if TELEGRAM_API_URL:
+    asyncio_helper.API_URL = TELEGRAM_API_URL + "/bot{0}/{1}"
+    asyncio_helper.FILE_URL = TELEGRAM_API_URL + "/file/bot{0}/{1}"
+
+# Open HTTP connections to the Bot API shared by every conversation
+asyncio_helper.REQUEST_LIMIT = int(os.getenv("TELEGRAM_CONNECTIONS", "100"))
+
+bot = AsyncTeleBot(TELEGRAM_BOT_TOKEN)
+
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "2"))
+OCR_QUEUE_SIZE = int(os.getenv("OCR_QUEUE_SIZE", "20"))
+STORAGE_THREADS = int(os.getenv("STORAGE_THREADS", "4"))
+
+ocr_engine = create_engine(OCR_WORKERS)
+ocr_executor = BoundedExecutor("ocr", OCR_WORKERS * max(1, OCR_BATCH_SIZE), OCR_QUEUE_SIZE)
+storage_executor = ThreadPoolExecutor(STORAGE_THREADS, thread_name_prefix="storage")
+
+ocr_cache = OcrCache()
+
+DATA_FOLDER = "user_data"
+os.makedirs(DATA_FOLDER, exist_ok=True)
+
+store = open_storage(DATA_FOLDER)
+
+# Only touched from the event loop, so no thread locks; but handlers await
+# (storage, Telegram) between reading a chat's entry and updating it, so
+# conversation updates for one chat run one at a time under chat_locks
+conversations = ConversationStore()
+chat_locks = AsyncLockManager()
+
+metrics.Gauge("ocr_queue_depth", "Bills waiting for an OCR worker", ocr_executor.queue_depth)
+metrics.Gauge(
+    "ocr_jobs", "OCR executor jobs by state",
+    lambda: {k: v for k, v in ocr_executor.stats().items() if k in ("running", "completed", "failed", "rejected")},
+    label="state"
+)
+metrics.Gauge("ocr_cache", "OCR result cache counters", ocr_cache.stats, label="stat")
+metrics.Gauge("ocr_engine_ready", "1 once the OCR models are loaded", lambda: int(ocr_engine.ready.is_set()))
+metrics.Gauge("user_locks", "Per-user locks: held now, acquisitions, waits", user_locks.stats, label="stat")
+metrics.Gauge("chat_locks", "Per-chat conversation locks: held now, acquisitions, waits", chat_locks.stats, label="stat")
+metrics.Gauge("conversations", "Conversation store: open, stored on disk, expired, evicted", conversations.stats, label="stat")
+metrics.Gauge("albums_collecting", "Albums still receiving photos", lambda: album_collector.collecting())
+
+# ================= UTIL =================
+
+async def in_storage(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(storage_executor, fn, *args)
+
+def timed_storage(op, fn, *args):
+    with metrics.STORAGE_SECONDS.time(op=op):
+        return fn(*args)
+
+async def add_expense(user_id, record):
+    await in_storage(timed_storage, "add", store.add, user_id, record)
+
+async def get_total_expense(user_id):
+    return await in_storage(timed_storage, "total", store.total, user_id)
+
+async def reset_data(user_id):
+    await in_storage(timed_storage, "reset", store.reset, user_id)
+
+async def get_summary(user_id):
+    return await in_storage(timed_storage, "summary", store.summary, user_id)
+
+async def export_expenses(user_id, fmt="csv", start=None, end=None):
+    return await in_storage(timed_storage, "export", export_user, store, user_id, fmt, start, end)
+
+async def send_export(chat_id, fmt, start=None, end=None):
+    export = await export_expenses(chat_id, fmt, start, end)
+    if not export.count:
+        await bot.send_message(chat_id, "No data yet!" if not (start or end) else "No expenses in that period.")
+        return
+    await bot.send_document(
+        chat_id,
+        types.InputFile(export.buffer, file_name=export.filename),
+        caption=f"📥 {export.count} expense(s), total ₹{export.total:.2f}"
+    )
+
+# ================= START =================
+
+async def cancel_current_process(message, entry=None):
+    conversations.pop(message.chat.id)
+    await bot.send_message(message.chat.id, CANCELLED_TEXT, reply_markup=main_menu())
+
+@bot.message_handler(commands=["start", "help"])
+async def start(message):
+    user_name = message.from_user.first_name or "Friend"
+
+    await bot.send_message(
+        message.chat.id,
+        welcome_text(user_name),
+        parse_mode="Markdown",
+        reply_markup=main_menu()
+    )
+
+# ================= OCR =================
+
+async def show_bill_confirmation(chat_id, data):
+    conversations.set(chat_id, {
+        "state": "confirm",
+        "data": data
+    })
+
+    await bot.send_message(chat_id, bill_text(data), parse_mode="Markdown", reply_markup=confirm_menu())
+
+async def send_read_error(chat_id):
+    await bot.send_message(chat_id, READ_ERROR_TEXT, reply_markup=main_menu())
+
+# ================= BILL PHOTO =================
+
+async def bill_start(message, entry=None):
+    conversations.set(message.chat.id, {"state": "bill_photo"})
+    await bot.send_message(message.chat.id, BILL_PROMPT_TEXT)
+
+@bot.message_handler(content_types=["photo"])
+async def bill_photo_handler(message):
+    chat_id = message.chat.id
+    if conversations.state(chat_id) != "bill_photo":
+        return
+
+    if message.media_group_id:
+        # One bill of an album: all of them are read together once it's complete
+        album_collector.add((chat_id, message.media_group_id), message)
+        return
+
+    trace = metrics.Trace("bill", chat_id=chat_id)
+    try:
+        photo = message.photo[-1]
+        with trace.stage("cache"):
+            cached = await in_storage(ocr_cache.get_by_file_id, photo.file_unique_id)
+        if cached:
+            with trace.stage("reply"):
+                await show_bill_confirmation(chat_id, parse_bill(cached))
+            trace.finish("cached")
+            return
+
+        with trace.stage("ack"):
+            processing_msg = await bot.send_message(chat_id, PROCESSING_TEXT)
+
+        with trace.stage("download"):
+            file_info = await bot.get_file(photo.file_id)
+            file_bytes = await bot.download_file(file_info.file_path)
+        metrics.BYTES_DOWNLOADED.inc(len(file_bytes))
+        trace.fields["bytes"] = len(file_bytes)
+
+        # Hashing (SHA-256 + perceptual) is CPU work → off the loop
+        with trace.stage("cache"):
+            cache_keys = await in_storage(CacheKeys.for_image, file_bytes, photo.file_unique_id, chat_id)
+            cached = await in_storage(ocr_cache.get, cache_keys)
+        if cached:
+            with trace.stage("reply"):
+                await bot.delete_message(chat_id, processing_msg.message_id)
+                await show_bill_confirmation(chat_id, parse_bill(cached))
+            trace.finish("cached")
+            return
+
+        try:
+            trace.queued()
+            job = ocr_executor.submit(read_bill, ocr_engine, file_bytes, trace)
+        except QueueFull:
+            trace.finish("rejected")
+            await bot.edit_message_text(QUEUE_FULL_TEXT, chat_id, processing_msg.message_id)
+            return
+        metrics.QUEUE_POSITION.observe(job.position)
+
+        text = None
+        if not ocr_engine.ready.is_set():
+            text = WARMING_UP_TEXT
+        elif job.waiting:
+            text = queued_text(job)
+        if text:
+            try:
+                await bot.edit_message_text(text, chat_id, processing_msg.message_id)
+            except Exception:
+                pass
+
+        try:
+            # The conversation just awaits; no thread is held while queued
+            text, data = await asyncio.wrap_future(job.future)
+        except Exception:
+            traceback.print_exc()
+            metrics.OCR_FAILURES.inc()
+            trace.finish("failed")
+            await send_read_error(chat_id)
+            return
+
+        await in_storage(ocr_cache.put, cache_keys, text)
+
+        with trace.stage("reply"):
+            await bot.delete_message(chat_id, processing_msg.message_id)
+            await show_bill_confirmation(chat_id, dict(data))
+        trace.finish("ok")
+
+    except Exception:
+        traceback.print_exc()
+        trace.finish("error")
+        await send_read_error(chat_id)
+
+# ================= ALBUM =================
+
+async def show_album_confirmation(chat_id, items, failed=0):
+    conversations.set(chat_id, {
+        "state": "album_confirm",
+        "items": items,
+        "failed": failed
+    })
+
+    await bot.send_message(
+        chat_id,
+        album_text(items, failed),
+        parse_mode="Markdown",
+        reply_markup=album_menu(len(items))
+    )
+
+async def prepare_photo(chat_id, photo, trace):
+    # → (bill parsed from the cached OCR text, None, None) or (None, image bytes, cache keys)
+    with trace.stage("cache"):
+        cached = await in_storage(ocr_cache.get_by_file_id, photo.file_unique_id)
+    if cached:
+        return parse_bill(cached), None, None
+
+    with trace.stage("download"):
+        file_info = await bot.get_file(photo.file_id)
+        file_bytes = await bot.download_file(file_info.file_path)
+    metrics.BYTES_DOWNLOADED.inc(len(file_bytes))
+    trace.fields["bytes"] = len(file_bytes)
+
+    with trace.stage("cache"):
+        cache_keys = await in_storage(CacheKeys.for_image, file_bytes, photo.file_unique_id, chat_id)
+        cached = await in_storage(ocr_cache.get, cache_keys)
+    if cached:
+        return parse_bill(cached), None, None
+    return None, file_bytes, cache_keys
+
+async def read_album(messages):
+    # Every photo downloads at once, then all OCR jobs queue together so
+    # the OCR workers (and their batches) read them in parallel
+    chat_id = messages[0].chat.id
+    photos = [m.photo[-1] for m in messages]
+    traces = [metrics.Trace("bill", chat_id=chat_id, album=len(photos)) for _ in photos]
+    items = [None] * len(photos)
+    outcomes = ["error"] * len(photos)
+    try:
+        processing_msg = await bot.send_message(chat_id, f"🧾 {len(photos)} bills received!\n⏳ Processing, please wait...")
+
+        prepared = await asyncio.gather(
+            *(prepare_photo(chat_id, p, t) for p, t in zip(photos, traces)), return_exceptions=True
+        )
+        jobs = {}
+        for i, result in enumerate(prepared):
+            if isinstance(result, Exception):
+                traceback.print_exception(result)
+                continue
+            data, file_bytes, cache_keys = result
+            if data is not None:
+                items[i], outcomes[i] = dict(data), "cached"
+                continue
+            try:
+                traces[i].queued()
+                jobs[i] = (ocr_executor.submit(read_bill, ocr_engine, file_bytes, traces[i]), cache_keys)
+            except QueueFull:
+                outcomes[i] = "rejected"
+
+        # No thread is held while the bills wait for OCR
+        results = await asyncio.gather(
+            *(asyncio.wrap_future(job.future) for job, _ in jobs.values()), return_exceptions=True
+        )
+        for (i, (job, cache_keys)), result in zip(jobs.items(), results):
+            if isinstance(result, Exception):
+                traceback.print_exception(result)
+                metrics.OCR_FAILURES.inc()
+                outcomes[i] = "failed"
+                continue
+            text, data = result
+            await in_storage(ocr_cache.put, cache_keys, text)
+            items[i], outcomes[i] = dict(data), "ok"
+
+        read = [d for d in items if d is not None]
+        await bot.delete_message(chat_id, processing_msg.message_id)
+        if not read:
+            await bot.send_message(chat_id, ALBUM_READ_ERROR_TEXT, reply_markup=main_menu())
+            return
+        await show_album_confirmation(chat_id, read, len(photos) - len(read))
+    except Exception:
+        traceback.print_exc()
+        await send_read_error(chat_id)
+    finally:
+        for trace, outcome in zip(traces, outcomes):
+            trace.finish(outcome)
+
+# Albums are read in their own tasks, kept here until done
+album_tasks = set()
+
+def start_album_read(messages):
+    task = asyncio.ensure_future(read_album(messages))
+    album_tasks.add(task)
+    task.add_done_callback(album_tasks.discard)
+
+album_collector = AlbumCollector(
+    start_album_read,
+    timer=lambda seconds, fn: asyncio.get_running_loop().call_later(seconds, fn)
+)
+
+async def album_save(call, entry):
+    chat_id = call.message.chat.id
+    records, missing = album_records(entry["items"])
+    if missing:
+        await bot.send_message(chat_id, missing_amount_text(missing))
+        return
+
+    # One batch for the whole album. Dropped only once it's written, so a
+    # failed save can simply be retried
+    try:
+        await in_storage(timed_storage, "add_many", store.add_many, chat_id, records)
+    except Exception:
+        traceback.print_exc()
+        await bot.send_message(chat_id, ALBUM_SAVE_ERROR_TEXT)
+        return
+    conversations.pop(chat_id)
+
+    await bot.send_message(chat_id, album_saved_text(records), reply_markup=main_menu())
+
+async def album_pick(call, entry):
+    chat_id = call.message.chat.id
+    index = int(call.data.split(":")[1])
+    if index >= len(entry["items"]):
+        return
+
+    entry["state"] = "album_field"
+    entry["item"] = index
+    conversations.set(chat_id, entry)
+
+    await bot.send_message(chat_id, f"❓ Which detail of bill {index + 1} is wrong?", reply_markup=edit_menu())
+
+async def album_edit_field(call, entry):
+    chat_id = call.message.chat.id
+    field = call.data.replace("edit_", "")
+    entry["state"] = "album_value"
+    entry["field"] = field
+    conversations.set(chat_id, entry)
+
+    await bot.send_message(chat_id, f"✏️ Enter correct {field} for bill {entry['item'] + 1}:")
+
+async def album_receive_edit(m, entry):
+    entry["items"][entry["item"]][entry["field"]] = m.text.strip()
+    await show_album_confirmation(m.chat.id, entry["items"], entry["failed"])
+
+# ================= CONFIRM / EDIT =================
+
+async def confirm_save(call, entry):
+    chat_id = call.message.chat.id
+    # Dropped only once it's written, so a failed save can be retried
+    try:
+        await add_expense(chat_id, expense_record(entry["data"]))
+    except Exception:
+        traceback.print_exc()
+        await bot.send_message(chat_id, SAVE_ERROR_TEXT)
+        return
+    conversations.pop(chat_id)
+
+    await bot.send_message(chat_id, "✅ Expense saved!", reply_markup=main_menu())
+
+async def confirm_reject(call, entry):
+    chat_id = call.message.chat.id
+    entry["state"] = "edit_field"
+    conversations.set(chat_id, entry)
+    await bot.send_message(chat_id, "❓ Which detail is wrong?", reply_markup=edit_menu())
+
+async def edit_field(call, entry):
+    chat_id = call.message.chat.id
+    field = call.data.replace("edit_", "")
+    entry["state"] = "edit_value"
+    entry["field"] = field
+    conversations.set(chat_id, entry)
+
+    await bot.send_message(chat_id, f"✏️ Enter correct {field}:")
+
+async def receive_edit(m, entry):
+    entry["data"][entry["field"]] = m.text.strip()
+    entry["state"] = "confirm"
+    conversations.set(m.chat.id, entry)
+
+    await bot.send_message(m.chat.id, confirm_again_text(entry["data"]), parse_mode="Markdown", reply_markup=confirm_menu())
+
+# ================= MANUAL ENTRY =================
+
+async def manual_start(message, entry=None):
+    conversations.set(message.chat.id, {"state": "amount"})
+    await bot.send_message(message.chat.id, "💵 Enter amount:", reply_markup=cancel_only_menu())
+
+async def manual_amount(message, entry):
+    entry["amount"] = re.sub(r"[^\d.]", "", message.text)
+    entry["state"] = "date"
+    conversations.set(message.chat.id, entry)
+    await bot.send_message(message.chat.id, "📅 Use current date or enter manually?", reply_markup=date_menu())
+
+async def manual_date_now(message, entry):
+    entry["date"] = datetime.now(IST).strftime("%d-%m-%Y")
+    await ask_time(message, entry)
+
+async def manual_date_ask(message, entry):
+    entry["state"] = "date_manual"
+    conversations.set(message.chat.id, entry)
+    await bot.send_message(message.chat.id, "✏️ Enter date (DD-MM-YYYY):", reply_markup=cancel_only_menu())
+
+async def manual_date_input(message, entry):
+    entry["date"] = message.text
+    await ask_time(message, entry)
+
+async def ask_time(message, entry):
+    entry["state"] = "time"
+    conversations.set(message.chat.id, entry)
+    await bot.send_message(message.chat.id, "🕐 Use current time or enter manually?", reply_markup=time_menu())
+
+async def manual_time_now(message, entry):
+    entry["time"] = datetime.now(IST).strftime("%H:%M")
+    entry["state"] = "place"
+    conversations.set(message.chat.id, entry)
+    await bot.send_message(message.chat.id, "📍 Enter place:", reply_markup=cancel_only_menu())
+
+async def manual_time_ask(message, entry):
+    entry["state"] = "time_manual"
+    conversations.set(message.chat.id, entry)
+    await bot.send_message(message.chat.id, "✏️ Enter time (HH:MM):", reply_markup=cancel_only_menu())
+
+async def manual_time_input(message, entry):
+    entry["time"] = message.text
+    entry["state"] = "place"
+    conversations.set(message.chat.id, entry)
+    await bot.send_message(message.chat.id, "📍 Enter place:")
+
+async def manual_place(message, entry):
+    entry["place"] = message.text
+    entry["state"] = "category"
+    conversations.set(message.chat.id, entry)
+    await bot.send_message(message.chat.id, "📁 Select category:", reply_markup=category_menu())
+
+async def manual_category(message, entry):
+    entry["category"] = message.text.split(" ", 1)[-1]
+    conversations.set(message.chat.id, {"state": "confirm", "data": entry})
+
+    await bot.send_message(message.chat.id, manual_confirm_text(entry), reply_markup=confirm_menu())
+
+# ================= OTHER =================
+
+async def total(message, entry=None):
+    await bot.send_message(message.chat.id, f"💰 Total: ₹{await get_total_expense(message.chat.id)}")
+
+async def csv_download(message, entry=None):
+    await bot.send_message(message.chat.id, "📥 Which period?", reply_markup=export_period_menu())
+
+@bot.callback_query_handler(func=lambda c: c.data.startswith("export_period:"))
+async def export_period(call):
+    period = call.data.split(":", 1)[1]
+    await bot.edit_message_text(
+        "📥 Which format?",
+        call.message.chat.id,
+        call.message.message_id,
+        reply_markup=export_format_menu(period)
+    )
+
+@bot.callback_query_handler(func=lambda c: c.data.startswith("export:"))
+async def export_download(call):
+    _, fmt, period = call.data.split(":", 2)
+    start, end = period_range(period, datetime.now(IST).date())
+    await send_export(call.message.chat.id, fmt, start, end)
+
+@bot.message_handler(commands=["export"])
+async def export_command(message):
+    # /export [csv|gz|xlsx] [from DD-MM-YYYY] [to DD-MM-YYYY]
+    args = message.text.split()[1:]
+    fmt = args.pop(0).lower() if args and args[0].lower() in FORMATS else "csv"
+    dates = [normalize_date(a) for a in args[:2]]
+    if None in dates:
+        await bot.send_message(message.chat.id, "Usage: /export [csv|gz|xlsx] [from DD-MM-YYYY] [to DD-MM-YYYY]")
+        return
+    start = dates[0] if dates else None
+    end = dates[1] if len(dates) > 1 else None
+    await send_export(message.chat.id, fmt, start, end)
+
+async def reports(message, entry=None):
+    await bot.send_message(message.chat.id, "📊 Which report?", reply_markup=reports_menu())
+
+async def send_report(chat_id, kind):
+    summary = await get_summary(chat_id)
+    if not summary["count"]:
+        await bot.send_message(chat_id, "No data yet!")
+        return
+    # Chart drawing is CPU work → off the loop
+    text, chart = await in_storage(build_report, kind, summary)
+    if chart is None:
+        await bot.send_message(chat_id, text)
+        return
+    await bot.send_photo(chat_id, types.InputFile(chart, file_name=f"{kind}.png"), caption=text)
+
+@bot.callback_query_handler(func=lambda c: c.data.startswith("report:"))
+async def report_callback(call):
+    kind = call.data.split(":", 1)[1]
+    if kind in REPORTS:
+        await send_report(call.message.chat.id, kind)
+
+@bot.message_handler(commands=list(REPORTS))
+async def report_command(message):
+    await send_report(message.chat.id, message.text.split()[0].lstrip("/").split("@")[0])
+
+async def reset(message, entry=None):
+    await reset_data(message.chat.id)
+    await bot.send_message(message.chat.id, "🗑️ All data cleared!", reply_markup=main_menu())
+
+# ================= IMPORT =================
+
+def telegram_file_url(file_path):
+    url = asyncio_helper.FILE_URL or "https://api.telegram.org/file/bot{0}/{1}"
+    return url.format(TELEGRAM_BOT_TOKEN, file_path)
+
+async def download_upload(file_path):
+    # Streamed to a temp file on the event loop with the bot's own HTTP
+    # session: a slow upload never holds one of the few storage threads
+    session = await asyncio_helper.session_manager.get_session()
+    async with session.get(telegram_file_url(file_path), proxy=asyncio_helper.proxy) as resp:
+        resp.raise_for_status()
+        return await spool_async(resp.content.iter_chunked(SPOOL_CHUNK))
+
+def import_upload(user_id, upload, filename):
+    # Runs on a storage thread once the file is on disk, as one storage batch
+    with upload:
+        return timed_storage("import", import_stream, store, user_id, upload, filename)
+
+async def import_help(message, entry=None):
+    await bot.send_message(message.chat.id, IMPORT_HELP_TEXT)
+
+@bot.message_handler(content_types=["document"])
+async def import_document(message):
+    chat_id = message.chat.id
+    doc = message.document
+    if not supported(doc.file_name):
+        await bot.send_message(chat_id, "📎 I can import .csv, .csv.gz, .json or .jsonl files.")
+        return
+    if doc.file_size and doc.file_size > IMPORT_MAX_BYTES:
+        await bot.send_message(chat_id, f"📎 That file is too big (max {IMPORT_MAX_BYTES // (1024 * 1024)} MB).")
+        return
+
+    processing_msg = await bot.send_message(chat_id, "📥 Importing your expenses...")
+    try:
+        file_info = await bot.get_file(doc.file_id)
+        upload = await asyncio.wait_for(download_upload(file_info.file_path), 60)
+        result = await in_storage(import_upload, chat_id, upload, doc.file_name)
+    except Exception:
+        traceback.print_exc()
+        await bot.edit_message_text("❌ Couldn't read that file, nothing was imported.", chat_id, processing_msg.message_id)
+        return
+    await bot.edit_message_text(result_text(result), chat_id, processing_msg.message_id)
+
+# ================= CONVERSATION TABLES =================
+
+# Tables in flows.py, with this runtime's handlers
+conversation_flow = build_flow(globals())
+
+async def dispatch(update, text, free_input=False):
+    # A double tap on "✅ Save All" waits here, then finds the album gone
+    message = update.message if isinstance(update, types.CallbackQuery) else update
+    async with chat_locks.hold(message.chat.id):
+        return await conversation_flow.dispatch_async(update, text, conversations.get(message.chat.id), free_input)
+
+@bot.callback_query_handler(func=lambda c: c.data in conversation_flow.keys)
+async def conversation_button(call):
+    if not await dispatch(call, call.data):
+        await bot.answer_callback_query(call.id, EXPIRED_BUTTON_TEXT)
+
+# Registered last, so commands (/start, /export, ...) are matched first
+@bot.message_handler(content_types=["text"])
+async def conversation_text(message):
+    await dispatch(message, message.text, free_input=True)
+
+# ================= RUN =================
+
+async def main():
+    migrated = await in_storage(store.migrate_all)
+    if migrated:
+        print(f"📦 Migrated {migrated} user file(s) to {type(store).__name__}")
+
+    ocr_engine.start()
+    metrics.start_metrics_server()
+    start_keyword_watcher()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    print(
+        f"🤖 Async bot running with PaddleOCR ({OCR_WORKERS} OCR workers, {OCR_MODE} mode, "
+        f"batch {OCR_BATCH_SIZE}, queue {OCR_QUEUE_SIZE}, {STORAGE_THREADS} storage threads), "
+        f"polling after {time.monotonic() - STARTED_AT:.1f}s..."
+    )
+    polling = asyncio.create_task(bot.infinity_polling(skip_pending=True))
+    try:
+        await stop.wait()
+    finally:
+        print("🛑 Stopping: finishing open conversations and queued bills...")
+        polling.cancel()
+        await asyncio.gather(polling, return_exceptions=True)
+
+        # Handlers still running (bills waiting on OCR, replies in flight)
+        others = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        if others:
+            await asyncio.wait(others, timeout=60)
+
+        await loop.run_in_executor(None, lambda: ocr_executor.shutdown(wait=True, timeout=60))
+        storage_executor.shutdown(wait=True)
+        ocr_engine.close()
+        ocr_cache.close()
+        conversations.close()
+        store.close()
+        try:
+            await bot.close_session()
+        except Exception:
+            pass
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bill_parser import AMOUNT_KEYWORDS, amount_candidates, extract_amount
+
+# extract_amount before the single-pass scanner: one regex per keyword
+# (re-built on every call) plus five currency passes. Kept here as the
+# baseline, and to check both return the same candidates.
+
+CURRENCY_PATTERNS = [
+    r"rs\.?\s*([\d,]+(?:\.\d{1,2})?)",
+    r"rupees\s*([\d,]+(?:\.\d{1,2})?)",
+    r"₹\s*([\d,]+(?:\.\d{1,2})?)",
+    r"([\d,]+(?:\.\d{1,2})?)\s*/-",
+    r"([\d,]+(?:\.\d{1,2})?)\s*only"
+]
+
+
+def legacy_candidates(text):
+    text = text.lower()
+    candidates = []
+
+    for key in AMOUNT_KEYWORDS:
+        pattern = rf"{key}[:\-]?\s*(?:rs\.?|₹|rupees)?\s*([\d,]+(?:\.\d{{1,2}})?)"
+        pattern = pattern.replace("{{1,2}}", "{1,2}")
+        for m in re.findall(pattern, text):
+            try:
+                val = float(m.replace(",", ""))
+            except ValueError:
+                continue
+            if val >= 50:
+                candidates.append(val)
+
+    for p in CURRENCY_PATTERNS:
+        for m in re.findall(p, text):
+            try:
+                val = float(m.replace(",", ""))
+            except ValueError:
+                continue
+            if val >= 50:
+                candidates.append(val)
+
+    return candidates
+
+
+def legacy_extract_amount(text):
+    candidates = legacy_candidates(text)
+    if not candidates:
+        return ""
+    return str(max(set(candidates)))
+
+
+def itemized_receipt(items):
+    lines = [
+        "SARAVANA SUPER STORES",
+        "12, GANDHI ROAD, MADURAI",
+        "DATE: 12/03/2025 TIME: 13:45",
+        "BILL NO: 4455",
+    ]
+    for i in range(items):
+        lines.append(f"{i + 1} RICE BAG 5KG 2 x 125.50 Rs. {251 + i}.00")
+    lines += [
+        "SUB TOTAL 1,234.00",
+        "CGST 2.5% 30.85 SGST 2.5% 30.85",
+        "GRAND TOTAL: Rs. 1,295.70",
+        "Rupees One Thousand Two Hundred Ninety Five only",
+        "Thank you, visit again",
+    ]
+    return " ".join(lines)
+
+
+def timeit(fn, text, min_seconds):
+    runs, start = 0, time.perf_counter()
+    while True:
+        fn(text)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / runs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="extract_amount: legacy vs single-pass")
+    parser.add_argument("--items", type=int, nargs="+", default=[5, 50, 200, 1000])
+    parser.add_argument("--seconds", type=float, default=0.5)
+    args = parser.parse_args()
+
+    print(f"{'items':>6} {'chars':>7} {'legacy':>10} {'single-pass':>12} {'speed-up':>9}")
+    for items in args.items:
+        text = itemized_receipt(items)
+
+        new = sorted(set(c[0] for c in amount_candidates(text)))
+        old = sorted(set(legacy_candidates(text)))
+        assert new == old, f"candidate mismatch at {items} items: {new} != {old}"
+        assert extract_amount(text) == legacy_extract_amount(text)
+
+        t_old = timeit(legacy_extract_amount, text, args.seconds)
+        t_new = timeit(extract_amount, text, args.seconds)
+        print(f"{items:>6} {len(text):>7} {t_old * 1e6:>8.0f}us {t_new * 1e6:>10.0f}us {t_old / t_new:>8.1f}x")
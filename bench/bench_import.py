@@ -0,0 +1,109 @@
+import os
+import sys
+import csv
+import gzip
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import open_storage
+from importer import import_stream
+from export import HEADER
+
+# Bulk import speed and memory: a generated CSV / JSON upload of --rows
+# expenses goes through importer.import_stream into each storage backend.
+# With --memory, peak traced memory is reported too (tracemalloc slows the
+# import a lot, so timings of that run mean little): on every backend it
+# grows only with the duplicate-check keys, not with the file, since rows
+# stream from the spooled file into the batch write.
+#
+#   python bench/bench_import.py --rows 1000 10000 100000
+#   python bench/bench_import.py --rows 100000 --memory
+
+CATEGORIES = ["Food", "Travel", "Fuel", "Groceries", "Shopping", "Medical", "Bills", "Other"]
+PLACES = ["Dmart", "Indian Oil", "KFC", "Reliance Fresh", "Zudio", "Apollo Pharmacy", "Annapoorna"]
+
+
+def generate(rows, seed=0):
+    rnd = random.Random(seed)
+    for _ in range(rows):
+        yield [
+            f"{rnd.randint(1, 28):02d}-{rnd.randint(1, 12):02d}-{rnd.choice([2024, 2025])}",
+            f"{rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d}",
+            rnd.choice(PLACES),
+            rnd.choice(CATEGORIES),
+            rnd.randint(100, 500000) / 100,
+        ]
+
+
+def write_file(path, fmt, rows):
+    if fmt == "json":
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("[\n")
+            for i, row in enumerate(generate(rows)):
+                f.write(("," if i else "") + json.dumps(dict(zip(["date", "time", "place", "category", "amount"], row))) + "\n")
+            f.write("]\n")
+        return
+    opener = gzip.open if fmt == "csv.gz" else open
+    with opener(path, "wt", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(generate(rows))
+
+
+def run(backend, fmt, rows, workdir, memory=False):
+    path = os.path.join(workdir, f"upload.{fmt}")
+    write_file(path, fmt, rows)
+    size = os.path.getsize(path)
+
+    store = open_storage(os.path.join(workdir, backend), backend)
+    try:
+        if memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        with open(path, "rb") as raw:
+            result = import_stream(store, 1, raw, path)
+        seconds = time.perf_counter() - start
+        peak = None
+        if memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        # Same file again: everything is a duplicate, nothing is written
+        with open(path, "rb") as raw:
+            again = import_stream(store, 1, raw, path)
+        total = store.total(1)
+    finally:
+        store.close()
+
+    ok = result.imported + result.duplicates == rows and again.imported == 0
+    memory_text = f"peak {peak / 1e6:.1f} MB, " if peak is not None else ""
+    print(
+        f"{'✅' if ok else '❌'} {backend:<8} {fmt:<6} {rows:>7} rows ({size / 1e6:.1f} MB): "
+        f"{seconds:.2f}s, {rows / seconds:,.0f} rows/s, {memory_text}"
+        f"imported {result.imported}, dup {result.duplicates}, skipped {result.skipped}, "
+        f"re-import dup {again.duplicates}, total ₹{total:,.2f}"
+    )
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--backend", choices=["jsonl", "sqlite", "columnar"], nargs="+", default=["jsonl", "sqlite"])
+    parser.add_argument("--format", choices=["csv", "csv.gz", "json"], nargs="+", default=["csv", "json"])
+    parser.add_argument("--memory", action="store_true", help="report peak memory (slow)")
+    args = parser.parse_args()
+
+    failed = False
+    for rows in args.rows:
+        for backend in args.backend:
+            for fmt in args.format:
+                with tempfile.TemporaryDirectory() as workdir:
+                    failed |= not run(backend, fmt, rows, workdir, args.memory)
+    sys.exit(1 if failed else 0)
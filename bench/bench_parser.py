@@ -0,0 +1,191 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bill_parser import (
+    extract_amount, extract_date, extract_time, extract_place, detect_category, parse_bill,
+)
+from ocr_engine import StubEngine
+from receipts import KINDS, generate
+
+# Throughput and latency percentiles of the bill parser on a synthetic
+# receipt corpus (bench/receipts.py). "ocr+parse" runs the bot's whole
+# text path with the stub OCR engine, so PaddleOCR isn't needed.
+#
+#   python bench/bench_parser.py --out bench/results/before.json
+#   python bench/bench_parser.py --baseline bench/results/before.json
+#
+# With --baseline it exits 1 if any function got slower than --threshold.
+
+
+def prepare(corpus):
+    # What each function is actually called with inside parse_bill
+    for r in corpus:
+        r["lines"] = [l.strip() for l in r["text"].split("\n") if l.strip()]
+        r["full"] = " ".join(r["lines"])
+        r["image"] = r["text"].encode("utf-8")
+    return corpus
+
+
+def ocr_and_parse(engine):
+    def run(image_bytes):
+        lines, scores, timings = engine.recognize(image_bytes)
+        return parse_bill("\n".join(lines))
+    return run
+
+
+def cases(engine):
+    # name → (function, receipt field it takes)
+    return {
+        "extract_amount": (extract_amount, "full"),
+        "extract_date": (extract_date, "full"),
+        "extract_time": (extract_time, "full"),
+        "extract_place": (extract_place, "lines"),
+        "detect_category": (detect_category, "full"),
+        "parse_bill": (parse_bill, "text"),
+        "ocr+parse": (ocr_and_parse(engine), "image"),
+    }
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def measure(fn, inputs, rounds, warmup=1):
+    for _ in range(warmup):
+        for x in inputs:
+            fn(x)
+
+    samples = []
+    perf = time.perf_counter
+    start = perf()
+    for _ in range(rounds):
+        for x in inputs:
+            t = perf()
+            fn(x)
+            samples.append(perf() - t)
+    wall = perf() - start
+
+    samples.sort()
+    return {
+        "calls": len(samples),
+        "ops_per_sec": len(samples) / wall if wall else 0.0,
+        "mean_us": sum(samples) / len(samples) * 1e6,
+        "p50_us": percentile(samples, 50) * 1e6,
+        "p95_us": percentile(samples, 95) * 1e6,
+        "p99_us": percentile(samples, 99) * 1e6,
+        "max_us": samples[-1] * 1e6,
+    }
+
+
+def accuracy(corpus):
+    amount = sum(1 for r in corpus if extract_amount(r["full"]) == r["amount"])
+    category = sum(1 for r in corpus if detect_category(r["full"]) == r["category"])
+    return {
+        "amount": amount / len(corpus),
+        "category": category / len(corpus),
+    }
+
+
+def compare(results, baseline, threshold):
+    # → list of (name, metric, old, new, change) that regressed
+    regressions = []
+    for name, new in results["functions"].items():
+        old = baseline.get("functions", {}).get(name)
+        if not old:
+            continue
+        for metric, worse_if_higher in (("p50_us", True), ("p95_us", True), ("ops_per_sec", False)):
+            change = (new[metric] - old[metric]) / old[metric] if old[metric] else 0.0
+            if (change if worse_if_higher else -change) > threshold:
+                regressions.append((name, metric, old[metric], new[metric], change))
+    return regressions
+
+
+def print_table(title, rows):
+    print(f"\n{title}")
+    print(f"{'':<18} {'ops/s':>10} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for name, r in rows.items():
+        print(
+            f"{name:<18} {r['ops_per_sec']:>10.0f} {r['p50_us']:>7.0f}us {r['p95_us']:>7.0f}us "
+            f"{r['p99_us']:>7.0f}us {r['max_us']:>7.0f}us"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bill parser benchmarks on synthetic receipts")
+    parser.add_argument("--receipts", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", help="function names to run (default: all)")
+    parser.add_argument("--out", help="results file (default: bench/results/parser-<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    corpus = prepare(generate(args.receipts, seed=args.seed))
+    engine = StubEngine(delay_ms=0)
+    engine.ready.set()
+
+    selected = cases(engine)
+    if args.only:
+        selected = {k: v for k, v in selected.items() if k in args.only}
+
+    print(f"📊 {len(corpus)} receipts x {args.rounds} rounds "
+          f"(avg {sum(len(r['text']) for r in corpus) / len(corpus):.0f} chars)")
+
+    functions = {}
+    for name, (fn, field) in selected.items():
+        functions[name] = measure(fn, [r[field] for r in corpus], args.rounds)
+
+    by_kind = {}
+    for kind in KINDS:
+        texts = [r["text"] for r in corpus if r["kind"] == kind]
+        if texts:
+            by_kind[kind] = measure(parse_bill, texts, args.rounds)
+
+    print_table("Per function", functions)
+    print_table("parse_bill by receipt kind", by_kind)
+
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "receipts": len(corpus),
+        "rounds": args.rounds,
+        "seed": args.seed,
+        "functions": functions,
+        "by_kind": by_kind,
+        "accuracy": accuracy(corpus),
+    }
+    print(f"\n🎯 amount {results['accuracy']['amount']:.1%}, category {results['accuracy']['category']:.1%} "
+          f"match the generated receipts")
+
+    out = args.out or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "results",
+        f"parser-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Saved {out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, metric, old, new, change in regressions:
+            print(f"⚠️ {name} {metric}: {old:.1f} → {new:.1f} ({change:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No regressions over {args.threshold:.0%} vs {args.baseline}")
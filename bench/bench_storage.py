@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import open_storage
+
+# Storage backends on one large history: how long "💰 Total Expense", the
+# report rollups (summary), a one-month export (iter_rows with a date
+# range) and a full load take, plus the bytes on disk. Every backend must
+# give the same summary and the same rows.
+#
+#   python bench/bench_storage.py --rows 10000 100000 500000
+#   python bench/bench_storage.py --backend jsonl columnar
+#
+# Exits 1 if the backends disagree.
+
+CATEGORIES = ["Food", "Travel", "Fuel", "Groceries", "Shopping", "Medical", "Bills", "Other"]
+PLACES = ["Dmart", "Indian Oil", "KFC", "kfc ", "Reliance Fresh", "Zudio", "Apollo Pharmacy", ""]
+
+
+def generate(rows, seed=0):
+    rnd = random.Random(seed)
+    for _ in range(rows):
+        yield {
+            "date": f"{rnd.randint(1, 28):02d}-{rnd.randint(1, 12):02d}-{rnd.choice([2023, 2024, 2025])}",
+            "time": f"{rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d}",
+            "place": rnd.choice(PLACES),
+            "category": rnd.choice(CATEGORIES),
+            "amount": rnd.randint(100, 500000) / 100,
+        }
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+def disk_bytes(folder):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(folder) for name in names)
+
+
+def rounded(summary):
+    # Backends sum in different orders: compare to the paisa
+    out = {}
+    for k, v in summary.items():
+        out[k] = {kk: round(vv, 2) for kk, vv in v.items()} if isinstance(v, dict) else round(v, 2)
+    return out
+
+
+def run(backend, rows, workdir, repeat):
+    folder = os.path.join(workdir, backend)
+    store = open_storage(folder, backend)
+    try:
+        write, _ = timed(lambda: store.add_many(1, generate(rows)), 1)
+        timings = {"write": write}
+        timings["total"], total = timed(lambda: store.total(1), repeat)
+        timings["summary"], summary = timed(lambda: store.summary(1), repeat)
+        timings["month"], month = timed(lambda: list(store.iter_rows(1, "2024-03-01", "2024-03-31")), repeat)
+        timings["load"], rows_loaded = timed(lambda: store.load(1), 1)
+    finally:
+        store.close()
+    return {
+        "timings": timings,
+        "total": round(total, 2),
+        "summary": rounded(summary),
+        "month": month,
+        "rows": len(rows_loaded),
+        "bytes": disk_bytes(folder),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Storage backend benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--backend", choices=["jsonl", "sqlite", "columnar"], nargs="+",
+                        default=["jsonl", "sqlite", "columnar"])
+    parser.add_argument("--repeat", type=int, default=3, help="best of N for the read operations")
+    args = parser.parse_args()
+
+    failed = False
+    for rows in args.rows:
+        print(f"\n📦 {rows:,} expenses for one user")
+        print(f"  {'backend':<9} {'write':>8} {'total':>9} {'summary':>9} {'month':>9} {'load':>8} {'disk':>9}")
+        results = {}
+        with tempfile.TemporaryDirectory() as workdir:
+            for backend in args.backend:
+                r = results[backend] = run(backend, rows, workdir, args.repeat)
+                t = r["timings"]
+                print(
+                    f"  {backend:<9} {t['write']:>7.2f}s {t['total'] * 1000:>7.2f}ms "
+                    f"{t['summary'] * 1000:>7.2f}ms {t['month'] * 1000:>7.1f}ms {t['load']:>7.2f}s "
+                    f"{r['bytes'] / 1e6:>7.1f}MB"
+                )
+
+        first, reference = next(iter(results.items()))
+        for backend, r in results.items():
+            same = (
+                r["rows"] == rows and r["total"] == reference["total"]
+                and r["summary"] == reference["summary"] and r["month"] == reference["month"]
+            )
+            if not same:
+                failed = True
+                print(f"  ❌ {backend} disagrees with {first}")
+    sys.exit(1 if failed else 0)
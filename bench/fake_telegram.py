@@ -0,0 +1,256 @@
+import json
+import time
+import threading
+from email import policy
+from email.parser import BytesParser
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the Telegram Bot API, enough for bot.py:
+# getUpdates (long polling), sendMessage, editMessageText, deleteMessage,
+# getFile + file download, sendDocument, sendPhoto. Tests push updates in and wait
+# for the bot's replies per chat. Point the bot at it with
+# TELEGRAM_API_URL=<FakeTelegram.url>.
+
+LONG_POLL_CAP = 5   # seconds; keeps shutdown quick whatever the bot asks for
+
+
+class Reply:
+
+    def __init__(self, chat_id, method, params, at):
+        self.chat_id = chat_id
+        self.method = method
+        self.params = params
+        self.at = at
+
+    @property
+    def text(self):
+        return self.params.get("text", "")
+
+
+class FakeTelegram:
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self._cond = threading.Condition()
+        self._updates = []
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._replies = {}     # chat_id → [Reply]
+        self._files = {}       # file_id → bytes
+        self._closing = False
+
+        self.calls = {}        # API method → count
+        self.first_poll = threading.Event()
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                fake._handle(self)
+
+            def do_POST(self):
+                fake._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://{host}:{self._server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="fake-telegram", daemon=True).start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ================= TEST SIDE =================
+
+    def _message(self, chat_id, **fields):
+        with self._cond:
+            message_id = self._next_message_id
+            self._next_message_id += 1
+        message = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private", "first_name": f"User{chat_id}"},
+        }
+        message.update(fields)
+        return message
+
+    def _push(self, update):
+        with self._cond:
+            update["update_id"] = self._next_update_id
+            self._next_update_id += 1
+            self._updates.append(update)
+            self._cond.notify_all()
+        return update
+
+    def _user(self, chat_id):
+        return {"id": chat_id, "is_bot": False, "first_name": f"User{chat_id}"}
+
+    def send_text(self, chat_id, text):
+        return self._push({"message": self._message(chat_id, text=text, **{"from": self._user(chat_id)})})
+
+    def send_photo(self, chat_id, image_bytes, file_id, file_unique_id, media_group_id=None):
+        self._files[file_id] = image_bytes
+        photo = [{
+            "file_id": file_id,
+            "file_unique_id": file_unique_id,
+            "width": 1280,
+            "height": 1706,
+            "file_size": len(image_bytes),
+        }]
+        fields = {"photo": photo, "from": self._user(chat_id)}
+        if media_group_id:
+            fields["media_group_id"] = media_group_id
+        return self._push({"message": self._message(chat_id, **fields)})
+
+    def send_document(self, chat_id, data, file_name, file_id):
+        self._files[file_id] = data
+        document = {"file_id": file_id, "file_unique_id": file_id, "file_name": file_name, "file_size": len(data)}
+        return self._push({"message": self._message(chat_id, document=document, **{"from": self._user(chat_id)})})
+
+    def click(self, chat_id, message_id, data):
+        return self._push({"callback_query": {
+            "id": str(self._next_update_id),
+            "from": self._user(chat_id),
+            "message": {"message_id": message_id, "date": int(time.time()),
+                        "chat": {"id": chat_id, "type": "private"}},
+            "chat_instance": str(chat_id),
+            "data": data,
+        }})
+
+    def reply_count(self, chat_id):
+        with self._cond:
+            return len(self._replies.get(chat_id, []))
+
+    def wait_reply(self, chat_id, start, match, timeout):
+        # First reply at index >= start for which match(reply) is truthy,
+        # or None on timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                replies = self._replies.get(chat_id, [])
+                for reply in replies[start:]:
+                    if match(reply):
+                        return reply
+                start = len(replies)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._closing:
+                    return None
+                self._cond.wait(remaining)
+
+    # ================= BOT API SIDE =================
+
+    def _handle(self, request):
+        parts = urlsplit(request.path)
+        params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        length = int(request.headers.get("Content-Length") or 0)
+        body = request.rfile.read(length) if length else b""
+        content_type = request.headers.get("Content-Type", "")
+        if body and content_type.startswith("application/x-www-form-urlencoded"):
+            params.update({k: v[0] for k, v in parse_qs(body.decode()).items()})
+        elif body and content_type.startswith("multipart/form-data"):
+            params.update(self._form_fields(content_type, body))
+
+        path = parts.path.strip("/").split("/")
+        if path[0] == "file":
+            # /file/bot<token>/<file_path>
+            data = self._files.get("/".join(path[2:]))
+            if data is None:
+                return self._respond(request, 404, b"Not Found", "text/plain")
+            return self._respond(request, 200, data, "application/octet-stream")
+
+        method = path[-1]
+        with self._cond:
+            self.calls[method] = self.calls.get(method, 0) + 1
+
+        handler = getattr(self, f"api_{method}", None)
+        result = handler(params) if handler else True
+        payload = json.dumps({"ok": True, "result": result}).encode()
+        self._respond(request, 200, payload, "application/json")
+
+    def _form_fields(self, content_type, body):
+        # Plain (non-file) fields of a multipart upload, e.g. sendDocument's chat_id
+        message = BytesParser(policy=policy.default).parsebytes(
+            b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body
+        )
+        fields = {}
+        for part in message.iter_parts():
+            if part.get_filename() is None:
+                fields[part.get_param("name", header="content-disposition")] = part.get_content().strip()
+        return fields
+
+    def _respond(self, request, status, payload, content_type):
+        request.send_response(status)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(payload)))
+        request.end_headers()
+        try:
+            request.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass   # client gave up (e.g. a cancelled long poll at shutdown)
+
+    def _record(self, method, params):
+        chat_id = int(params.get("chat_id", 0))
+        reply = Reply(chat_id, method, params, time.monotonic())
+        with self._cond:
+            self._replies.setdefault(chat_id, []).append(reply)
+            self._cond.notify_all()
+        return chat_id
+
+    def api_getMe(self, params):
+        return {"id": 1, "is_bot": True, "first_name": "LoadTest", "username": "loadtest_bot"}
+
+    def api_getUpdates(self, params):
+        self.first_poll.set()
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", 100))
+        timeout = min(float(params.get("timeout", 0)), LONG_POLL_CAP)
+
+        with self._cond:
+            if offset < 0:
+                return self._updates[offset:]
+            # Everything below offset is acknowledged
+            self._updates = [u for u in self._updates if u["update_id"] >= offset]
+            deadline = time.monotonic() + timeout
+            while not self._updates and not self._closing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self._updates[:limit]
+
+    def api_sendMessage(self, params):
+        chat_id = self._record("sendMessage", params)
+        return self._message(chat_id, text=params.get("text", ""))
+
+    def api_editMessageText(self, params):
+        chat_id = self._record("editMessageText", params)
+        return self._message(chat_id, text=params.get("text", ""))
+
+    def api_deleteMessage(self, params):
+        self._record("deleteMessage", params)
+        return True
+
+    def api_sendDocument(self, params):
+        chat_id = self._record("sendDocument", params)
+        return self._message(chat_id, document={"file_id": "doc", "file_unique_id": "doc"})
+
+    def api_sendPhoto(self, params):
+        chat_id = self._record("sendPhoto", params)
+        return self._message(chat_id, photo=[{"file_id": "photo", "file_unique_id": "photo", "width": 1, "height": 1}])
+
+    def api_getFile(self, params):
+        file_id = params.get("file_id", "")
+        data = self._files.get(file_id, b"")
+        return {"file_id": file_id, "file_unique_id": file_id,
+                "file_size": len(data), "file_path": file_id}
@@ -0,0 +1,299 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import signal
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+from fake_telegram import FakeTelegram
+from receipts import generate
+from bench_parser import percentile
+
+# End-to-end load test: runs bot.py against a local fake Telegram API
+# (bench/fake_telegram.py) with the stub OCR engine, and replays scripted
+# user sessions with more and more simulated users at once.
+#
+#   python bench/loadtest.py --users 1 5 10 25 50 --sessions 4
+#
+# Each simulated user waits for the bot's reply before the next step, like
+# a person tapping through the menus; the time from update to reply is the
+# latency of the handler that step hits.
+
+ERROR_MARKERS = ("❌", "🚦")
+
+
+class StepFailed(Exception):
+    pass
+
+
+class User:
+
+    def __init__(self, api, chat_id, rng, timeout, receipts, unique_bills, records):
+        self.api = api
+        self.chat_id = chat_id
+        self.rng = rng
+        self.timeout = timeout
+        self.receipts = receipts
+        self.unique_bills = unique_bills
+        self.records = records
+
+    def _step(self, handler, push, expect):
+        # push() sends the update; expect is the text (or texts) the awaited
+        # reply contains, or "sendDocument" / "sendPhoto" for a file reply
+        expects = expect if isinstance(expect, tuple) else (expect,)
+        start_index = self.api.reply_count(self.chat_id)
+        start = time.monotonic()
+        push()
+
+        def expected(reply):
+            if reply.method in ("sendDocument", "sendPhoto"):
+                return reply.method in expects
+            return any(e in reply.text for e in expects)
+
+        def match(reply):
+            return expected(reply) or any(m in reply.text for m in ERROR_MARKERS)
+
+        reply = self.api.wait_reply(self.chat_id, start_index, match, self.timeout)
+        if reply is None:
+            error = "timeout"
+        elif expected(reply):
+            error = None
+        else:
+            error = reply.text.split("\n")[0]
+
+        latency = (reply.at if reply else time.monotonic()) - start
+        self.records.append((handler, latency, error))
+        if error:
+            raise StepFailed(f"{handler}: {error}")
+
+    def text(self, handler, text, expect):
+        self._step(handler, lambda: self.api.send_text(self.chat_id, text), expect)
+
+    def click(self, handler, data, expect):
+        self._step(handler, lambda: self.api.click(self.chat_id, 0, data), expect)
+
+    def _file_ids(self, image_bytes):
+        file_id = f"photo-{uuid.uuid4().hex}"
+        return file_id, file_id if self.unique_bills else f"bill-{hash(image_bytes) & 0xffff:x}"
+
+    def photo(self, handler, image_bytes, expect):
+        file_id, unique_id = self._file_ids(image_bytes)
+        self._step(handler, lambda: self.api.send_photo(self.chat_id, image_bytes, file_id, unique_id), expect)
+
+    def album(self, handler, images, expect):
+        # Photos of one media group, sent back to back like a Telegram album
+        group = uuid.uuid4().hex
+        files = [(image_bytes, *self._file_ids(image_bytes)) for image_bytes in images]
+
+        def push():
+            for image_bytes, file_id, unique_id in files:
+                self.api.send_photo(self.chat_id, image_bytes, file_id, unique_id, media_group_id=group)
+        self._step(handler, push, expect)
+
+    # ================= SESSIONS =================
+
+    def manual_entry(self):
+        self.text("start", "/start", "Welcome")
+        self.text("manual_start", "✏️ Add Manually", "Enter amount")
+        self.text("manual_flow/amount", str(self.rng.randint(50, 5000)), "current date")
+        self.text("manual_flow/date", "📅 Use Current Date", "current time")
+        self.text("manual_flow/time", "🕐 Use Current Time", "Enter place")
+        self.text("manual_flow/place", self.rng.choice(["Annapoorna", "Dmart", "Indian Oil"]), "Select category")
+        self.text("manual_flow/category", self.rng.choice(["🍔 Food", "⛽ Fuel", "🛒 Groceries"]), "Confirm Details")
+        self.click("handle_confirmation", "confirm_yes", "Expense saved")
+
+    def bill_photo(self, edit=False):
+        receipt = self.rng.choice(self.receipts)
+        self.text("bill_start", "📸 Add by Bill Photo", "Send the bill photo")
+        self.photo("bill_photo_handler", receipt["text"].encode("utf-8"), "Confirm Details")
+        if edit:
+            self.click("handle_confirmation/no", "confirm_no", "Which detail")
+            self.click("edit_field", "edit_amount", "Enter correct amount")
+            self.text("receive_edit", str(self.rng.randint(50, 5000)), "Confirm Again")
+        self.click("handle_confirmation", "confirm_yes", "Expense saved")
+
+    def bill_album(self):
+        receipts = [self.rng.choice(self.receipts) for _ in range(self.rng.randint(2, 5))]
+        self.text("bill_start", "📸 Add by Bill Photo", "Send the bill photo")
+        self.album("read_album", [r["text"].encode("utf-8") for r in receipts], f"Confirm {len(receipts)} Bills")
+        self.click("album_pick", f"album_edit:{self.rng.randrange(len(receipts))}", "Which detail")
+        self.click("album_edit_field", "edit_amount", "Enter correct amount")
+        self.text("album_receive_edit", str(self.rng.randint(50, 5000)), f"Confirm {len(receipts)} Bills")
+        self.click("album_save", "album_save", ("expense(s) saved", "need an amount"))
+
+    def reports(self):
+        self.text("total", "💰 Total Expense", "Total:")
+        self.text("csv_download", "📥 Download CSV", "Which period?")
+        self.click("export_period", "export_period:all", "Which format?")
+        self.click("export_download", f"export:{self.rng.choice(['csv', 'gz', 'xlsx'])}:all",
+                   ("sendDocument", "No data yet"))
+        self.text("reports", "📊 Reports", "Which report?")
+        self.click("report_callback", f"report:{self.rng.choice(['monthly', 'categories', 'places'])}",
+                   ("sendPhoto", "No data yet"))
+
+    def run(self, sessions):
+        scripts = [self.manual_entry, self.bill_photo, lambda: self.bill_photo(edit=True), self.bill_album, self.reports]
+        for i in range(sessions):
+            try:
+                scripts[(self.chat_id + i) % len(scripts)]()
+            except StepFailed:
+                # Leave any half-done flow before the next session
+                try:
+                    self.text("cancel", "🚫 Cancel", "cancelled")
+                except StepFailed:
+                    pass
+
+
+# ================= BOT PROCESS =================
+
+def start_bot(api, workdir, args):
+    env = dict(os.environ)
+    env.update({
+        "BOT_TOKEN": "123456:LOADTEST",
+        "TELEGRAM_API_URL": api.url,
+        "OCR_MODE": "stub",
+        "OCR_STUB_DELAY_MS": str(args.ocr_ms),
+        "PYTHONUNBUFFERED": "1",
+    })
+    os.makedirs(workdir, exist_ok=True)
+    log = open(os.path.join(workdir, "bot.log"), "w")
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_DIR, args.bot)],
+        cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    if not api.first_poll.wait(60):
+        proc.kill()
+        raise RuntimeError(f"bot never polled, see {log.name}")
+    return proc, log
+
+
+def stop_bot(proc, log):
+    proc.send_signal(signal.SIGTERM)
+    try:
+        proc.wait(30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+    log.close()
+
+
+# ================= LOAD LEVELS =================
+
+def run_level(api, users, sessions, first_chat_id, args, receipts):
+    records = []
+    threads = []
+    for i in range(users):
+        user = User(api, first_chat_id + i, random.Random(first_chat_id + i), args.timeout,
+                    receipts, not args.repeat_bills, records)
+        threads.append(threading.Thread(target=user.run, args=(sessions,), daemon=True))
+
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+        time.sleep(args.ramp / max(1, users))
+    for t in threads:
+        t.join()
+    wall = time.monotonic() - start
+
+    handlers = {}
+    for handler, latency, error in records:
+        h = handlers.setdefault(handler, {"latencies": [], "errors": 0})
+        h["latencies"].append(latency)
+        if error:
+            h["errors"] += 1
+
+    summary = {}
+    for handler, h in handlers.items():
+        lat = sorted(h["latencies"])
+        summary[handler] = {
+            "calls": len(lat),
+            "errors": h["errors"],
+            "p50_ms": percentile(lat, 50) * 1000,
+            "p95_ms": percentile(lat, 95) * 1000,
+            "p99_ms": percentile(lat, 99) * 1000,
+        }
+
+    all_lat = sorted(r[1] for r in records)
+    errors = sum(1 for r in records if r[2])
+    return {
+        "users": users,
+        "seconds": wall,
+        "updates": len(records),
+        "updates_per_sec": len(records) / wall if wall else 0.0,
+        "sessions_per_sec": users * sessions / wall if wall else 0.0,
+        "error_rate": errors / len(records) if records else 0.0,
+        "p50_ms": percentile(all_lat, 50) * 1000,
+        "p95_ms": percentile(all_lat, 95) * 1000,
+        "handlers": summary,
+    }
+
+
+def print_level(level):
+    print(
+        f"\n👥 {level['users']} users: {level['updates_per_sec']:.1f} updates/s, "
+        f"{level['sessions_per_sec']:.2f} sessions/s, p50 {level['p50_ms']:.0f}ms, "
+        f"p95 {level['p95_ms']:.0f}ms, errors {level['error_rate']:.1%}"
+    )
+    print(f"  {'handler':<24} {'calls':>6} {'err':>5} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, h in sorted(level["handlers"].items()):
+        print(
+            f"  {name:<24} {h['calls']:>6} {h['errors']:>5} {h['p50_ms']:>6.0f}ms "
+            f"{h['p95_ms']:>6.0f}ms {h['p99_ms']:>6.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test bot.py against a fake Telegram API")
+    parser.add_argument("--bot", default="bot.py", help="runtime to test: bot.py or async_bot.py")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    parser.add_argument("--sessions", type=int, default=4, help="sessions per user per level")
+    parser.add_argument("--ocr-ms", type=float, default=300, help="simulated OCR time per call")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for a reply")
+    parser.add_argument("--ramp", type=float, default=1.0, help="seconds to start all users of a level")
+    parser.add_argument("--repeat-bills", action="store_true", help="re-send the same photos (OCR cache hits)")
+    parser.add_argument("--stop-error-rate", type=float, default=0.5)
+    parser.add_argument("--workdir", help="bot working directory (default: temporary)")
+    parser.add_argument("--out", help="save results as JSON")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="loadtest-")
+    receipts = generate(50, seed=1)
+
+    api = FakeTelegram().start()
+    proc, log = start_bot(api, workdir, args)
+    print(f"🤖 {args.bot} running against {api.url} (workdir {workdir})")
+
+    levels = []
+    try:
+        chat_id = 1000
+        for users in args.users:
+            level = run_level(api, users, args.sessions, chat_id, args, receipts)
+            chat_id += users
+            levels.append(level)
+            print_level(level)
+            if level["error_rate"] > args.stop_error_rate:
+                print(f"🛑 Error rate over {args.stop_error_rate:.0%}, stopping the ramp")
+                break
+    finally:
+        stop_bot(proc, log)
+        api.stop()
+
+    print(f"\n📡 API calls: {json.dumps(api.calls)}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "ocr_ms": args.ocr_ms,
+                "sessions": args.sessions,
+                "levels": levels,
+                "api_calls": api.calls,
+            }, f, indent=2)
+        print(f"💾 Saved {args.out}")
@@ -0,0 +1,160 @@
+import random
+
+# Synthetic OCR output for benchmarks: receipt text the way PaddleOCR
+# returns it (one recognized line per line, upper case, stray spacing),
+# in a few shop formats and lengths. Seeded, so a corpus is reproducible
+# across versions.
+
+KINDS = ["restaurant", "fuel", "travel", "grocery", "itemized"]
+
+AREAS = ["ANNA NAGAR", "T NAGAR", "KK NAGAR", "GANDHIPURAM", "ARUPPUKOTTAI", "MADURAI", "CHENNAI"]
+ROADS = ["12, GANDHI ROAD", "4/21 MAIN ROAD", "88 NORTH STREET", "2ND CROSS STREET"]
+
+
+def _date(rng):
+    d, m, y = rng.randint(1, 28), rng.randint(1, 12), rng.choice([2024, 2025])
+    sep = rng.choice(["/", "-", "."])
+    return f"{d:02d}{sep}{m:02d}{sep}{y}"
+
+
+def _time(rng):
+    return f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}"
+
+
+def _money(value):
+    return f"{value:,.2f}"
+
+
+def _footer(rng, subtotal):
+    tax = round(subtotal * 0.025, 2)
+    total = round(subtotal + 2 * tax, 2)
+    lines = [
+        f"SUB TOTAL {_money(subtotal)}",
+        f"CGST 2.5% {tax:.2f}",
+        f"SGST 2.5% {tax:.2f}",
+        rng.choice([
+            f"GRAND TOTAL: Rs. {_money(total)}",
+            f"NET AMOUNT ₹{_money(total)}",
+            f"TOTAL RS {_money(total)}",
+        ]),
+    ]
+    if rng.random() < 0.3:
+        lines.append(f"{_money(total)}/-")
+    lines.append(rng.choice(["THANK YOU VISIT AGAIN", "** THANK YOU **", "GOODS ONCE SOLD WILL NOT BE TAKEN BACK"]))
+    return lines, total
+
+
+def restaurant(rng):
+    name = rng.choice(["SRI ANNAPOORNA RESTAURANT", "KFC", "MURUGAN IDLY SHOP", "DOMINOS PIZZA", "HOTEL SARAVANA BHAVAN"])
+    dishes = ["IDLY", "DOSA", "PONGAL", "PAROTTA", "CHICKEN BIRYANI", "FRIED RICE", "COFFEE", "TEA", "MEALS", "BURGER COMBO"]
+    lines = [name, rng.choice(ROADS), rng.choice(AREAS), f"DATE: {_date(rng)} TIME: {_time(rng)}", "DINE IN", "ITEM QTY RATE AMT"]
+    subtotal = 0
+    for dish in rng.sample(dishes, rng.randint(2, 6)):
+        qty, rate = rng.randint(1, 3), rng.choice([30, 45, 60, 90, 120, 180, 240])
+        subtotal += qty * rate
+        lines.append(f"{dish} {qty} {rate:.2f} {qty * rate:.2f}")
+    footer, total = _footer(rng, subtotal)
+    return lines + footer, total, "Food"
+
+
+def fuel(rng):
+    name = rng.choice(["INDIAN OIL", "BHARAT PETROLEUM", "HP PETROL PUMP"])
+    product = rng.choice(["PETROL", "DIESEL"])
+    rate = round(rng.uniform(92, 104), 2)
+    litres = round(rng.uniform(3, 40), 2)
+    total = round(rate * litres, 2)
+    lines = [
+        f"WELCOME TO {name}",
+        f"SRI VINAYAGA FUELS {rng.choice(AREAS)}",
+        f"DATE {_date(rng)} {_time(rng)}",
+        f"RECEIPT NO {rng.randint(1000, 99999)}",
+        f"NOZZLE NO {rng.randint(1, 8)} PRODUCT {product}",
+        f"RATE/LTR {rate:.2f}",
+        f"VOLUME(LTR) {litres:.2f}",
+        f"AMOUNT Rs. {_money(total)}",
+        f"VEH NO TN{rng.randint(10, 99)}AB{rng.randint(1000, 9999)}",
+        "SAVE FUEL SAVE MONEY",
+    ]
+    return lines, total, "Fuel"
+
+
+def travel(rng):
+    km = rng.randint(4, 400)
+    fare = km * rng.choice([12, 14, 18])
+    toll = rng.choice([0, 0, 65, 120])
+    batta = rng.choice([0, 300, 500]) if km > 100 else 0
+    total = fare + toll + batta
+    lines = [
+        rng.choice(["SRI MURUGAN TRAVELS", "RAPIDO", "OLA CABS", "CITY TAXI SERVICE"]),
+        f"{rng.choice(ROADS)} {rng.choice(AREAS)}",
+        f"TRIP DATE {_date(rng)} START {_time(rng)}",
+        f"FROM {rng.choice(AREAS)} TO {rng.choice(AREAS)}",
+        f"VEHICLE TN{rng.randint(10, 99)} {rng.randint(1000, 9999)}",
+        f"TOTAL KM {km}",
+        f"FARE {fare:.2f}",
+    ]
+    if toll:
+        lines.append(f"TOLL {toll:.2f}")
+    if batta:
+        lines.append(f"DRIVER BATTA {batta:.2f}")
+    lines.append(f"TOTAL FARE: Rs {_money(total)}")
+    return lines, float(total), "Travel"
+
+
+GROCERIES = ["RICE 5KG", "ATTA 1KG", "SUGAR 1KG", "TOOR DAL 1KG", "SUNFLOWER OIL 1L", "ONION 1KG",
+             "TOMATO 1KG", "POTATO 1KG", "CURD 500G", "GHEE 200ML", "SALT 1KG", "MASALA 100G"]
+
+
+def _grocery_lines(rng, count):
+    lines, subtotal = [], 0
+    for i in range(count):
+        item = rng.choice(GROCERIES)
+        qty, rate = rng.randint(1, 4), round(rng.uniform(20, 320), 2)
+        amount = round(qty * rate, 2)
+        subtotal += amount
+        lines.append(f"{i + 1} {item} {qty} x {rate:.2f} {amount:.2f}")
+    return lines, round(subtotal, 2)
+
+
+def grocery(rng, items=None):
+    lines = [
+        rng.choice(["SARAVANA SUPER STORES", "DMART", "NILGIRIS SUPERMARKET", "ANNAI PROVISION STORE"]),
+        rng.choice(ROADS),
+        rng.choice(AREAS),
+        f"BILL NO: {rng.randint(100, 9999)} DATE: {_date(rng)} TIME: {_time(rng)}",
+        "SNO ITEM QTY RATE AMOUNT",
+    ]
+    items_lines, subtotal = _grocery_lines(rng, items or rng.randint(4, 15))
+    footer, total = _footer(rng, subtotal)
+    return lines + items_lines + footer, total, "Groceries"
+
+
+def itemized(rng):
+    return grocery(rng, items=rng.randint(80, 300))
+
+
+GENERATORS = {
+    "restaurant": restaurant,
+    "fuel": fuel,
+    "travel": travel,
+    "grocery": grocery,
+    "itemized": itemized,
+}
+
+
+def generate(count, seed=0, kinds=None):
+    # → [{"kind", "text", "amount", "category"}]; amount / category are what
+    # the receipt was generated with (not necessarily what the parser finds)
+    rng = random.Random(seed)
+    kinds = kinds or KINDS
+    corpus = []
+    for i in range(count):
+        kind = kinds[i % len(kinds)]
+        lines, total, category = GENERATORS[kind](rng)
+        corpus.append({
+            "kind": kind,
+            "text": "\n".join(lines),
+            "amount": str(float(round(total, 2))),
+            "category": category,
+        })
+    return corpus
@@ -0,0 +1,196 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from locks import LockManager, user_locks
+from storage import JsonlStorage, SqliteStorage
+from conversation import ConversationStore
+
+# Stress test for the per-user locks (locks.py): many threads hammer a few
+# users with expense writes and conversation read-modify-writes, then every
+# update is accounted for (rows, totals and rollups per user, conversation
+# counters). An unlocked run of the conversation counter is the control: it
+# should lose updates, showing the test can catch them. Last, lock holds
+# are timed for distinct users vs one user: distinct users must not wait.
+#
+#   python bench/stress_locks.py --threads 64 --users 4 --ops 200
+#   python bench/stress_locks.py --backend sqlite
+#
+# Exits 1 if any update was lost or distinct users were serialized.
+
+CATEGORIES = ["Food", "Fuel", "Groceries", "Shopping", "Other"]
+PLACES = ["Dmart", "Indian Oil", "KFC", "Reliance Fresh", "Zudio"]
+
+
+def run_threads(threads, target):
+    start = threading.Barrier(threads)
+    errors = []
+
+    def worker(i):
+        start.wait()
+        try:
+            target(i)
+        except Exception as e:
+            errors.append(e)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    began = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    if errors:
+        raise errors[0]
+    return time.perf_counter() - began
+
+
+# ================= STORAGE =================
+
+def open_store(backend, workdir, fsync):
+    if backend == "sqlite":
+        return SqliteStorage(os.path.join(workdir, "expenses.db"))
+    if backend == "columnar":
+        from columnar import ColumnarStorage
+        return ColumnarStorage(workdir, fsync=fsync)
+    return JsonlStorage(workdir, fsync=fsync)
+
+
+def stress_storage(store, threads, users, ops, seed):
+    expected = [dict() for _ in range(threads)]
+
+    def writer(i):
+        rnd = random.Random(seed + i)
+        mine = expected[i]
+        for _ in range(ops):
+            user_id = rnd.randrange(users) + 1
+            # Halves add up exactly in floating point, so totals compare with ==
+            record = {
+                "date": f"{rnd.randint(1, 28):02d}-{rnd.randint(1, 12):02d}-2025",
+                "time": "12:00",
+                "place": rnd.choice(PLACES),
+                "category": rnd.choice(CATEGORIES),
+                "amount": rnd.randint(1, 2000) / 2,
+            }
+            store.add(user_id, record)
+            count, total, by_category = mine.get(user_id, (0, 0.0, {}))
+            by_category[record["category"]] = by_category.get(record["category"], 0) + record["amount"]
+            mine[user_id] = (count + 1, total + record["amount"], by_category)
+
+    seconds = run_threads(threads, writer)
+
+    lost = 0
+    for user_id in range(1, users + 1):
+        count, total, by_category = 0, 0.0, {}
+        for mine in expected:
+            c, t, cats = mine.get(user_id, (0, 0.0, {}))
+            count += c
+            total += t
+            for k, v in cats.items():
+                by_category[k] = by_category.get(k, 0) + v
+
+        rows = store.load(user_id)
+        summary = store.summary(user_id)
+        rebuilt = store.rebuild(user_id)
+        problems = []
+        if len(rows) != count:
+            problems.append(f"{count - len(rows)} row(s) lost")
+        if summary["count"] != count or summary["total"] != total:
+            problems.append(f"rollup says {summary['count']} / {summary['total']}, expected {count} / {total}")
+        if summary["by_category"] != by_category:
+            problems.append("category rollup differs")
+        if rebuilt["total"] != summary["total"]:
+            problems.append("rollup differs from a rebuild")
+        if problems:
+            lost += 1
+            print(f"   ❌ user {user_id}: " + "; ".join(problems))
+    return seconds, lost
+
+
+# ================= CONVERSATIONS =================
+
+def stress_conversations(conversations, threads, users, ops, locked):
+    def bump(chat_id):
+        entry = conversations.get(chat_id) or {"state": "amount", "n": 0}
+        entry["n"] += 1
+        time.sleep(0)   # let another thread in between read and write
+        conversations.set(chat_id, entry)
+
+    def worker(i):
+        for k in range(ops):
+            chat_id = (i + k) % users + 1
+            if locked:
+                with conversations.lock(chat_id):
+                    bump(chat_id)
+            else:
+                bump(chat_id)
+
+    seconds = run_threads(threads, worker)
+    counted = sum((conversations.get(u) or {"n": 0})["n"] for u in range(1, users + 1))
+    return seconds, threads * ops - counted
+
+
+# ================= PARALLELISM =================
+
+def hold_time(locks, threads, hold_ms, same_user):
+    def worker(i):
+        with locks.hold(1 if same_user else i + 1):
+            time.sleep(hold_ms / 1000)
+    return run_threads(threads, worker)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-user lock stress test (no lost updates)")
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--users", type=int, default=4, help="few users → heavy same-user contention")
+    parser.add_argument("--ops", type=int, default=200, help="writes per thread")
+    parser.add_argument("--backend", choices=["jsonl", "sqlite", "columnar"], nargs="+", default=["jsonl", "sqlite"])
+    parser.add_argument("--fsync", action="store_true", help="fsync every JSONL / columnar append (slow)")
+    parser.add_argument("--hold-ms", type=float, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    failed = False
+    writes = args.threads * args.ops
+    print(f"🧵 {args.threads} threads × {args.ops} ops over {args.users} user(s)")
+
+    for backend in args.backend:
+        with tempfile.TemporaryDirectory() as workdir:
+            store = open_store(backend, workdir, args.fsync)
+            try:
+                seconds, lost = stress_storage(store, args.threads, args.users, args.ops, args.seed)
+            finally:
+                store.close()
+        failed |= lost > 0
+        print(f"{'✅' if not lost else '❌'} storage/{backend}: {writes} writes in {seconds:.2f}s "
+              f"({writes / seconds:,.0f}/s), users with lost updates: {lost}")
+
+    for locked in (True, False):
+        conversations = ConversationStore(max_entries=args.users * 2)
+        seconds, lost = stress_conversations(conversations, args.threads, args.users, args.ops, locked)
+        if locked:
+            failed |= lost > 0
+            print(f"{'✅' if not lost else '❌'} conversations: {writes} updates in {seconds:.2f}s, lost {lost}")
+        else:
+            print(f"ℹ️  conversations without the lock (control): lost {lost}")
+    print(f"🔒 user_locks: {user_locks.stats()}")
+
+    locks = LockManager()
+    threads = min(args.threads, 32)
+    distinct = hold_time(locks, threads, args.hold_ms, same_user=False)
+    same = hold_time(locks, threads, args.hold_ms, same_user=True)
+    # Distinct users should take about one hold, one user about `threads` holds
+    parallel = distinct < same / 4
+    failed |= not parallel
+    print(f"{'✅' if parallel else '❌'} {threads} × {args.hold_ms:.0f}ms holds: "
+          f"distinct users {distinct * 1000:.0f}ms, one user {same * 1000:.0f}ms")
+    if locks.stats()["held"]:
+        failed = True
+        print(f"❌ locks left behind: {locks.stats()}")
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,404 @@
+import os
+import re
+import json
+from collections import Counter
+from datetime import datetime
+
+from keyword_matcher import AhoCorasick, FileWatcher
+
+# Bill text → {date, time, place, category, amount}
+
+AMOUNT_KEYWORDS = [
+    "amount",
+    "grand total",
+    "net amount",
+    "total amount",
+    "amount payable",
+    "total payable",
+    "amount paid",
+    "cash paid",
+    "paid amount",
+    "final amount",
+    "invoice total",
+    "bill total",
+    "bill value",
+    "total fare",
+    "fare amount",
+    "total rs",
+    "total inr",
+    "total value",
+    "total",
+    "gross amount"
+]
+
+# Everything extract_amount looks for, compiled once and found in one scan:
+#   kw     → "<keyword> [:-] [rs/₹/rupees] <value>"
+#   cur    → "rs/rupees/₹ <value>"
+#   suffix → "/-" or "only"; the value is read backwards from it (below)
+AMOUNT_VALUE = r"[\d,]+(?:\.\d{1,2})?"
+
+AMOUNT_SCAN = re.compile(
+    r"(?:" + "|".join(re.escape(k) for k in sorted(AMOUNT_KEYWORDS, key=len, reverse=True)) + r")"
+    r"[:\-]?\s*(?:rs\.?|₹|rupees)?\s*(?P<kw>" + AMOUNT_VALUE + r")"
+    r"|(?:rs\.?|rupees|₹)\s*(?P<cur>" + AMOUNT_VALUE + r")"
+    r"|(?P<suffix>/-|only)"
+)
+
+AMOUNT_VALUE_RE = re.compile(AMOUNT_VALUE)
+
+
+def _value_before(text, end):
+    # Leftmost start p with text[p:end] a full amount value — the match a
+    # forward "<value>\s*(/-|only)" scan would have found
+    start = end
+    while start > 0 and (text[start - 1] in ",." or text[start - 1].isdecimal()):
+        start -= 1
+    for p in range(start, end):
+        if AMOUNT_VALUE_RE.fullmatch(text, p, end):
+            return p
+    return None
+
+
+def amount_candidates(text):
+    # [(value, start, end, source)] for every amount >= 50, positions in text.lower()
+    text = text.lower()
+    candidates = []
+
+    for m in AMOUNT_SCAN.finditer(text):
+        source = m.lastgroup
+        if source == "suffix":
+            end = m.start()
+            while end > 0 and text[end - 1].isspace():
+                end -= 1
+            start = _value_before(text, end)
+            if start is None:
+                continue
+        else:
+            start, end = m.span(source)
+
+        try:
+            val = float(text[start:end].replace(",", ""))
+        except ValueError:
+            continue  # lone "," etc.
+        if val >= 50:
+            candidates.append((val, start, end, source))
+
+    return candidates
+
+
+def extract_amount(text):
+    candidates = amount_candidates(text)
+    if not candidates:
+        return ""
+
+    return str(max(c[0] for c in candidates))
+
+
+def extract_date(text):
+    m = re.search(r"(\d{2}[/-]\d{2}[/-]\d{2,4})", text)
+    return m.group(1) if m else ""
+
+
+def extract_time(text):
+    m = re.search(r"(\d{1,2}:\d{2})", text)
+    return m.group(1) if m else ""
+
+BUSINESS_WORDS = [
+    "travels","store","mart","hotel","restaurant","cafe",
+    "bakery","medical","pharmacy","shop","agency","unit",
+    "enterprise","traders","fashion","textiles","electronics",
+    "mobiles","footwear","supermarket","center","centre",
+    "food","foods","pvt","ltd","stores","store"
+]
+
+AREA_WORDS = [
+    "nagar","pur","patti","pettai","kottai","palayam",
+    "town","city","airport","delhi","chennai","madurai"
+]
+
+GENERIC_ADDRESS = [
+    "road","rd","street","main"
+]
+
+KNOWN_BRANDS = [
+    # 🛍️ Fashion & Retail
+    "zudio",
+    "trends",
+    "pantaloons",
+    "westside",
+    "max",
+    "lifestyle",
+    "reliance",
+    "reliance trends",
+    "reliance digital",
+    "dmart",
+
+    # 📱 Electronics / Mobile
+    "poorvika",
+    "sangeetha",
+    "croma",
+    "vijay sales",
+
+    # 🍔 Food / Café
+    "kfc",
+    "dominos",
+    "pizza hut",
+    "mcdonalds",
+    "starbucks",
+    "subway",
+
+    # 🛒 Online / Delivery
+    "amazon",
+    "flipkart",
+    "zomato",
+    "swiggy"
+]
+
+def extract_place(lines):
+    keywords = _keywords
+    shop_name = ""
+    area_name = ""
+
+    for line in lines[:12]:
+        raw = line.strip()
+        lower = raw.lower()
+        clean = re.sub(r"[^a-z ]", "", lower).strip()
+
+        if len(clean) < 3:
+            continue
+
+        found = keywords.matcher.find(clean)
+
+        # ⭐ 1️⃣ BRAND MATCH (HIGHEST PRIORITY, first in KNOWN_BRANDS order)
+        brands = [kw for kw in found if kw in keywords.brand_rank]
+        if brands:
+            return min(brands, key=keywords.brand_rank.get).title()
+
+        # 🏪 2️⃣ BUSINESS NAME (company / shop)
+        if not found.isdisjoint(keywords.business_words):
+            # Avoid generic address-only lines
+            if found.isdisjoint(keywords.generic_address):
+                shop_name = raw.title()
+
+        # 🌆 3️⃣ AREA / CITY (fallback)
+        if not found.isdisjoint(keywords.area_words):
+            area_name = raw.title()
+
+        # 🌆 Special case: FULL CAPS city names (ARUPPUKOTTAI)
+        if raw.isupper() and len(clean) > 5 and clean.isalpha():
+            area_name = raw.title()
+
+    # ✅ FINAL PRIORITY
+    if shop_name:
+        return shop_name
+    if area_name:
+        return area_name
+
+    return ""
+
+
+CATEGORY_KEYWORDS = {
+
+    "Medical": [
+        "hospital","clinic","pharmacy","chemist","doctor",
+        "tablet","capsule","syrup","injection","medicine",
+        "lab","laboratory","scan","xray","ecg","bandage",
+        "healthcare","diagnostic","medicalstore"
+    ],
+
+    "Hotel": [
+        "hotel","lodge","resort","inn","hostel",
+        "room","stay","checkin","checkout",
+        "oyo","booking","accommodation"
+    ],
+
+    "Food": [
+        "restaurant","cafe","coffee","tea","bakery","canteen","food",
+        "kfc","mcdonald","domino","pizza","burger","shawarma",
+        "biryani","meal","combo","lunch","dinner",
+        "zomato","swiggy","parotta","dosa","idly","pongal",
+        "poori","friedrice","noodles","grill","dine in","take away"
+    ],
+
+    "Groceries": [
+        "grocery","groceries","supermarket","mart","provision",
+        "rice","wheat","atta","flour","curd","butter","ghee",
+        "vegetable","fruit","onion","tomato","potato",
+        "dhal","masala","spices","salt","sugar","dal","groundnutoil","sunfloweroil" ,"cookingoil"
+    ],
+
+    "Fuel": [
+        "petrol","diesel","fuel","cng",
+        "petrolpump","fillingstation",
+        "indianoil","bharatpetroleum","hindustanpetroleum"
+    ],
+
+    "Travel": [
+        "uber","ola","rapido","taxi","cab","auto",
+        "bus","train","metro","railway",
+        "ticket","travels","transport","journey"
+        "travels","trip","kilometer","kilometre","km",
+        "vehicle","veh","driver","driverbatta",
+        "toll","tollgate","route","from","to"
+    ],
+
+    "Shopping": [
+        "shirt","tshirt","t-shirt","pant","pants","trouser",
+        "jeans","dress","kurti","saree","top","jacket",
+        "shoe","shoes","chappal","slipper","sandals",
+        "belt","wallet","handbag","backpack",
+        "watch","garment","clothing","fashion"
+    ],
+
+    "Entertainment": [
+        "movie","cinema","theatre","screen",
+        "netflix","primevideo","hotstar",
+        "bookmyshow","show","concert","event"
+    ],
+
+    "Education": [
+        "school","college","university","tuition",
+        "coaching","course","training","exam",
+        "book","notebook","stationery","education"
+    ],
+
+    "Utilities": [
+        "electricity","water","gas","lpg",
+        "wifi","broadband","internet",
+        "mobile","recharge","dataplan","postpaid","prepaid"
+    ],
+
+    "GADGETS":[
+        "earbuds", "headphones", "bluetooth", "smartwatch",
+        "mobile", "laptop", "tablet", "charger",
+        "powerbank", "camera", "speaker",
+        "router", "modem", "keyboard", "mouse",
+        "usb", "ssd", "harddisk", "monitor",
+        "printer", "projector"
+    ],
+
+     "MECHANICAL": [
+        "spanner", "wrench", "hammer", "screwdriver",
+        "drill", "grinder", "lathe", "cutter",
+        "plier", "measuring tape", "vernier",
+        "caliper", "bearing", "gear", "chain",
+        "compressor", "welding", "soldering",
+        "tool kit", "machine oil"
+    ]
+
+}
+
+# ================= KEYWORD TABLES =================
+# One Aho-Corasick automaton over every table above, shared by
+# detect_category and extract_place. KEYWORDS_FILE (JSON with any of
+# CATEGORY_KEYWORDS / KNOWN_BRANDS / BUSINESS_WORDS / AREA_WORDS /
+# GENERIC_ADDRESS) overrides the built-in tables and is re-read when it
+# changes, without restarting the bot.
+
+KEYWORDS_FILE = os.getenv("KEYWORDS_FILE", "")
+KEYWORDS_RELOAD_SECONDS = float(os.getenv("KEYWORDS_RELOAD_SECONDS", "10"))
+
+
+class KeywordTables:
+
+    def __init__(self, category_keywords, known_brands, business_words, area_words, generic_address):
+        self.category_keywords = category_keywords
+        self.categories = list(category_keywords)
+
+        # keyword → {category: times listed} (a keyword listed twice counts twice)
+        self.category_hits = {}
+        for category, kws in category_keywords.items():
+            for kw in kws:
+                self.category_hits.setdefault(kw, Counter())[category] += 1
+
+        self.brand_rank = {}
+        for i, brand in enumerate(known_brands):
+            self.brand_rank.setdefault(brand, i)
+        self.business_words = set(business_words)
+        self.area_words = set(area_words)
+        self.generic_address = set(generic_address)
+
+        self.matcher = AhoCorasick(
+            list(self.category_hits) + known_brands + business_words + area_words + generic_address
+        )
+
+
+def load_keyword_tables(path=None):
+    tables = {
+        "CATEGORY_KEYWORDS": CATEGORY_KEYWORDS,
+        "KNOWN_BRANDS": KNOWN_BRANDS,
+        "BUSINESS_WORDS": BUSINESS_WORDS,
+        "AREA_WORDS": AREA_WORDS,
+        "GENERIC_ADDRESS": GENERIC_ADDRESS,
+    }
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+        unknown = set(overrides) - set(tables)
+        if unknown:
+            raise ValueError(f"Unknown keyword tables in {path}: {sorted(unknown)}")
+        tables.update(overrides)
+
+    return KeywordTables(
+        tables["CATEGORY_KEYWORDS"],
+        tables["KNOWN_BRANDS"],
+        tables["BUSINESS_WORDS"],
+        tables["AREA_WORDS"],
+        tables["GENERIC_ADDRESS"],
+    )
+
+
+_keywords = load_keyword_tables(KEYWORDS_FILE)
+
+
+def reload_keywords(path=KEYWORDS_FILE):
+    global _keywords
+    _keywords = load_keyword_tables(path)   # swapped in one assignment
+    print(f"🔁 Keyword tables reloaded from {path}")
+
+
+def start_keyword_watcher(path=KEYWORDS_FILE, interval=KEYWORDS_RELOAD_SECONDS):
+    if not path:
+        return None
+    watcher = FileWatcher(path, reload_keywords, interval)
+    watcher.start()
+    return watcher
+
+
+def detect_category(text):
+    keywords = _keywords
+    t = text.lower()
+    scores = dict.fromkeys(keywords.categories, 0)
+
+    for kw in keywords.matcher.find(t):
+        for category, count in keywords.category_hits.get(kw, {}).items():
+            scores[category] += count
+
+    best_category = max(scores, key=scores.get)
+
+    return best_category if scores[best_category] > 0 else "Other"
+
+
+def parse_bill(text):
+    lines = [l.strip() for l in text.split("\n") if l.strip()]
+    full = " ".join(lines)
+
+    date = extract_date(full)
+    time = extract_time(full)
+    amount = extract_amount(full)
+
+    if not date:
+        date = datetime.now().strftime("%d-%m-%Y")
+    if not time:
+        time = datetime.now().strftime("%H:%M")
+
+    place = extract_place(lines)
+    category = detect_category(full)
+
+    return {
+        "date": date,
+        "time": time,
+        "place": place,
+        "category": category,
+        "amount": amount
+    }
@@ -1,15 +1,39 @@
 from dotenv import load_dotenv
 load_dotenv()  # must be at the very top, before reading env variables
 
+import time
+STARTED_AT = time.monotonic()
+
 import telebot
 import os
 from telebot import types
-import csv, json, re, traceback
+import re, traceback
+import requests
+import functools
 from datetime import datetime
 import pytz
-import threading
-import cv2
-from paddleocr import PaddleOCR
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from storage import open_storage, normalize_date
+from ocr_engine import create_engine, OCR_MODE, OCR_BATCH_SIZE
+from ocr_cache import OcrCache, CacheKeys
+from bill_parser import parse_bill, start_keyword_watcher
+from menus import main_menu, confirm_menu, edit_menu, date_menu, time_menu, category_menu, cancel_only_menu
+from menus import EXPIRED_BUTTON_TEXT, album_menu
+from menus import export_period_menu, export_format_menu, reports_menu
+from reports import build_report, REPORTS
+from export import export_user, period_range, FORMATS
+from importer import import_stream, result_text, supported, spool, IMPORT_MAX_BYTES, SPOOL_CHUNK
+from workers import BoundedExecutor, QueueFull
+from albums import AlbumCollector, album_text, album_records
+from conversation import ConversationStore
+from flows import build_flow, read_bill, expense_record, welcome_text, queued_text, bill_text
+from flows import confirm_again_text, manual_confirm_text, missing_amount_text, album_saved_text
+from flows import CANCELLED_TEXT, BILL_PROMPT_TEXT, PROCESSING_TEXT, WARMING_UP_TEXT, QUEUE_FULL_TEXT
+from flows import READ_ERROR_TEXT, ALBUM_READ_ERROR_TEXT, SAVE_ERROR_TEXT, ALBUM_SAVE_ERROR_TEXT, IMPORT_HELP_TEXT
+from locks import user_locks
+import metrics
+from webhook import WebhookServer, WEBHOOK_SECRET
 
 IST = pytz.timezone("Asia/Kolkata")
 # ================= TOKENS =================
@@ -19,130 +43,122 @@ TELEGRAM_BOT_TOKEN = os.getenv("BOT_TOKEN")
 if TELEGRAM_BOT_TOKEN is None:
     raise ValueError("BOT_TOKEN not found in environment variables!")
 
-bot = telebot.TeleBot(TELEGRAM_BOT_TOKEN)
-
-# PaddleOCR (BEST for bills)
-ocr = PaddleOCR(
-    use_textline_orientation=True,
-    lang="en"
-)
+# Optional local Bot API server (or the load-test stand-in in bench/)
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "").rstrip("/")
+if TELEGRAM_API_URL:
+    telebot.apihelper.API_URL = TELEGRAM_API_URL + "/bot{0}/{1}"
+    telebot.apihelper.FILE_URL = TELEGRAM_API_URL + "/file/bot{0}/{1}"
+
+# polling → infinity_polling (one instance); webhook → embedded HTTP server
+# (webhook.py), handlers run on its own worker pool instead of telebot's
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+if BOT_MODE not in ("polling", "webhook"):
+    raise ValueError(f"Unknown BOT_MODE: {BOT_MODE}")
+# Checked here too so a missing secret stops the bot before OCR starts
+if BOT_MODE == "webhook" and not WEBHOOK_SECRET:
+    raise ValueError("WEBHOOK_SECRET not found in environment variables (required for BOT_MODE=webhook)!")
+
+# Handler threads in polling mode. Safe to raise: each user's conversation
+# and storage writes are serialized by locks.py, other users run in parallel
+BOT_THREADS = int(os.getenv("BOT_THREADS", "2"))
+
+bot = telebot.TeleBot(TELEGRAM_BOT_TOKEN, threaded=BOT_MODE == "polling", num_threads=BOT_THREADS)
+
+# Fixed OCR concurrency + bounded queue (bursts wait or get rejected)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "2"))
+OCR_QUEUE_SIZE = int(os.getenv("OCR_QUEUE_SIZE", "20"))
+
+# PaddleOCR runs in OCR_WORKERS worker processes (OCR_MODE=process)
+# or as one shared in-process model (OCR_MODE=thread). Models load in the
+# background after ocr_engine.start(); bills sent before that wait in the queue.
+# With OCR_BATCH_SIZE > 1 each slot takes up to that many bills per call,
+# so enough bill jobs must be in flight to fill the batches.
+ocr_engine = create_engine(OCR_WORKERS)
+ocr_executor = BoundedExecutor("ocr", OCR_WORKERS * max(1, OCR_BATCH_SIZE), OCR_QUEUE_SIZE)
+
+# Photos of an album (several bills sent at once) download in parallel
+ALBUM_DOWNLOADS = int(os.getenv("ALBUM_DOWNLOADS", "4"))
+download_executor = ThreadPoolExecutor(ALBUM_DOWNLOADS, thread_name_prefix="download")
+
+# Re-sent bills reuse the earlier OCR + parse result
+ocr_cache = OcrCache()
 
 DATA_FOLDER = "user_data"
 os.makedirs(DATA_FOLDER, exist_ok=True)
 
-pending_entries = {}
+store = open_storage(DATA_FOLDER)
+
+# Half-finished entries / confirmations per chat (see conversation.py)
+conversations = ConversationStore()
+
+# Scraped on METRICS_PORT (see metrics.py)
+metrics.Gauge("ocr_queue_depth", "Bills waiting for an OCR worker", ocr_executor.queue_depth)
+metrics.Gauge(
+    "ocr_jobs", "OCR executor jobs by state",
+    lambda: {k: v for k, v in ocr_executor.stats().items() if k in ("running", "completed", "failed", "rejected")},
+    label="state"
+)
+metrics.Gauge("ocr_cache", "OCR result cache counters", ocr_cache.stats, label="stat")
+metrics.Gauge("ocr_engine_ready", "1 once the OCR models are loaded", lambda: int(ocr_engine.ready.is_set()))
+metrics.Gauge("user_locks", "Per-user locks: held now, acquisitions, waits", user_locks.stats, label="stat")
+metrics.Gauge("conversations", "Conversation store: open, stored on disk, expired, evicted", conversations.stats, label="stat")
+metrics.Gauge("albums_collecting", "Albums still receiving photos", lambda: album_collector.collecting())
 
 # ================= UTIL =================
 
-def get_user_file(user_id):
-    return os.path.join(DATA_FOLDER, f"{user_id}.json")
-
-def load_user_data(user_id):
-    if os.path.exists(get_user_file(user_id)):
-        with open(get_user_file(user_id), "r") as f:
-            return json.load(f)
-    return []
-
-def save_user_data(user_id, data):
-    with open(get_user_file(user_id), "w") as f:
-        json.dump(data, f, indent=2)
-
-def add_expense(user_id, date, time, place, category, amount):
-    data = load_user_data(user_id)
-    data.append({
-        "date": date,
-        "time": time,
-        "place": place,
-        "category": category,
-        "amount": float(amount)
-    })
-    save_user_data(user_id, data)
+def per_chat(handler):
+    # One update at a time per chat (its conversation is read-modify-write);
+    # different chats still run in parallel
+    @functools.wraps(handler)
+    def wrapper(update):
+        message = update.message if isinstance(update, types.CallbackQuery) else update
+        with conversations.lock(message.chat.id):
+            return handler(update)
+    return wrapper
+
+def add_expense(user_id, record):
+    # Writes a single record (no full-history rewrite)
+    with metrics.STORAGE_SECONDS.time(op="add"):
+        store.add(user_id, record)
 
 def get_total_expense(user_id):
-    return sum(e["amount"] for e in load_user_data(user_id))
+    with metrics.STORAGE_SECONDS.time(op="total"):
+        return store.total(user_id)
 
 def reset_data(user_id):
-    if os.path.exists(get_user_file(user_id)):
-        os.remove(get_user_file(user_id))
-
-def create_csv(user_id):
-    data = load_user_data(user_id)
-    path = os.path.join(DATA_FOLDER, f"{user_id}_expenses.csv")
-
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["Date", "Time", "Place", "Category", "Amount"])
-        for d in data:
-            writer.writerow([d["date"], d["time"], d["place"], d["category"], d["amount"]])
-        writer.writerow([])
-        writer.writerow(["", "", "", "TOTAL", get_total_expense(user_id)])
-
-    return path
+    with metrics.STORAGE_SECONDS.time(op="reset"):
+        store.reset(user_id)
+
+def get_summary(user_id):
+    # Rollups kept up to date by add_expense (no history scan)
+    with metrics.STORAGE_SECONDS.time(op="summary"):
+        return store.summary(user_id)
+
+def export_expenses(user_id, fmt="csv", start=None, end=None):
+    # Rows stream from storage into memory (no file in DATA_FOLDER)
+    with metrics.STORAGE_SECONDS.time(op="export"):
+        return export_user(store, user_id, fmt, start, end)
+
+def send_export(chat_id, fmt, start=None, end=None):
+    export = export_expenses(chat_id, fmt, start, end)
+    if not export.count:
+        bot.send_message(chat_id, "No data yet!" if not (start or end) else "No expenses in that period.")
+        return
+    bot.send_document(
+        chat_id,
+        types.InputFile(export.buffer, file_name=export.filename),
+        caption=f"📥 {export.count} expense(s), total ₹{export.total:.2f}"
+    )
 
 # ================= MENUS =================
 
-def main_menu():
-    m = types.ReplyKeyboardMarkup(resize_keyboard=True)
-    m.add("📸 Add by Bill Photo", "✏️ Add Manually")
-    m.add("💰 Total Expense", "📥 Download CSV")
-    m.add("🗑️ Reset Data", "🚫 Cancel")
-    return m
-
-@bot.message_handler(func=lambda m: m.text == "🚫 Cancel")
-def cancel_current_process(message):
+def cancel_current_process(message, entry=None):
     chat_id = message.chat.id
 
     # Remove any pending state
-    if chat_id in pending_entries:
-        del pending_entries[chat_id]
-
-    bot.send_message(
-        chat_id,
-        "🚫 Current process cancelled.\nBack to main menu.",
-        reply_markup=main_menu()
-    )
-
+    conversations.pop(chat_id)
 
-from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
-
-def confirm_menu():
-    kb = InlineKeyboardMarkup()
-    kb.add(
-        InlineKeyboardButton("✅ Yes", callback_data="confirm_yes"),
-        InlineKeyboardButton("❌ No", callback_data="confirm_no")
-    )
-    return kb
-
-def edit_menu():
-    kb = InlineKeyboardMarkup()
-    for f in ["date", "time", "place", "category", "amount"]:
-        kb.add(InlineKeyboardButton(f.capitalize(), callback_data=f"edit_{f}"))
-    return kb
-
-
-def date_menu():
-    m = types.ReplyKeyboardMarkup(resize_keyboard=True)
-    m.add("📅 Use Current Date", "✏️ Enter Date Manually")
-    m.add("🚫 Cancel")
-    return m
-
-
-def time_menu():
-    m = types.ReplyKeyboardMarkup(resize_keyboard=True)
-    m.add("🕐 Use Current Time", "✏️ Enter Time Manually")
-    m.add("🚫 Cancel")
-    return m
-
-
-def category_menu():
-    m = types.ReplyKeyboardMarkup(resize_keyboard=True)
-    m.add("🍔 Food", "🚕 Travel", "⛽ Fuel")
-    m.add("🛒 Groceries", "🛍️ Shopping", "🎬 Entertainment")
-    m.add("🏥 Medical", "💡 Utilities", "🎓 Education")
-    m.add("📱 Subscription", "🏨 Hotel", "🧾 Bills")
-    m.add("📦 Other")
-    m.add("🚫 Cancel")
-    return m
+    bot.send_message(chat_id, CANCELLED_TEXT, reply_markup=main_menu())
 
 
 # ================= START =================
@@ -153,610 +169,556 @@ def start(message):
 
     bot.send_message(
         message.chat.id,
-        f"Hi {user_name} *Welcome to Paathu Selavu Pannu 👋!*\n\n"
-        f"📊 Track your *Expenses* easily\n"
-        f"📸 Upload bill photos to save time\n"
-        f"✍️ Manual entry available anytime",
+        welcome_text(user_name),
         parse_mode="Markdown",
         reply_markup=main_menu()
     )
 
 # ================= OCR =================
 
-def extract_text_from_bill(image_path):
-    result = ocr.predict(image_path)
-
-    lines = []
-    for res in result:
-        if "rec_texts" in res:
-            for txt in res["rec_texts"]:
-                if txt.strip():
-                    lines.append(txt.strip())
-
-    return "\n".join(lines)
-
-import re
-
-AMOUNT_KEYWORDS = [
-    "amount",
-    "grand total",
-    "net amount",
-    "total amount",
-    "amount payable",
-    "total payable",
-    "amount paid",
-    "cash paid",
-    "paid amount",
-    "final amount",
-    "invoice total",
-    "bill total",
-    "bill value",
-    "total fare",
-    "fare amount",
-    "total rs",
-    "total inr",
-    "total value",
-    "total",
-    "gross amount"
-]
-
-def extract_amount(text):
-    text = text.lower()
-    candidates = []
-
-    # 1️⃣ KEYWORD-BASED AMOUNTS (collect all)
-    for key in AMOUNT_KEYWORDS:
-        pattern = rf"{key}[:\-]?\s*(?:rs\.?|₹|rupees)?\s*([\d,]+(?:\.\d{{1,2}})?)"
-        pattern = pattern.replace("{{1,2}}", "{1,2}")
-
-        for m in re.findall(pattern, text):
-            val = float(m.replace(",", ""))
-            if val >= 50:
-                candidates.append(val)
-
-    # 2️⃣ CURRENCY / SUFFIX BASED (final bill usually here)
-    currency_patterns = [
-        r"rs\.?\s*([\d,]+(?:\.\d{1,2})?)",
-        r"rupees\s*([\d,]+(?:\.\d{1,2})?)",
-        r"₹\s*([\d,]+(?:\.\d{1,2})?)",
-        r"([\d,]+(?:\.\d{1,2})?)\s*/-",
-        r"([\d,]+(?:\.\d{1,2})?)\s*only"
-    ]
-
-    for p in currency_patterns:
-        for m in re.findall(p, text):
-            val = float(m.replace(",", ""))
-            if val >= 50:
-                candidates.append(val)
-
-    if not candidates:
-        return ""
-
-    return str(max(set(candidates)))
-
-
-def extract_date(text):
-    m = re.search(r"(\d{2}[/-]\d{2}[/-]\d{2,4})", text)
-    return m.group(1) if m else ""
-
-
-def extract_time(text):
-    m = re.search(r"(\d{1,2}:\d{2})", text)
-    return m.group(1) if m else ""
-
-BUSINESS_WORDS = [
-    "travels","store","mart","hotel","restaurant","cafe",
-    "bakery","medical","pharmacy","shop","agency","unit",
-    "enterprise","traders","fashion","textiles","electronics",
-    "mobiles","footwear","supermarket","center","centre",
-    "food","foods","pvt","ltd","stores","store"
-]
-
-AREA_WORDS = [
-    "nagar","pur","patti","pettai","kottai","palayam",
-    "town","city","airport","delhi","chennai","madurai"
-]
-
-GENERIC_ADDRESS = [
-    "road","rd","street","main"
-]
-
-KNOWN_BRANDS = [
-    # 🛍️ Fashion & Retail
-    "zudio",
-    "trends",
-    "pantaloons",
-    "westside",
-    "max",
-    "lifestyle",
-    "reliance",
-    "reliance trends",
-    "reliance digital",
-    "dmart",
-
-    # 📱 Electronics / Mobile
-    "poorvika",
-    "sangeetha",
-    "croma",
-    "vijay sales",
-
-    # 🍔 Food / Café
-    "kfc",
-    "dominos",
-    "pizza hut",
-    "mcdonalds",
-    "starbucks",
-    "subway",
-
-    # 🛒 Online / Delivery
-    "amazon",
-    "flipkart",
-    "zomato",
-    "swiggy"
-]
-
-def extract_place(lines):
-    shop_name = ""
-    area_name = ""
-
-    for line in lines[:12]:
-        raw = line.strip()
-        lower = raw.lower()
-        clean = re.sub(r"[^a-z ]", "", lower).strip()
-
-        if len(clean) < 3:
-            continue
-
-        # ⭐ 1️⃣ BRAND MATCH (HIGHEST PRIORITY)
-        for brand in KNOWN_BRANDS:
-            if brand in clean:
-                return brand.title()
-
-        # 🏪 2️⃣ BUSINESS NAME (company / shop)
-        if any(word in clean for word in BUSINESS_WORDS):
-            # Avoid generic address-only lines
-            if not any(addr in clean for addr in GENERIC_ADDRESS):
-                shop_name = raw.title()
-
-        # 🌆 3️⃣ AREA / CITY (fallback)
-        if any(word in clean for word in AREA_WORDS):
-            area_name = raw.title()
-
-        # 🌆 Special case: FULL CAPS city names (ARUPPUKOTTAI)
-        if raw.isupper() and len(clean) > 5 and clean.isalpha():
-            area_name = raw.title()
-
-    # ✅ FINAL PRIORITY
-    if shop_name:
-        return shop_name
-    if area_name:
-        return area_name
-
-    return ""
-
-
-CATEGORY_KEYWORDS = {
-
-    "Medical": [
-        "hospital","clinic","pharmacy","chemist","doctor",
-        "tablet","capsule","syrup","injection","medicine",
-        "lab","laboratory","scan","xray","ecg","bandage",
-        "healthcare","diagnostic","medicalstore"
-    ],
-
-    "Hotel": [
-        "hotel","lodge","resort","inn","hostel",
-        "room","stay","checkin","checkout",
-        "oyo","booking","accommodation"
-    ],
-
-    "Food": [
-        "restaurant","cafe","coffee","tea","bakery","canteen","food",
-        "kfc","mcdonald","domino","pizza","burger","shawarma",
-        "biryani","meal","combo","lunch","dinner",
-        "zomato","swiggy","parotta","dosa","idly","pongal",
-        "poori","friedrice","noodles","grill","dine in","take away"
-    ],
-
-    "Groceries": [
-        "grocery","groceries","supermarket","mart","provision",
-        "rice","wheat","atta","flour","curd","butter","ghee",
-        "vegetable","fruit","onion","tomato","potato",
-        "dhal","masala","spices","salt","sugar","dal","groundnutoil","sunfloweroil" ,"cookingoil"
-    ],
-
-    "Fuel": [
-        "petrol","diesel","fuel","cng",
-        "petrolpump","fillingstation",
-        "indianoil","bharatpetroleum","hindustanpetroleum"
-    ],
-
-    "Travel": [
-        "uber","ola","rapido","taxi","cab","auto",
-        "bus","train","metro","railway",
-        "ticket","travels","transport","journey"
-        "travels","trip","kilometer","kilometre","km",
-        "vehicle","veh","driver","driverbatta",
-        "toll","tollgate","route","from","to"
-    ],
-
-    "Shopping": [
-        "shirt","tshirt","t-shirt","pant","pants","trouser",
-        "jeans","dress","kurti","saree","top","jacket",
-        "shoe","shoes","chappal","slipper","sandals",
-        "belt","wallet","handbag","backpack",
-        "watch","garment","clothing","fashion"
-    ],
-
-    "Entertainment": [
-        "movie","cinema","theatre","screen",
-        "netflix","primevideo","hotstar",
-        "bookmyshow","show","concert","event"
-    ],
-
-    "Education": [
-        "school","college","university","tuition",
-        "coaching","course","training","exam",
-        "book","notebook","stationery","education"
-    ],
-
-    "Utilities": [
-        "electricity","water","gas","lpg",
-        "wifi","broadband","internet",
-        "mobile","recharge","dataplan","postpaid","prepaid"
-    ],
-
-    "GADGETS":[
-        "earbuds", "headphones", "bluetooth", "smartwatch",
-        "mobile", "laptop", "tablet", "charger",
-        "powerbank", "camera", "speaker",
-        "router", "modem", "keyboard", "mouse",
-        "usb", "ssd", "harddisk", "monitor",
-        "printer", "projector"
-    ],
-
-     "MECHANICAL": [
-        "spanner", "wrench", "hammer", "screwdriver",
-        "drill", "grinder", "lathe", "cutter",
-        "plier", "measuring tape", "vernier",
-        "caliper", "bearing", "gear", "chain",
-        "compressor", "welding", "soldering",
-        "tool kit", "machine oil"
-    ]
-
-}
-
-def detect_category(text):
-    t = text.lower()
-    scores = {}
-
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        scores[category] = sum(1 for kw in keywords if kw in t)
-
-    best_category = max(scores, key=scores.get)
-
-    return best_category if scores[best_category] > 0 else "Other"
-
-
-def parse_bill(text):
-    lines = [l.strip() for l in text.split("\n") if l.strip()]
-    full = " ".join(lines)
-
-    date = extract_date(full)
-    time = extract_time(full)
-    amount = extract_amount(full)
-
-    if not date:
-        date = datetime.now().strftime("%d-%m-%Y")
-    if not time:
-        time = datetime.now().strftime("%H:%M")
-
-    place = extract_place(lines)
-    category = detect_category(full)
-
-    return {
-        "date": date,
-        "time": time,
-        "place": place,
-        "category": category,
-        "amount": amount
-    }
-
-def run_ocr_and_reply(message, img_path, processing_msg):
-    try:
-        # OCR (HEAVY TASK → background)
-        text = extract_text_from_bill(img_path)
-
-        # Delete image (privacy)
-        if os.path.exists(img_path):
-            os.remove(img_path)
-
-        if not text.strip():
-            raise ValueError("Empty OCR")
-
-        data = parse_bill(text)
+def show_bill_confirmation(chat_id, data):
+    conversations.set(chat_id, {
+        "state": "confirm",
+        "data": data
+    })
 
-        # Remove "Processing..." message
-        bot.delete_message(
-            message.chat.id,
-            processing_msg.message_id
-        )
+    bot.send_message(chat_id, bill_text(data), parse_mode="Markdown", reply_markup=confirm_menu())
 
-        pending_entries[message.chat.id] = {
-            "state": "confirm",
-            "data": data
-        }
+def run_ocr_and_reply(message, image_bytes, processing_msg, cache_keys=None, trace=None):
+    trace = trace or metrics.Trace("bill", chat_id=message.chat.id)
+    try:
+        # OCR (HEAVY TASK → background)
+        text, data = read_bill(ocr_engine, image_bytes, trace)
+        if cache_keys:
+            ocr_cache.put(cache_keys, text)
 
-        bot.send_message(
-            message.chat.id,
-            f"""📋 *Confirm Details*
+        with trace.stage("reply"):
+            # Remove "Processing..." message
+            bot.delete_message(
+                message.chat.id,
+                processing_msg.message_id
+            )
 
-📅 Date: {data.get('date') or '—'}
-🕐 Time: {data.get('time') or '—'}
-📍 Place: {data.get('place') or '—'}
-📁 Category: {data.get('category') or '—'}
-💵 Amount: ₹{data.get('amount') or '—'}""",
-            parse_mode="Markdown",
-            reply_markup=confirm_menu()
-        )
+            # Runs on an OCR thread: take the chat's turn like a handler would
+            with conversations.lock(message.chat.id):
+                show_bill_confirmation(message.chat.id, dict(data))
+        trace.finish("ok")
 
     except Exception:
         traceback.print_exc()
-        bot.send_message(
-            message.chat.id,
-            "❌ Couldn't read bill clearly.\nTry another image or use manual entry.",
-            reply_markup=main_menu()
-        )
+        metrics.OCR_FAILURES.inc()
+        trace.finish("failed")
+        bot.send_message(message.chat.id, READ_ERROR_TEXT, reply_markup=main_menu())
 
 
 # ================= BILL PHOTO =================
 
-@bot.message_handler(func=lambda m: m.text == "📸 Add by Bill Photo")
-def bill_start(message):
-    pending_entries[message.chat.id] = {"state": "bill_photo"}
-    bot.send_message(message.chat.id, "📸 Send the bill photo clearly")
+def bill_start(message, entry=None):
+    conversations.set(message.chat.id, {"state": "bill_photo"})
+    bot.send_message(message.chat.id, BILL_PROMPT_TEXT)
 
 @bot.message_handler(content_types=["photo"])
+@per_chat
 def bill_photo_handler(message):
+    trace = None
     try:
-        entry = pending_entries.get(message.chat.id)
-        if not entry or entry.get("state") != "bill_photo":
+        if conversations.state(message.chat.id) != "bill_photo":
             return
-        
-        processing_msg = bot.send_message(
-            message.chat.id,
-            "🧾 Bill received!\n⏳ Processing, please wait..."
-        )
 
-        # Download image
-        file_id = message.photo[-1].file_id
-        file_info = bot.get_file(file_id)
-        file_bytes = bot.download_file(file_info.file_path)
+        if message.media_group_id:
+            # One bill of an album: all of them are read together once it's complete
+            album_collector.add((message.chat.id, message.media_group_id), message)
+            return
+
+        trace = metrics.Trace("bill", chat_id=message.chat.id)
+
+        # Same Telegram file sent again → no download, no OCR
+        photo = message.photo[-1]
+        with trace.stage("cache"):
+            cached = ocr_cache.get_by_file_id(photo.file_unique_id)
+        if cached:
+            with trace.stage("reply"):
+                show_bill_confirmation(message.chat.id, parse_bill(cached))
+            trace.finish("cached")
+            return
 
-        img_path = f"bill_{message.chat.id}.jpg"
-        with open(img_path, "wb") as f:
-            f.write(file_bytes)
+        with trace.stage("ack"):
+            processing_msg = bot.send_message(message.chat.id, PROCESSING_TEXT)
 
-        threading.Thread(
-            target=run_ocr_and_reply,
-            args=(message, img_path, processing_msg),
-            daemon=True
-        ).start()
+        # Download image
+        with trace.stage("download"):
+            file_info = bot.get_file(photo.file_id)
+            file_bytes = bot.download_file(file_info.file_path)
+        metrics.BYTES_DOWNLOADED.inc(len(file_bytes))
+        trace.fields["bytes"] = len(file_bytes)
+
+        # Same (or near-identical) image content → reuse the earlier result
+        with trace.stage("cache"):
+            cache_keys = CacheKeys.for_image(file_bytes, photo.file_unique_id, message.chat.id)
+            cached = ocr_cache.get(cache_keys)
+        if cached:
+            with trace.stage("reply"):
+                bot.delete_message(message.chat.id, processing_msg.message_id)
+                show_bill_confirmation(message.chat.id, parse_bill(cached))
+            trace.finish("cached")
+            return
+
+        try:
+            trace.queued()
+            job = ocr_executor.submit(run_ocr_and_reply, message, file_bytes, processing_msg, cache_keys, trace)
+        except QueueFull:
+            trace.finish("rejected")
+            bot.edit_message_text(QUEUE_FULL_TEXT, message.chat.id, processing_msg.message_id)
+            return
+        metrics.QUEUE_POSITION.observe(job.position)
+
+        # Only when the bill has to wait; otherwise "Processing" is already accurate
+        text = None
+        if not ocr_engine.ready.is_set():
+            text = WARMING_UP_TEXT
+        elif job.waiting:
+            text = queued_text(job)
+        if text:
+            try:
+                bot.edit_message_text(text, message.chat.id, processing_msg.message_id)
+            except Exception:
+                pass
 
     except Exception as e:
         traceback.print_exc()
-        bot.send_message(
-            message.chat.id,
-            "❌ Couldn't read bill clearly.\nTry another image or use manual entry.",
-            reply_markup=main_menu()
-        )
-
-@bot.callback_query_handler(func=lambda c: c.data in ["confirm_yes", "confirm_no"])
-def handle_confirmation(call):
+        if trace:
+            trace.finish("error")
+        bot.send_message(message.chat.id, READ_ERROR_TEXT, reply_markup=main_menu())
+
+# ================= ALBUM =================
+
+def show_album_confirmation(chat_id, items, failed=0):
+    conversations.set(chat_id, {
+        "state": "album_confirm",
+        "items": items,
+        "failed": failed
+    })
+
+    bot.send_message(
+        chat_id,
+        album_text(items, failed),
+        parse_mode="Markdown",
+        reply_markup=album_menu(len(items))
+    )
+
+def prepare_photo(chat_id, photo, trace):
+    # Runs on a download thread → (bill parsed from the cached OCR text, None, None) or (None, image bytes, cache keys)
+    with trace.stage("cache"):
+        cached = ocr_cache.get_by_file_id(photo.file_unique_id)
+    if cached:
+        return parse_bill(cached), None, None
+
+    with trace.stage("download"):
+        file_info = bot.get_file(photo.file_id)
+        file_bytes = bot.download_file(file_info.file_path)
+    metrics.BYTES_DOWNLOADED.inc(len(file_bytes))
+    trace.fields["bytes"] = len(file_bytes)
+
+    with trace.stage("cache"):
+        cache_keys = CacheKeys.for_image(file_bytes, photo.file_unique_id, chat_id)
+        cached = ocr_cache.get(cache_keys)
+    if cached:
+        return parse_bill(cached), None, None
+    return None, file_bytes, cache_keys
+
+def read_album(messages):
+    # Runs on the collector's timer thread once the album is complete:
+    # every photo downloads at once, then all OCR jobs queue together so
+    # the OCR workers (and their batches) read them in parallel
+    chat_id = messages[0].chat.id
+    photos = [m.photo[-1] for m in messages]
+    traces = [metrics.Trace("bill", chat_id=chat_id, album=len(photos)) for _ in photos]
+    items = [None] * len(photos)
+    outcomes = ["error"] * len(photos)
+    try:
+        processing_msg = bot.send_message(chat_id, f"🧾 {len(photos)} bills received!\n⏳ Processing, please wait...")
+
+        downloads = [download_executor.submit(prepare_photo, chat_id, p, t) for p, t in zip(photos, traces)]
+        jobs = {}
+        for i, download in enumerate(downloads):
+            try:
+                data, file_bytes, cache_keys = download.result()
+            except Exception:
+                traceback.print_exc()
+                continue
+            if data is not None:
+                items[i], outcomes[i] = dict(data), "cached"
+                continue
+            try:
+                traces[i].queued()
+                jobs[i] = (ocr_executor.submit(read_bill, ocr_engine, file_bytes, traces[i]), cache_keys)
+            except QueueFull:
+                outcomes[i] = "rejected"
+
+        for i, (job, cache_keys) in jobs.items():
+            try:
+                text, data = job.future.result()
+            except Exception:
+                traceback.print_exc()
+                metrics.OCR_FAILURES.inc()
+                outcomes[i] = "failed"
+                continue
+            ocr_cache.put(cache_keys, text)
+            items[i], outcomes[i] = dict(data), "ok"
+
+        read = [d for d in items if d is not None]
+        bot.delete_message(chat_id, processing_msg.message_id)
+        if not read:
+            bot.send_message(chat_id, ALBUM_READ_ERROR_TEXT, reply_markup=main_menu())
+            return
+        with conversations.lock(chat_id):
+            show_album_confirmation(chat_id, read, len(photos) - len(read))
+    except Exception:
+        traceback.print_exc()
+        bot.send_message(chat_id, READ_ERROR_TEXT, reply_markup=main_menu())
+    finally:
+        for trace, outcome in zip(traces, outcomes):
+            trace.finish(outcome)
+
+album_collector = AlbumCollector(read_album)
+
+def album_save(call, entry):
     chat_id = call.message.chat.id
-    entry = pending_entries.get(chat_id)
+    records, missing = album_records(entry["items"])
+    if missing:
+        bot.send_message(chat_id, missing_amount_text(missing))
+        return
 
-    if not entry:
+    # One batch for the whole album. Dropped only once it's written, so a
+    # failed save can simply be retried
+    try:
+        with metrics.STORAGE_SECONDS.time(op="add_many"):
+            store.add_many(chat_id, records)
+    except Exception:
+        traceback.print_exc()
+        bot.send_message(chat_id, ALBUM_SAVE_ERROR_TEXT)
         return
+    conversations.pop(chat_id)
 
-    if call.data == "confirm_yes":
-        d = entry["data"]
-        add_expense(chat_id, d["date"], d["time"], d["place"], d["category"], d["amount"])
-        pending_entries.pop(chat_id, None)
+    bot.send_message(chat_id, album_saved_text(records), reply_markup=main_menu())
 
-        bot.send_message(chat_id, "✅ Expense saved!", reply_markup=main_menu())
+def album_pick(call, entry):
+    chat_id = call.message.chat.id
+    index = int(call.data.split(":")[1])
+    if index >= len(entry["items"]):
         return
 
+    entry["state"] = "album_field"
+    entry["item"] = index
+    conversations.set(chat_id, entry)
+
+    bot.send_message(chat_id, f"❓ Which detail of bill {index + 1} is wrong?", reply_markup=edit_menu())
+
+def album_edit_field(call, entry):
+    chat_id = call.message.chat.id
+    field = call.data.replace("edit_", "")
+
+    entry["state"] = "album_value"
+    entry["field"] = field
+    conversations.set(chat_id, entry)
+
+    bot.send_message(chat_id, f"✏️ Enter correct {field} for bill {entry['item'] + 1}:")
+
+def album_receive_edit(m, entry):
+    entry["items"][entry["item"]][entry["field"]] = m.text.strip()
+    show_album_confirmation(m.chat.id, entry["items"], entry["failed"])
+
+# ================= CONFIRM / EDIT =================
+
+def confirm_save(call, entry):
+    chat_id = call.message.chat.id
+    # Dropped only once it's written, so a failed save can be retried
+    try:
+        add_expense(chat_id, expense_record(entry["data"]))
+    except Exception:
+        traceback.print_exc()
+        bot.send_message(chat_id, SAVE_ERROR_TEXT)
+        return
+    conversations.pop(chat_id)
+
+    bot.send_message(chat_id, "✅ Expense saved!", reply_markup=main_menu())
+
+def confirm_reject(call, entry):
+    chat_id = call.message.chat.id
     entry["state"] = "edit_field"
+    conversations.set(chat_id, entry)
     bot.send_message(chat_id, "❓ Which detail is wrong?", reply_markup=edit_menu())
 
-
-@bot.callback_query_handler(func=lambda c: c.data.startswith("edit_"))
-def edit_field(call):
+def edit_field(call, entry):
     chat_id = call.message.chat.id
     field = call.data.replace("edit_", "")
 
-    pending_entries[chat_id]["state"] = "edit_value"
-    pending_entries[chat_id]["field"] = field
+    entry["state"] = "edit_value"
+    entry["field"] = field
+    conversations.set(chat_id, entry)
 
     bot.send_message(chat_id, f"✏️ Enter correct {field}:")
 
-
-@bot.message_handler(func=lambda m: pending_entries.get(m.chat.id, {}).get("state") == "edit_value")
-def receive_edit(m):
-    entry = pending_entries[m.chat.id]
+def receive_edit(m, entry):
     field = entry["field"]
 
     entry["data"][field] = m.text.strip()
     entry["state"] = "confirm"
+    conversations.set(m.chat.id, entry)
 
-    d = entry["data"]
+    bot.send_message(m.chat.id, confirm_again_text(entry["data"]), parse_mode="Markdown", reply_markup=confirm_menu())
 
+
+# ================= MANUAL ENTRY =================
+
+def manual_start(message, entry=None):
+    conversations.set(message.chat.id, {"state": "amount"})
     bot.send_message(
-        m.chat.id,
-        f"""🔁 *Confirm Again*
-
-📅 Date: {d['date']}
-🕐 Time: {d['time']}
-📍 Place: {d['place']}
-📁 Category: {d['category']}
-💵 Amount: ₹{d['amount']}""",
-        parse_mode="Markdown",
-        reply_markup=confirm_menu()
+        message.chat.id,
+        "💵 Enter amount:",
+        reply_markup=cancel_only_menu()
     )
 
+def manual_amount(message, entry):
+    entry["amount"] = re.sub(r"[^\d.]", "", message.text)
+    entry["state"] = "date"
+    conversations.set(message.chat.id, entry)
+    bot.send_message(
+        message.chat.id,
+        "📅 Use current date or enter manually?",
+        reply_markup=date_menu()
+    )
 
-# ================= MANUAL ENTRY =================
+def manual_date_now(message, entry):
+    entry["date"] = datetime.now(IST).strftime("%d-%m-%Y")
+    ask_time(message, entry)
 
-@bot.message_handler(func=lambda m: m.text == "✏️ Add Manually")
-def manual_start(message):
-    pending_entries[message.chat.id] = {"state": "amount"}
+def manual_date_ask(message, entry):
+    entry["state"] = "date_manual"
+    conversations.set(message.chat.id, entry)
     bot.send_message(
         message.chat.id,
-        "💵 Enter amount:",
-        reply_markup=types.ReplyKeyboardMarkup(resize_keyboard=True).add("🚫 Cancel")
+        "✏️ Enter date (DD-MM-YYYY):",
+        reply_markup=cancel_only_menu()
     )
 
+def manual_date_input(message, entry):
+    entry["date"] = message.text
+    ask_time(message, entry)
 
-@bot.message_handler(
-    func=lambda m: m.chat.id in pending_entries
-    and pending_entries[m.chat.id]["state"]
-    not in ["confirm", "bill_photo"]
-)
-def manual_flow(message):
-    entry = pending_entries[message.chat.id]
-
-    # -------- AMOUNT --------
-    if entry["state"] == "amount":
-        entry["amount"] = re.sub(r"[^\d.]", "", message.text)
-        entry["state"] = "date"
-        bot.send_message(
-            message.chat.id,
-            "📅 Use current date or enter manually?",
-            reply_markup=date_menu()
-        )
-
-    # -------- DATE OPTION --------
-    elif entry["state"] == "date":
-        if "Current" in message.text:
-            entry["date"] = datetime.now(IST).strftime("%d-%m-%Y")
-            entry["state"] = "time"
-            bot.send_message(
-                message.chat.id,
-                "🕐 Use current time or enter manually?",
-                reply_markup=time_menu()
-            )
-        else:
-            entry["state"] = "date_manual"
-            m = types.ReplyKeyboardMarkup(resize_keyboard=True)
-            m.add("🚫 Cancel")
+def ask_time(message, entry):
+    entry["state"] = "time"
+    conversations.set(message.chat.id, entry)
+    bot.send_message(
+        message.chat.id,
+        "🕐 Use current time or enter manually?",
+        reply_markup=time_menu()
+    )
 
-            bot.send_message(
-                message.chat.id,
-                "✏️ Enter date (DD-MM-YYYY):",
-                reply_markup=m
-            )
+def manual_time_now(message, entry):
+    entry["time"] = datetime.now(IST).strftime("%H:%M")
+    entry["state"] = "place"
+    conversations.set(message.chat.id, entry)
+    bot.send_message(
+        message.chat.id,
+        "📍 Enter place:",
+        reply_markup=cancel_only_menu()
+    )
 
-    # -------- DATE MANUAL INPUT --------
-    elif entry["state"] == "date_manual":
-        entry["date"] = message.text
-        entry["state"] = "time"
-        bot.send_message(
-            message.chat.id,
-            "🕐 Use current time or enter manually?",
-            reply_markup=time_menu()
-        )
-
-    # -------- TIME OPTION --------
-    elif entry["state"] == "time":
-        if "Current" in message.text:
-            entry["time"] = datetime.now(IST).strftime("%H:%M")
-            entry["state"] = "place"
-            m = types.ReplyKeyboardMarkup(resize_keyboard=True)
-            m.add("🚫 Cancel")
-
-            bot.send_message(
-                message.chat.id,
-                "📍 Enter place:",
-                reply_markup=m
-            )
+def manual_time_ask(message, entry):
+    entry["state"] = "time_manual"
+    conversations.set(message.chat.id, entry)
+    bot.send_message(
+        message.chat.id,
+        "✏️ Enter time (HH:MM):",
+        reply_markup=cancel_only_menu()
+    )
 
-        else:
-            entry["state"] = "time_manual"
-            m = types.ReplyKeyboardMarkup(resize_keyboard=True)
-            m.add("🚫 Cancel")
+def manual_time_input(message, entry):
+    entry["time"] = message.text
+    entry["state"] = "place"
+    conversations.set(message.chat.id, entry)
+    bot.send_message(
+        message.chat.id,
+        "📍 Enter place:"
+    )
 
-            bot.send_message(
-                message.chat.id,
-                "✏️ Enter time (HH:MM):",
-                reply_markup=m
-            )
+def manual_place(message, entry):
+    entry["place"] = message.text
+    entry["state"] = "category"
+    conversations.set(message.chat.id, entry)
+    bot.send_message(
+        message.chat.id,
+        "📁 Select category:",
+        reply_markup=category_menu()
+    )
+
+def manual_category(message, entry):
+    entry["category"] = message.text.split(" ", 1)[-1]
+
+    conversations.set(message.chat.id, {
+        "state": "confirm",
+        "data": entry
+    })
 
-    # -------- TIME MANUAL INPUT --------
-    elif entry["state"] == "time_manual":
-        entry["time"] = message.text
-        entry["state"] = "place"
-        bot.send_message(
-            message.chat.id,
-            "📍 Enter place:"
-        )
-
-    # -------- PLACE --------
-    elif entry["state"] == "place":
-        entry["place"] = message.text
-        entry["state"] = "category"
-        bot.send_message(
-            message.chat.id,
-            "📁 Select category:",
-            reply_markup=category_menu()
-        )
-
-    # -------- CATEGORY --------
-    elif entry["state"] == "category":
-        entry["category"] = message.text.split(" ", 1)[-1]
-
-        pending_entries[message.chat.id] = {
-            "state": "confirm",
-            "data": entry
-        }
-
-        d = entry
-        bot.send_message(
-            message.chat.id,
-            f"""📋 Confirm Details
-
-📅 {d['date']}
-🕐 {d['time']}
-📍 {d['place']}
-📁 {d['category']}
-💵 ₹{d['amount']}""",
-            reply_markup=confirm_menu()
-        )
+    bot.send_message(message.chat.id, manual_confirm_text(entry), reply_markup=confirm_menu())
 
 # ================= OTHER =================
 
-@bot.message_handler(func=lambda m: m.text == "💰 Total Expense")
-def total(message):
+def total(message, entry=None):
     bot.send_message(message.chat.id, f"💰 Total: ₹{get_total_expense(message.chat.id)}")
 
-@bot.message_handler(func=lambda m: m.text == "📥 Download CSV")
-def csv_download(message):
-    if not load_user_data(message.chat.id):
-        bot.send_message(message.chat.id, "No data yet!")
+def csv_download(message, entry=None):
+    bot.send_message(message.chat.id, "📥 Which period?", reply_markup=export_period_menu())
+
+@bot.callback_query_handler(func=lambda c: c.data.startswith("export_period:"))
+def export_period(call):
+    period = call.data.split(":", 1)[1]
+    bot.edit_message_text(
+        "📥 Which format?",
+        call.message.chat.id,
+        call.message.message_id,
+        reply_markup=export_format_menu(period)
+    )
+
+@bot.callback_query_handler(func=lambda c: c.data.startswith("export:"))
+def export_download(call):
+    _, fmt, period = call.data.split(":", 2)
+    start, end = period_range(period, datetime.now(IST).date())
+    send_export(call.message.chat.id, fmt, start, end)
+
+@bot.message_handler(commands=["export"])
+def export_command(message):
+    # /export [csv|gz|xlsx] [from DD-MM-YYYY] [to DD-MM-YYYY]
+    args = message.text.split()[1:]
+    fmt = args.pop(0).lower() if args and args[0].lower() in FORMATS else "csv"
+    dates = [normalize_date(a) for a in args[:2]]
+    if None in dates:
+        bot.send_message(message.chat.id, "Usage: /export [csv|gz|xlsx] [from DD-MM-YYYY] [to DD-MM-YYYY]")
+        return
+    start = dates[0] if dates else None
+    end = dates[1] if len(dates) > 1 else None
+    send_export(message.chat.id, fmt, start, end)
+
+def reports(message, entry=None):
+    bot.send_message(message.chat.id, "📊 Which report?", reply_markup=reports_menu())
+
+def send_report(chat_id, kind):
+    summary = get_summary(chat_id)
+    if not summary["count"]:
+        bot.send_message(chat_id, "No data yet!")
         return
-    path = create_csv(message.chat.id)
-    with open(path, "rb") as f:
-        bot.send_document(message.chat.id, f)
-    os.remove(path)
+    text, chart = build_report(kind, summary)
+    if chart is None:
+        bot.send_message(chat_id, text)
+        return
+    bot.send_photo(chat_id, types.InputFile(chart, file_name=f"{kind}.png"), caption=text)
+
+@bot.callback_query_handler(func=lambda c: c.data.startswith("report:"))
+def report_callback(call):
+    kind = call.data.split(":", 1)[1]
+    if kind in REPORTS:
+        send_report(call.message.chat.id, kind)
+
+@bot.message_handler(commands=list(REPORTS))
+def report_command(message):
+    send_report(message.chat.id, message.text.split()[0].lstrip("/").split("@")[0])
 
-@bot.message_handler(func=lambda m: m.text == "🗑️ Reset Data")
-def reset(message):
+def reset(message, entry=None):
     reset_data(message.chat.id)
     bot.send_message(message.chat.id, "🗑️ All data cleared!", reply_markup=main_menu())
 
+# ================= IMPORT =================
+
+def telegram_file_url(file_path):
+    url = telebot.apihelper.FILE_URL or "https://api.telegram.org/file/bot{0}/{1}"
+    return url.format(TELEGRAM_BOT_TOKEN, file_path)
+
+def import_expenses(user_id, file_path, filename):
+    # Downloaded in full before the import takes any lock, then written
+    # as one storage batch
+    with requests.get(telegram_file_url(file_path), stream=True, timeout=60) as resp:
+        resp.raise_for_status()
+        upload = spool(resp.iter_content(SPOOL_CHUNK))
+    with upload, metrics.STORAGE_SECONDS.time(op="import"):
+        return import_stream(store, user_id, upload, filename)
+
+def import_help(message, entry=None):
+    bot.send_message(message.chat.id, IMPORT_HELP_TEXT)
+
+@bot.message_handler(content_types=["document"])
+def import_document(message):
+    chat_id = message.chat.id
+    doc = message.document
+    if not supported(doc.file_name):
+        bot.send_message(chat_id, "📎 I can import .csv, .csv.gz, .json or .jsonl files.")
+        return
+    if doc.file_size and doc.file_size > IMPORT_MAX_BYTES:
+        bot.send_message(chat_id, f"📎 That file is too big (max {IMPORT_MAX_BYTES // (1024 * 1024)} MB).")
+        return
+
+    processing_msg = bot.send_message(chat_id, "📥 Importing your expenses...")
+    try:
+        file_info = bot.get_file(doc.file_id)
+        result = import_expenses(chat_id, file_info.file_path, doc.file_name)
+    except Exception:
+        traceback.print_exc()
+        bot.edit_message_text("❌ Couldn't read that file, nothing was imported.", chat_id, processing_msg.message_id)
+        return
+    bot.edit_message_text(result_text(result), chat_id, processing_msg.message_id)
+
+# ================= CONVERSATION TABLES =================
+
+# Tables in flows.py, with this runtime's handlers
+conversation_flow = build_flow(globals())
+
+def dispatch(update, text, free_input=False):
+    message = update.message if isinstance(update, types.CallbackQuery) else update
+    with conversations.lock(message.chat.id):
+        return conversation_flow.dispatch(update, text, conversations.get(message.chat.id), free_input)
+
+@bot.callback_query_handler(func=lambda c: c.data in conversation_flow.keys)
+def conversation_button(call):
+    if not dispatch(call, call.data):
+        bot.answer_callback_query(call.id, EXPIRED_BUTTON_TEXT)
+
+# Registered last, so commands (/start, /export, ...) are matched first
+@bot.message_handler(content_types=["text"])
+def conversation_text(message):
+    dispatch(message, message.text, free_input=True)
+
 # ================= RUN =================
 
 if __name__ == "__main__":
-    print("🤖 Bot running with PaddleOCR...")
-    bot.infinity_polling(skip_pending=True)
+    migrated = store.migrate_all()
+    if migrated:
+        print(f"📦 Migrated {migrated} user file(s) to {type(store).__name__}")
+
+    # Load / warm up OCR in the background; polling starts right away
+    ocr_engine.start()
+    metrics.start_metrics_server()
+    start_keyword_watcher()
+
+    print(
+        f"🤖 Bot running with PaddleOCR ({OCR_WORKERS} OCR workers, {OCR_MODE} mode, "
+        f"batch {OCR_BATCH_SIZE}, queue {OCR_QUEUE_SIZE}), "
+        f"{BOT_MODE} after {time.monotonic() - STARTED_AT:.1f}s..."
+    )
+    try:
+        if BOT_MODE == "webhook":
+            server = WebhookServer(bot)
+            signal.signal(signal.SIGTERM, lambda *_: server.stop())
+            server.register()
+            server.serve_forever()
+        else:
+            signal.signal(signal.SIGTERM, lambda *_: bot.stop_polling())
+            bot.infinity_polling(skip_pending=True)
+    finally:
+        print("🛑 Stopping: finishing queued bills...")
+        ocr_executor.shutdown(wait=True, timeout=60)
+        download_executor.shutdown(wait=True)
+        ocr_engine.close()
+        ocr_cache.close()
+        conversations.close()
+        store.close()
 
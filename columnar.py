@@ -0,0 +1,293 @@
+import os
+import re
+import json
+import calendar
+import functools
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+from storage import Storage, LOG_FSYNC, normalize_date, month_key, place_key, empty_summary
+
+# Columnar expense storage (STORAGE_BACKEND=columnar). Each user's expenses
+# are fixed-width binary records in <folder>/<user_id>.rec, read through a
+# NumPy memory map: totals, rollups and date filters are vectorized over
+# the columns, with no per-row parsing and no per-row Python objects.
+#
+#   amount                      float64
+#   ts                          int64, epoch seconds of date + time (NO_DATE if the date doesn't parse)
+#   date, time, place, category uint32 ids into <user_id>.str
+#
+# <user_id>.str interns the strings: one JSON string per line, the id is
+# the line number. Raw text comes back unchanged (an OCR date like
+# "12/03/25" stays "12/03/25"), and each distinct string is stored once.
+# Both files are append-only; a torn tail from a crash is cut off on the
+# next write and ignored until then.
+
+COLUMNAR_CACHE_USERS = int(os.getenv("COLUMNAR_CACHE_USERS", "1024"))   # string tables kept in memory
+
+RECORD = np.dtype([
+    ("amount", "<f8"),
+    ("ts", "<i8"),
+    ("date", "<u4"),
+    ("time", "<u4"),
+    ("place", "<u4"),
+    ("category", "<u4"),
+])
+STRING_COLUMNS = ("date", "time", "place", "category")
+NO_DATE = np.iinfo(np.int64).min
+WRITE_CHUNK = 4096
+TIME_RE = re.compile(r"(\d{1,2}):(\d{2})")
+
+
+@functools.lru_cache(maxsize=4096)
+def _day_epoch(date):
+    day = normalize_date(date)
+    if day is None:
+        return None
+    return calendar.timegm(datetime.strptime(day, "%Y-%m-%d").timetuple())
+
+
+@functools.lru_cache(maxsize=2048)
+def _time_seconds(time):
+    m = TIME_RE.match(time.strip())
+    if not m or int(m.group(1)) > 23 or int(m.group(2)) > 59:
+        return 0
+    return int(m.group(1)) * 3600 + int(m.group(2)) * 60
+
+
+def timestamp(date, time):
+    day = _day_epoch(date)
+    return NO_DATE if day is None else day + _time_seconds(time)
+
+
+def _text(value):
+    return "" if value is None else str(value)
+
+
+def _sum_by(ids, amounts, strings):
+    # {string: summed amount} for every id that occurs
+    sums = np.bincount(ids, weights=amounts)
+    counts = np.bincount(ids)
+    return {strings[i]: float(sums[i]) for i in np.flatnonzero(counts)}
+
+
+class StringTable:
+
+    def __init__(self, path):
+        self.path = path
+        self.strings = []
+        self.ids = {}
+        self.size = 0   # bytes of the file covered by complete lines
+
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        # A last line without "\n" is a torn write: left out, cut on the next append
+        self.size = data.rfind(b"\n") + 1
+        for line in data[:self.size].splitlines():
+            self.intern(json.loads(line))
+
+    def intern(self, text, new=None):
+        i = self.ids.get(text)
+        if i is None:
+            i = self.ids[text] = len(self.strings)
+            self.strings.append(text)
+            if new is not None:
+                new.append(text)
+        return i
+
+
+class ColumnarStorage(Storage):
+
+    def __init__(self, folder, legacy_folder=None, fsync=LOG_FSYNC, cache_users=COLUMNAR_CACHE_USERS):
+        self.folder = folder
+        self.legacy_folder = legacy_folder
+        self.fsync = fsync
+        self.cache_users = cache_users
+        os.makedirs(folder, exist_ok=True)
+
+        self._tables = OrderedDict()   # user_id → StringTable, least recently used first
+        self._tables_guard = threading.Lock()
+
+    # ================= PATHS =================
+
+    def records_path(self, user_id):
+        return os.path.join(self.folder, f"{user_id}.rec")
+
+    def strings_path(self, user_id):
+        return os.path.join(self.folder, f"{user_id}.str")
+
+    # ================= COLUMNS =================
+
+    def _table(self, user_id):
+        # Caller holds the user's lock
+        key = str(user_id)
+        with self._tables_guard:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+        table = StringTable(self.strings_path(user_id))
+        with self._tables_guard:
+            self._tables[key] = table
+            while len(self._tables) > self.cache_users:
+                self._tables.popitem(last=False)
+        return table
+
+    def _columns(self, user_id):
+        # → (records, strings). The map covers whole records written so far;
+        # later appends and torn tails are outside it
+        with self._lock(user_id):
+            strings = self._table(user_id).strings
+            try:
+                count = os.path.getsize(self.records_path(user_id)) // RECORD.itemsize
+            except OSError:
+                count = 0
+            if not count:
+                return np.zeros(0, dtype=RECORD), strings
+            records = np.memmap(self.records_path(user_id), dtype=RECORD, mode="r", shape=(count,))
+
+        # Records whose strings didn't reach the disk before a crash
+        known = len(strings)
+        if any(int(records[c].max()) >= known for c in STRING_COLUMNS):
+            ok = np.ones(count, dtype=bool)
+            for c in STRING_COLUMNS:
+                ok &= records[c] < known
+            records = records[ok]
+        return records, strings
+
+    @staticmethod
+    def _in_range(records, start=None, end=None):
+        # Same rule as storage.in_range: undated rows only match no range
+        mask = records["ts"] != NO_DATE
+        if start:
+            mask &= records["ts"] >= _day_epoch(start)
+        if end:
+            mask &= records["ts"] < _day_epoch(end) + 86400
+        return records[mask]
+
+    # ================= READ / WRITE =================
+
+    def iter_rows(self, user_id, start=None, end=None):
+        records, strings = self._columns(user_id)
+        if start or end:
+            records = self._in_range(records, start, end)
+        columns = zip(
+            records["amount"].tolist(), records["date"].tolist(), records["time"].tolist(),
+            records["place"].tolist(), records["category"].tolist()
+        )
+        for amount, date, time, place, category in columns:
+            yield {
+                "date": strings[date],
+                "time": strings[time],
+                "place": strings[place],
+                "category": strings[category],
+                "amount": amount
+            }
+
+    def add(self, user_id, record):
+        self.add_many(user_id, [record])
+
+    def add_many(self, user_id, records):
+        # New strings are appended before the records that use them, one
+        # chunk at a time. If records raises part-way, both files are cut
+        # back to where they were.
+        with self._lock(user_id):
+            table = self._table(user_id)
+            records_fd = os.open(self.records_path(user_id), os.O_WRONLY | os.O_CREAT, 0o644)
+            strings_fd = os.open(self.strings_path(user_id), os.O_WRONLY | os.O_CREAT, 0o644)
+            records_size = os.fstat(records_fd).st_size // RECORD.itemsize * RECORD.itemsize
+            strings_size = table.size
+            count = 0
+            try:
+                for fd, size in ((records_fd, records_size), (strings_fd, strings_size)):
+                    os.ftruncate(fd, size)
+                    os.lseek(fd, size, os.SEEK_SET)
+
+                chunk = []
+                for record in records:
+                    chunk.append(record)
+                    if len(chunk) >= WRITE_CHUNK:
+                        count += self._write_chunk(table, chunk, records_fd, strings_fd)
+                        chunk = []
+                if chunk:
+                    count += self._write_chunk(table, chunk, records_fd, strings_fd)
+                if self.fsync and count:
+                    os.fsync(strings_fd)
+                    os.fsync(records_fd)
+            except BaseException:
+                os.ftruncate(records_fd, records_size)
+                os.ftruncate(strings_fd, strings_size)
+                # The in-memory table may hold strings that were cut off
+                with self._tables_guard:
+                    self._tables.pop(str(user_id), None)
+                raise
+            finally:
+                os.close(records_fd)
+                os.close(strings_fd)
+            return count
+
+    def _write_chunk(self, table, chunk, records_fd, strings_fd):
+        new = []
+        rows = []
+        for record in chunk:
+            date, time = _text(record.get("date")), _text(record.get("time"))
+            rows.append((
+                float(record["amount"]),
+                timestamp(date, time),
+                table.intern(date, new),
+                table.intern(time, new),
+                table.intern(_text(record.get("place")), new),
+                table.intern(_text(record.get("category")), new),
+            ))
+        if new:
+            table.size += os.write(strings_fd, "".join(
+                json.dumps(s, ensure_ascii=False) + "\n" for s in new
+            ).encode("utf-8"))
+        os.write(records_fd, np.array(rows, dtype=RECORD).tobytes())
+        return len(rows)
+
+    def reset(self, user_id):
+        with self._lock(user_id):
+            for path in (self.records_path(user_id), self.strings_path(user_id)):
+                if os.path.exists(path):
+                    os.remove(path)
+            with self._tables_guard:
+                self._tables.pop(str(user_id), None)
+
+    # ================= AGGREGATES =================
+    # Computed from the columns on every call: no rollup files to keep in
+    # sync, and summing even large histories is a few vectorized passes.
+
+    def total(self, user_id):
+        records, _ = self._columns(user_id)
+        return float(records["amount"].sum())
+
+    def summary(self, user_id):
+        records, strings = self._columns(user_id)
+        summary = empty_summary()
+        if not len(records):
+            return summary
+
+        amounts = records["amount"]
+        summary["total"] = float(amounts.sum())
+        summary["count"] = len(records)
+        summary["by_category"] = _sum_by(records["category"], amounts, strings)
+
+        # Summed per distinct string first, then merged in Python: there are
+        # only a few hundred dates / places however long the history is
+        for column, field, key_fn in (("place", "by_place", place_key), ("date", "by_month", month_key)):
+            merged = {}
+            for text, total in _sum_by(records[column], amounts, strings).items():
+                key = key_fn(text)
+                merged[key] = merged.get(key, 0) + total
+            summary[field] = merged
+        return summary
+
+    def users(self):
+        return [name[:-len(".rec")] for name in os.listdir(self.folder) if name.endswith(".rec")]
@@ -0,0 +1,169 @@
+import os
+import copy
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from locks import user_locks
+
+# Per-chat conversation state (what used to be the pending_entries dict):
+# the half-finished manual entry / bill confirmation of each chat.
+# Thread-safe; idle conversations expire after CONVERSATION_TTL seconds and
+# at most CONVERSATION_MAX are kept in memory (least recently used go
+# first). CONVERSATION_DB adds a SQLite copy so in-flight confirmations
+# survive a restart.
+#
+# get() hands out a copy: change it, then set() it back. Hold lock(chat_id)
+# around that read-modify-write when several threads can serve one chat.
+
+CONVERSATION_MAX = int(os.getenv("CONVERSATION_MAX", "10000"))
+CONVERSATION_TTL = int(os.getenv("CONVERSATION_TTL", str(6 * 3600)))
+CONVERSATION_DB = os.getenv("CONVERSATION_DB", "")
+
+SWEEP_INTERVAL = 60   # seconds between expiry sweeps
+
+
+class ConversationStore:
+
+    def __init__(self, max_entries=CONVERSATION_MAX, ttl=CONVERSATION_TTL, db_path=CONVERSATION_DB):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # chat_id → (expires_at, entry)
+        self._next_sweep = 0
+
+        self.expired = 0
+        self.evicted = 0
+
+        self._db = None
+        self._on_disk = set()   # chat_ids with a row, so misses skip the query
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS conversations ("
+                "chat_id INTEGER PRIMARY KEY, entry TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM conversations WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+            self._on_disk = {row[0] for row in self._db.execute("SELECT chat_id FROM conversations")}
+            if self._on_disk:
+                print(f"💬 Restored {len(self._on_disk)} open conversation(s)")
+
+    # ================= LOCKING =================
+
+    def lock(self, chat_id):
+        # The chat's user lock (locks.py), the same one storage takes:
+        # updates for one chat run one at a time, other chats never wait
+        return user_locks.hold(chat_id)
+
+    # ================= EXPIRY =================
+
+    def _sweep(self, now):
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + SWEEP_INTERVAL
+        stale = [cid for cid, (expires_at, _) in self._entries.items() if expires_at < now]
+        for cid in stale:
+            del self._entries[cid]
+        self.expired += len(stale)
+        if self._db is not None:
+            gone = self._db.execute("SELECT chat_id FROM conversations WHERE expires_at < ?", (now,)).fetchall()
+            if gone:
+                self._db.execute("DELETE FROM conversations WHERE expires_at < ?", (now,))
+                self._db.commit()
+                gone = {row[0] for row in gone}
+                self._on_disk -= gone
+                self.expired += len(gone - set(stale))
+
+    def _evict(self):
+        # Memory only: with a DB the row stays and is reloaded on demand
+        while len(self._entries) > self.max_entries:
+            cid, _ = self._entries.popitem(last=False)
+            if cid not in self._on_disk:
+                self.evicted += 1
+
+    # ================= API =================
+
+    def _lookup(self, chat_id, now):
+        item = self._entries.get(chat_id)
+        if item is None and chat_id in self._on_disk:
+            row = self._db.execute(
+                "SELECT expires_at, entry FROM conversations WHERE chat_id = ?", (chat_id,)
+            ).fetchone()
+            if row is None:
+                self._on_disk.discard(chat_id)
+            else:
+                item = (row[0], json.loads(row[1]))
+                self._entries[chat_id] = item
+                self._evict()
+        if item is None:
+            return None
+        if item[0] < now:
+            self._drop(chat_id)
+            self.expired += 1
+            return None
+        self._entries.move_to_end(chat_id)
+        return item[1]
+
+    def _drop(self, chat_id):
+        self._entries.pop(chat_id, None)
+        if chat_id in self._on_disk:
+            self._db.execute("DELETE FROM conversations WHERE chat_id = ?", (chat_id,))
+            self._db.commit()
+            self._on_disk.discard(chat_id)
+
+    def get(self, chat_id):
+        now = time.time()
+        with self._lock:
+            self._sweep(now)
+            entry = self._lookup(chat_id, now)
+            return copy.deepcopy(entry) if entry is not None else None
+
+    def state(self, chat_id):
+        now = time.time()
+        with self._lock:
+            entry = self._lookup(chat_id, now)
+            return entry.get("state") if entry is not None else None
+
+    def set(self, chat_id, entry):
+        now = time.time()
+        expires_at = now + self.ttl
+        entry = copy.deepcopy(entry)
+        with self._lock:
+            self._sweep(now)
+            self._entries[chat_id] = (expires_at, entry)
+            self._entries.move_to_end(chat_id)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO conversations VALUES (?, ?, ?)",
+                    (chat_id, json.dumps(entry), expires_at)
+                )
+                self._db.commit()
+                self._on_disk.add(chat_id)
+            self._evict()
+
+    def pop(self, chat_id):
+        now = time.time()
+        with self._lock:
+            entry = self._lookup(chat_id, now)
+            self._drop(chat_id)
+            return entry
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "stored": len(self._on_disk),
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
+
+    def close(self):
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,186 @@
+import io
+import re
+import csv
+import gzip
+import zipfile
+from datetime import date, timedelta
+from xml.sax.saxutils import escape
+
+# Expense export straight from storage rows into an in-memory buffer:
+# one pass, no temp file, footer total summed while writing.
+#   csv    → plain CSV (same layout as before)
+#   csv.gz → gzip-compressed CSV
+#   xlsx   → single-sheet Excel workbook (written by hand, no extra dependency)
+
+HEADER = ["Date", "Time", "Place", "Category", "Amount"]
+
+FORMATS = {
+    "csv": ".csv",
+    "gz": ".csv.gz",
+    "xlsx": ".xlsx",
+}
+
+PERIODS = ["all", "month", "last_month", "30d"]
+
+
+def period_range(period, today=None):
+    # → (start, end) as "YYYY-MM-DD" (inclusive), None = open-ended
+    today = today or date.today()
+    if period == "month":
+        return today.replace(day=1).isoformat(), today.isoformat()
+    if period == "last_month":
+        end = today.replace(day=1) - timedelta(days=1)
+        return end.replace(day=1).isoformat(), end.isoformat()
+    if period == "30d":
+        return (today - timedelta(days=29)).isoformat(), today.isoformat()
+    return None, None
+
+
+class Export:
+
+    def __init__(self, buffer, filename, count, total):
+        self.buffer = buffer
+        self.filename = filename
+        self.count = count
+        self.total = total
+
+
+def _row(d):
+    return [d["date"], d["time"], d["place"], d["category"], d["amount"]]
+
+
+# ================= CSV / GZIP =================
+
+def _write_csv(text_stream, rows):
+    writer = csv.writer(text_stream)
+    writer.writerow(HEADER)
+    count, total = 0, 0
+    for d in rows:
+        writer.writerow(_row(d))
+        count += 1
+        total += float(d["amount"])
+    writer.writerow([])
+    writer.writerow(["", "", "", "TOTAL", total])
+    return count, total
+
+
+def _export_csv(buf, rows):
+    text = io.TextIOWrapper(buf, encoding="utf-8", newline="", write_through=True)
+    result = _write_csv(text, rows)
+    text.detach()
+    return result
+
+
+def _export_gz(buf, rows):
+    with gzip.GzipFile(fileobj=buf, mode="wb", compresslevel=6) as gz:
+        text = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+        result = _write_csv(text, rows)
+        text.flush()
+        text.detach()
+    return result
+
+
+# ================= XLSX =================
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="xl/workbook.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>'
+)
+
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Expenses" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+    '</Relationships>'
+)
+
+XLSX_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+XLSX_SHEET_END = '</sheetData></worksheet>'
+
+# Control characters aren't allowed in XML (OCR output sometimes has them)
+XML_INVALID = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _cell(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = escape(XML_INVALID.sub("", str(value if value is not None else "")))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return "<row>" + "".join(_cell(v) for v in values) + "</row>"
+
+
+def _export_xlsx(buf, rows):
+    count, total = 0, 0
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", XLSX_CONTENT_TYPES)
+        zf.writestr("_rels/.rels", XLSX_ROOT_RELS)
+        zf.writestr("xl/workbook.xml", XLSX_WORKBOOK)
+        zf.writestr("xl/_rels/workbook.xml.rels", XLSX_WORKBOOK_RELS)
+
+        # Sheet rows are compressed as they are written
+        with zf.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(XLSX_SHEET_START.encode())
+            sheet.write(_xlsx_row(HEADER).encode())
+            for d in rows:
+                row = _row(d)
+                row[4] = float(row[4])
+                sheet.write(_xlsx_row(row).encode("utf-8"))
+                count += 1
+                total += row[4]
+            sheet.write(_xlsx_row(["", "", "", "TOTAL", total]).encode())
+            sheet.write(XLSX_SHEET_END.encode())
+    return count, total
+
+
+EXPORTERS = {
+    "csv": _export_csv,
+    "gz": _export_gz,
+    "xlsx": _export_xlsx,
+}
+
+
+def export_rows(rows, fmt="csv", name="expenses"):
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    buf = io.BytesIO()
+    count, total = EXPORTERS[fmt](buf, rows)
+    buf.seek(0)
+    return Export(buf, name + FORMATS[fmt], count, total)
+
+
+def export_user(store, user_id, fmt="csv", start=None, end=None):
+    rows = store.iter_rows(user_id, start=start, end=end)
+    name = f"{user_id}_expenses"
+    if start or end:
+        name += f"_{start or 'start'}_{end or 'now'}"
+    return export_rows(rows, fmt, name)
@@ -0,0 +1,170 @@
+from fsm import StateMachine, ANY
+from menus import EDIT_FIELDS
+from albums import ALBUM_MAX_PHOTOS
+from bill_parser import parse_bill
+import metrics
+
+# Conversation logic shared by bot.py and async_bot.py. The two runtimes
+# differ only in how they reach Telegram and storage (blocking calls vs
+# awaits), so each keeps its own handlers; the reply texts, how a bill is
+# read, the record an entry is saved as and the conversation tables live
+# here, and build_flow wires each runtime's handlers into the same tables.
+
+# ================= TEXTS =================
+
+CANCELLED_TEXT = "🚫 Current process cancelled.\nBack to main menu."
+BILL_PROMPT_TEXT = "📸 Send the bill photo clearly\n🗂️ Several bills? Send them together as one album."
+PROCESSING_TEXT = "🧾 Bill received!\n⏳ Processing, please wait..."
+WARMING_UP_TEXT = "🧾 Bill received!\n🔥 The bill reader is warming up after a restart, your bill is queued..."
+QUEUE_FULL_TEXT = "🚦 Too many bills are being processed right now.\nPlease send it again in a minute or use manual entry."
+READ_ERROR_TEXT = "❌ Couldn't read bill clearly.\nTry another image or use manual entry."
+ALBUM_READ_ERROR_TEXT = "❌ Couldn't read these bills clearly.\nTry other images or use manual entry."
+SAVE_ERROR_TEXT = "❌ Couldn't save this expense. Tap ✅ Yes to try again."
+ALBUM_SAVE_ERROR_TEXT = "❌ Couldn't save these bills. Tap ✅ Save All to try again."
+IMPORT_HELP_TEXT = (
+    "📤 Send me a file as a document and I'll add every expense in it:\n"
+    "• .csv with the same columns as 📥 Download CSV (Date, Time, Place, Category, Amount)\n"
+    "• .json with a list of {date, time, place, category, amount}\n\n"
+    "Expenses you already have are skipped."
+)
+
+
+def welcome_text(user_name):
+    return (
+        f"Hi {user_name} *Welcome to Paathu Selavu Pannu 👋!*\n\n"
+        f"📊 Track your *Expenses* easily\n"
+        f"📸 Upload bill photos to save time\n"
+        f"✍️ Manual entry available anytime"
+    )
+
+
+def queued_text(job):
+    text = f"🧾 Bill received!\n📥 You're #{job.position} in the queue"
+    if job.eta is not None:
+        text += f", ready in about {max(1, round(job.eta))}s"
+    return text + ". Please wait..."
+
+
+def bill_text(data):
+    return f"""📋 *Confirm Details*
+
+📅 Date: {data.get('date') or '—'}
+🕐 Time: {data.get('time') or '—'}
+📍 Place: {data.get('place') or '—'}
+📁 Category: {data.get('category') or '—'}
+💵 Amount: ₹{data.get('amount') or '—'}"""
+
+
+def confirm_again_text(d):
+    return f"""🔁 *Confirm Again*
+
+📅 Date: {d['date']}
+🕐 Time: {d['time']}
+📍 Place: {d['place']}
+📁 Category: {d['category']}
+💵 Amount: ₹{d['amount']}"""
+
+
+def manual_confirm_text(d):
+    return f"""📋 Confirm Details
+
+📅 {d['date']}
+🕐 {d['time']}
+📍 {d['place']}
+📁 {d['category']}
+💵 ₹{d['amount']}"""
+
+
+def missing_amount_text(missing):
+    return f"💵 Bill(s) {', '.join(map(str, missing))} need an amount. Tap ✏️ to add it, then save again."
+
+
+def album_saved_text(records):
+    total = sum(r["amount"] for r in records)
+    return f"✅ {len(records)} expense(s) saved! (₹{total:.2f})"
+
+# ================= OCR =================
+
+def read_bill(engine, image_bytes, trace):
+    # Runs on an OCR executor thread: OCR + parse. Downloaded bytes go
+    # straight to the engine (decoded in memory, never saved)
+    trace.dequeued()
+    with trace.stage("ocr"):
+        lines, scores, timings = engine.recognize(image_bytes)
+    trace.fields["ocr_ms"] = {k: round(v, 1) for k, v in timings.items()}
+
+    text = "\n".join(lines)
+    if not text.strip():
+        raise ValueError("Empty OCR")
+
+    with trace.stage("parse"):
+        return text, parse_bill(text)
+
+# ================= SAVE =================
+
+def expense_record(d):
+    # A confirmed bill / manual entry as it goes to Storage.add
+    return {
+        "date": d["date"],
+        "time": d["time"],
+        "place": d["place"],
+        "category": d["category"],
+        "amount": float(d["amount"])
+    }
+
+# ================= CONVERSATION TABLES =================
+# Handler names, looked up in the runtime's own handlers by build_flow
+
+# Main menu buttons work in any state (and leave the current flow)
+MENU_BUTTONS = {ANY: {
+    "🚫 Cancel": "cancel_current_process",
+    "📸 Add by Bill Photo": "bill_start",
+    "✏️ Add Manually": "manual_start",
+    "💰 Total Expense": "total",
+    "📥 Download CSV": "csv_download",
+    "📊 Reports": "reports",
+    "📤 Import": "import_help",
+    "🗑️ Reset Data": "reset",
+}}
+
+EDIT_BUTTONS = {f"edit_{f}": "edit_field" for f in EDIT_FIELDS}
+
+# Inline buttons under "Confirm Details" / "Which detail is wrong?"
+CONFIRM_FLOW = {
+    "confirm": {"confirm_yes": "confirm_save", "confirm_no": "confirm_reject", **EDIT_BUTTONS},
+    "edit_field": {"confirm_yes": "confirm_save", **EDIT_BUTTONS},
+    "edit_value": {"confirm_yes": "confirm_save", ANY: "receive_edit", **EDIT_BUTTONS},
+}
+
+ALBUM_ITEM_BUTTONS = {f"album_edit:{i}": "album_pick" for i in range(ALBUM_MAX_PHOTOS)}
+ALBUM_FIELD_BUTTONS = {f"edit_{f}": "album_edit_field" for f in EDIT_FIELDS}
+
+# Inline buttons under "Confirm N Bills": edit one bill, or save them all
+ALBUM_FLOW = {
+    "album_confirm": {"album_save": "album_save", **ALBUM_ITEM_BUTTONS},
+    "album_field": {"album_save": "album_save", **ALBUM_ITEM_BUTTONS, **ALBUM_FIELD_BUTTONS},
+    "album_value": {ANY: "album_receive_edit", **ALBUM_ITEM_BUTTONS, **ALBUM_FIELD_BUTTONS},
+}
+
+MANUAL_FLOW = {
+    "amount": {ANY: "manual_amount"},
+    "date": {"📅 Use Current Date": "manual_date_now", ANY: "manual_date_ask"},
+    "date_manual": {ANY: "manual_date_input"},
+    "time": {"🕐 Use Current Time": "manual_time_now", ANY: "manual_time_ask"},
+    "time_manual": {ANY: "manual_time_input"},
+    "place": {ANY: "manual_place"},
+    "category": {ANY: "manual_category"},
+}
+
+
+def build_flow(handlers):
+    # handlers: name → function, i.e. the runtime module's globals()
+    tables = [
+        {state: {text: handlers[name] for text, name in rows.items()} for state, rows in table.items()}
+        for table in (MENU_BUTTONS, CONFIRM_FLOW, ALBUM_FLOW, MANUAL_FLOW)
+    ]
+    flow = StateMachine(*tables)
+    flow.hooks.append(
+        lambda transition, seconds: metrics.TRANSITION_SECONDS.observe(seconds, transition=transition)
+    )
+    return flow
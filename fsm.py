@@ -0,0 +1,87 @@
+import time
+import inspect
+
+# Table-driven conversation dispatch: every text message and conversation
+# button goes through one registered handler, which finds what to run with
+# dict lookups on the chat's state and the text / callback data:
+#
+#   1. (state, text)  a transition, e.g. ("date", "📅 Use Current Date")
+#   2. text           a button that works in any state, e.g. "🚫 Cancel"
+#   3. state          free input for that state, e.g. the amount typed in "amount"
+#
+# Only typed text is free input (free_input=True from the text handler). A
+# button press has to match 1 or 2: a stale inline button from an earlier
+# step resolves to nothing, instead of reaching a text handler.
+#
+# Flows are tables {state: {text: handler}}; ANY as the state makes a
+# button, ANY as the text takes any input. Handlers are called as
+# handler(update, entry) with the chat's conversation entry (None outside a
+# flow); plain functions for bot.py, coroutines for async_bot.py.
+#
+# hooks: fn(transition, seconds) after every handler, e.g. for metrics.
+
+ANY = None
+
+
+class StateMachine:
+
+    def __init__(self, *tables):
+        self.transitions = {}   # (state, text) → handler
+        self.buttons = {}       # text → handler
+        self.inputs = {}        # state → handler
+        self.hooks = []
+        for table in tables:
+            self.add(table)
+
+    def add(self, table):
+        for state, rows in table.items():
+            for text, handler in rows.items():
+                if state is ANY:
+                    self.buttons[text] = handler
+                elif text is ANY:
+                    self.inputs[state] = handler
+                else:
+                    self.transitions[(state, text)] = handler
+        self.keys = set(self.buttons) | {text for _, text in self.transitions}
+
+    def resolve(self, state, text, free_input=False):
+        handler = self.transitions.get((state, text))
+        if handler is None:
+            handler = self.buttons.get(text)
+        if handler is None and free_input and state is not None:
+            handler = self.inputs.get(state)
+        return handler
+
+    def _observe(self, state, handler, seconds):
+        transition = f"{state or '-'}:{handler.__name__}"
+        for hook in self.hooks:
+            hook(transition, seconds)
+
+    # ================= DISPATCH =================
+
+    def dispatch(self, update, text, entry, free_input=False):
+        # → True if a handler ran
+        state = entry.get("state") if entry else None
+        handler = self.resolve(state, text, free_input)
+        if handler is None:
+            return False
+        start = time.perf_counter()
+        try:
+            handler(update, entry)
+        finally:
+            self._observe(state, handler, time.perf_counter() - start)
+        return True
+
+    async def dispatch_async(self, update, text, entry, free_input=False):
+        state = entry.get("state") if entry else None
+        handler = self.resolve(state, text, free_input)
+        if handler is None:
+            return False
+        start = time.perf_counter()
+        try:
+            result = handler(update, entry)
+            if inspect.isawaitable(result):
+                await result
+        finally:
+            self._observe(state, handler, time.perf_counter() - start)
+        return True
@@ -0,0 +1,247 @@
+import io
+import os
+import re
+import csv
+import gzip
+import json
+import tempfile
+
+from storage import normalize_date, place_key
+from locks import user_locks
+
+# Bulk import of an uploaded expense file. The download is spooled to a
+# temp file first (spool), so no lock or transaction ever waits on the
+# network; rows then stream from it into one storage batch
+# (Storage.add_many) without the file being held in memory as a whole.
+#   .csv / .csv.gz  → the export's columns: Date, Time, Place, Category, Amount
+#   .json / .jsonl  → a list of {"date", "time", "place", "category", "amount"}
+#                     objects, or one object per line
+# Rows are normalized like manual entries (DD-MM-YYYY date, HH:MM time,
+# numeric amount). Unusable rows are skipped; rows the user already has
+# (or that repeat within the file) count as duplicates.
+
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(20 * 1024 * 1024)))   # bot download limit
+
+EXTENSIONS = (".csv", ".csv.gz", ".json", ".jsonl")
+FIELDS = ["date", "time", "place", "category", "amount"]
+
+JSON_CHUNK = 64 * 1024
+SPOOL_CHUNK = 64 * 1024
+TIME_RE = re.compile(r"(\d{1,2})[:.](\d{2})(?::\d{2})?\s*([AaPp][Mm])?")
+# "120.50", "1,200", "₹ 99", "40 INR"; no sign, so "-50" is not an amount
+AMOUNT_RE = re.compile(r"(?:₹|rs\.?|inr)?\s*(\d[\d,]*(?:\.\d+)?)\s*(?:₹|rs\.?|inr)?", re.IGNORECASE)
+
+
+class ImportResult:
+
+    def __init__(self):
+        self.imported = 0
+        self.skipped = 0
+        self.duplicates = 0
+        self.problems = []   # first few "row N: reason"
+
+    def skip(self, row, reason):
+        self.skipped += 1
+        if len(self.problems) < 5:
+            self.problems.append(f"row {row}: {reason}")
+
+
+def supported(filename):
+    return (filename or "").lower().endswith(EXTENSIONS)
+
+
+# ================= DOWNLOAD =================
+
+def spool(chunks, limit=IMPORT_MAX_BYTES):
+    # chunks: bytes pieces of the upload (e.g. resp.iter_content) → temp file at offset 0
+    f = tempfile.TemporaryFile()
+    size = 0
+    try:
+        for chunk in chunks:
+            size += len(chunk)
+            if size > limit:
+                raise ValueError(f"upload is larger than {limit} bytes")
+            f.write(chunk)
+        f.seek(0)
+    except BaseException:
+        f.close()
+        raise
+    return f
+
+
+async def spool_async(chunks, limit=IMPORT_MAX_BYTES):
+    # The same for an async iterator, e.g. aiohttp's content.iter_chunked
+    f = tempfile.TemporaryFile()
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > limit:
+                raise ValueError(f"upload is larger than {limit} bytes")
+            f.write(chunk)
+        f.seek(0)
+    except BaseException:
+        f.close()
+        raise
+    return f
+
+
+# ================= PARSING =================
+
+def _iter_csv(text):
+    reader = csv.reader(text)
+    columns = FIELDS
+    for n, cells in enumerate(reader, 1):
+        if not any(c.strip() for c in cells):
+            continue
+        names = [c.strip().lower() for c in cells]
+        if n == 1 and "amount" in names:
+            # Header row: columns may come in any order
+            columns = names
+            continue
+        fields = dict(zip(columns, cells))
+        # Footer the export writes: ["", "", "", "TOTAL", <sum>]
+        if not fields.get("date", "").strip() and fields.get("category", "").strip() == "TOTAL":
+            continue
+        yield n, fields
+
+
+def _iter_json(text):
+    # JSON array or JSON Lines, decoded one object at a time
+    decoder = json.JSONDecoder()
+    buf, eof, n = "", False, 0
+    while True:
+        buf = buf.lstrip(" \t\r\n,[]")
+        if buf:
+            try:
+                value, end = decoder.raw_decode(buf)
+            except ValueError:
+                value, end = None, None
+            # An object cut off at the chunk edge needs more text
+            if end is not None and (end < len(buf) or eof):
+                n += 1
+                yield n, value
+                buf = buf[end:]
+                continue
+            if eof:
+                raise ValueError("the JSON is incomplete or malformed")
+        elif eof:
+            return
+        chunk = text.read(JSON_CHUNK)
+        eof = not chunk
+        buf += chunk
+
+
+def iter_rows(raw, filename):
+    # raw: binary file-like (e.g. the spooled upload) → (row number, fields)
+    name = filename.lower()
+    if name.endswith(".gz"):
+        raw = gzip.GzipFile(fileobj=raw, mode="rb")
+    text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+    if name.endswith((".json", ".jsonl")):
+        return _iter_json(text)
+    return _iter_csv(text)
+
+
+# ================= NORMALIZING =================
+
+def normalize_time(value):
+    m = TIME_RE.fullmatch(str(value or "").strip())
+    if not m:
+        return ""
+    hour, minute, ampm = int(m.group(1)), int(m.group(2)), (m.group(3) or "").lower()
+    if ampm == "pm" and hour < 12:
+        hour += 12
+    elif ampm == "am" and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return ""
+    return f"{hour:02d}:{minute:02d}"
+
+
+def parse_amount(value):
+    # → float, or None for anything else (negative, several numbers, text)
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value >= 0 else None
+    m = AMOUNT_RE.fullmatch(str(value or "").strip())
+    return float(m.group(1).replace(",", "")) if m else None
+
+
+def normalize_row(fields):
+    # → (record, None) or (None, reason)
+    if not isinstance(fields, dict):
+        return None, "not an object"
+    fields = {str(k).strip().lower(): v for k, v in fields.items()}
+
+    day = normalize_date(str(fields.get("date") or ""))
+    if day is None:
+        return None, f"bad date {fields.get('date')!r}"
+    amount = parse_amount(fields.get("amount"))
+    if amount is None:
+        return None, f"bad amount {fields.get('amount')!r}"
+    if amount <= 0:
+        return None, "amount is zero"
+
+    category = str(fields.get("category") or "").strip()
+    # "🍔 Food" (menu button text) → "Food", as manual entry stores it
+    if category and not category[0].isalnum():
+        category = category.split(" ", 1)[-1].strip()
+
+    return {
+        "date": f"{day[8:10]}-{day[5:7]}-{day[:4]}",
+        "time": normalize_time(fields.get("time")),
+        "place": str(fields.get("place") or "").strip(),
+        "category": category or "Other",
+        "amount": amount,
+    }, None
+
+
+def dedupe_key(record):
+    # Stored rows and incoming rows normalized the same way ("9:05" == "09:05")
+    return (
+        normalize_date(record.get("date")),
+        normalize_time(record.get("time")),
+        place_key(record.get("place")),
+        str(record.get("category") or "").lower(),
+        round(float(record["amount"]), 2),
+    )
+
+
+# ================= IMPORT =================
+
+def import_stream(store, user_id, raw, filename):
+    result = ImportResult()
+
+    def records(seen):
+        for n, fields in iter_rows(raw, filename):
+            record, problem = normalize_row(fields)
+            if record is None:
+                result.skip(n, problem)
+                continue
+            key = dedupe_key(record)
+            if key in seen:
+                result.duplicates += 1
+                continue
+            seen.add(key)
+            yield record
+
+    # Nothing else may write for this user between the duplicate check
+    # and the batch write
+    with user_locks.hold(user_id):
+        seen = {dedupe_key(r) for r in store.iter_rows(user_id)}
+        result.imported = store.add_many(user_id, records(seen))
+    return result
+
+
+def result_text(result):
+    lines = [
+        "📥 Import finished",
+        f"✅ Imported: {result.imported}",
+        f"🔁 Duplicates: {result.duplicates}",
+        f"⚠️ Skipped: {result.skipped}",
+    ]
+    if result.problems:
+        lines += [""] + result.problems
+    return "\n".join(lines)
@@ -0,0 +1,97 @@
+import os
+import threading
+import traceback
+from collections import deque
+
+# Aho-Corasick automaton: every keyword occurring anywhere in a text
+# (substring semantics, same as `kw in text`) in one pass over the text,
+# however many keywords there are.
+
+
+class AhoCorasick:
+
+    def __init__(self, words):
+        self.words = sorted({w for w in words if w})
+
+        goto = [{}]
+        out = [()]
+        for word in self.words:
+            state = 0
+            for ch in word:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                state = nxt
+            out[state] = (word,)
+
+        # Fail links (BFS), then fold them into a full transition table so
+        # matching is one dict lookup per character
+        fail = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = deque()
+        for nxt in goto[0].values():
+            queue.append(nxt)
+
+        while queue:
+            state = queue.popleft()
+            f = fail[state]
+            out[state] = out[state] + out[f]
+            delta[state] = {**delta[f], **goto[state]}
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[f].get(ch, 0) if state else 0
+                queue.append(nxt)
+
+        self._delta = delta
+        self._out = out
+
+    def find(self, text):
+        # → set of keywords that occur in text
+        delta, out = self._delta, self._out
+        found = set()
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+class FileWatcher:
+    # Polls a file's mtime and calls on_change(path) when it changes
+
+    def __init__(self, path, on_change, interval=10):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self._mtime = self._current_mtime()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _current_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="keyword-watcher", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            mtime = self._current_mtime()
+            if mtime is None or mtime == self._mtime:
+                continue
+            self._mtime = mtime
+            try:
+                self.on_change(self.path)
+            except Exception:
+                # Keep serving the previous tables on a bad edit
+                traceback.print_exc()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,111 @@
+import os
+import asyncio
+import threading
+from contextlib import contextmanager, asynccontextmanager
+
+# Per-user locks shared by storage (the user's expense files / rows) and
+# conversation state, so every read-modify-write for one user runs one at a
+# time while different users run fully in parallel.
+#
+#   with user_locks.hold(user_id):
+#       ...
+#
+# Locks live in LOCK_SHARDS tables, each behind its own small guard, so
+# threads for unrelated users don't even contend on the bookkeeping. A
+# user's lock exists only while someone holds or waits for it (memory stays
+# bounded by the number of threads, not the number of users). Reentrant:
+# a handler holding its user's lock can call storage, which takes it again.
+
+LOCK_SHARDS = int(os.getenv("LOCK_SHARDS", "64"))
+
+
+class LockManager:
+
+    def __init__(self, shards=LOCK_SHARDS):
+        self._shards = [(threading.Lock(), {}) for _ in range(max(1, shards))]
+        self.acquired = 0
+        self.contended = 0   # acquisitions that had to wait for another thread
+
+    def _shard(self, key):
+        return self._shards[hash(key) % len(self._shards)]
+
+    @contextmanager
+    def hold(self, key):
+        # int chat ids and str user ids name the same user
+        key = str(key)
+        guard, table = self._shard(key)
+        with guard:
+            slot = table.get(key)
+            if slot is None:
+                slot = table[key] = [threading.RLock(), 0]
+            slot[1] += 1
+
+        lock = slot[0]
+        try:
+            if not lock.acquire(blocking=False):
+                self.contended += 1
+                lock.acquire()
+            self.acquired += 1
+            try:
+                yield
+            finally:
+                lock.release()
+        finally:
+            with guard:
+                slot[1] -= 1
+                if slot[1] == 0:
+                    del table[key]
+
+    def stats(self):
+        held = 0
+        for guard, table in self._shards:
+            with guard:
+                held += len(table)
+        return {
+            "held": held,
+            "acquired": self.acquired,
+            "contended": self.contended,
+        }
+
+
+class AsyncLockManager:
+    # The same per-key locking for coroutines on one event loop (async_bot.py):
+    # a handler that awaits between reading and writing a chat's state holds
+    # the chat's asyncio.Lock, so a second update for that chat waits instead
+    # of seeing the same state. Not reentrant.
+
+    def __init__(self):
+        self._locks = {}   # key → [asyncio.Lock, holders + waiters]
+        self.acquired = 0
+        self.contended = 0
+
+    @asynccontextmanager
+    async def hold(self, key):
+        key = str(key)
+        slot = self._locks.get(key)
+        if slot is None:
+            slot = self._locks[key] = [asyncio.Lock(), 0]
+        slot[1] += 1
+
+        lock = slot[0]
+        try:
+            if lock.locked():
+                self.contended += 1
+            async with lock:
+                self.acquired += 1
+                yield
+        finally:
+            slot[1] -= 1
+            if slot[1] == 0:
+                del self._locks[key]
+
+    def stats(self):
+        return {
+            "held": len(self._locks),
+            "acquired": self.acquired,
+            "contended": self.contended,
+        }
+
+
+# One manager for the whole process: storage and conversations must agree
+user_locks = LockManager()
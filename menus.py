@@ -0,0 +1,103 @@
+from telebot import types
+from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+# Keyboards shared by bot.py and async_bot.py
+
+EDIT_FIELDS = ["date", "time", "place", "category", "amount"]
+
+# Answer to an inline button from a step the conversation has left
+EXPIRED_BUTTON_TEXT = "⌛ This button has expired."
+
+
+def main_menu():
+    m = types.ReplyKeyboardMarkup(resize_keyboard=True)
+    m.add("📸 Add by Bill Photo", "✏️ Add Manually")
+    m.add("💰 Total Expense", "📥 Download CSV")
+    m.add("📊 Reports", "📤 Import")
+    m.add("🗑️ Reset Data", "🚫 Cancel")
+    return m
+
+
+def confirm_menu():
+    kb = InlineKeyboardMarkup()
+    kb.add(
+        InlineKeyboardButton("✅ Yes", callback_data="confirm_yes"),
+        InlineKeyboardButton("❌ No", callback_data="confirm_no")
+    )
+    return kb
+
+def edit_menu():
+    kb = InlineKeyboardMarkup()
+    for f in EDIT_FIELDS:
+        kb.add(InlineKeyboardButton(f.capitalize(), callback_data=f"edit_{f}"))
+    return kb
+
+
+def album_menu(count):
+    # One edit button per bill of the album, then "save all"
+    kb = InlineKeyboardMarkup(row_width=5)
+    kb.add(*[InlineKeyboardButton(f"✏️ {n}", callback_data=f"album_edit:{n - 1}") for n in range(1, count + 1)])
+    kb.add(InlineKeyboardButton("✅ Save All", callback_data="album_save"))
+    return kb
+
+
+def cancel_only_menu():
+    return types.ReplyKeyboardMarkup(resize_keyboard=True).add("🚫 Cancel")
+
+
+def date_menu():
+    m = types.ReplyKeyboardMarkup(resize_keyboard=True)
+    m.add("📅 Use Current Date", "✏️ Enter Date Manually")
+    m.add("🚫 Cancel")
+    return m
+
+
+def time_menu():
+    m = types.ReplyKeyboardMarkup(resize_keyboard=True)
+    m.add("🕐 Use Current Time", "✏️ Enter Time Manually")
+    m.add("🚫 Cancel")
+    return m
+
+
+def category_menu():
+    m = types.ReplyKeyboardMarkup(resize_keyboard=True)
+    m.add("🍔 Food", "🚕 Travel", "⛽ Fuel")
+    m.add("🛒 Groceries", "🛍️ Shopping", "🎬 Entertainment")
+    m.add("🏥 Medical", "💡 Utilities", "🎓 Education")
+    m.add("📱 Subscription", "🏨 Hotel", "🧾 Bills")
+    m.add("📦 Other")
+    m.add("🚫 Cancel")
+    return m
+
+
+def export_period_menu():
+    kb = InlineKeyboardMarkup()
+    kb.add(
+        InlineKeyboardButton("📅 This Month", callback_data="export_period:month"),
+        InlineKeyboardButton("🗓️ Last Month", callback_data="export_period:last_month")
+    )
+    kb.add(
+        InlineKeyboardButton("⏳ Last 30 Days", callback_data="export_period:30d"),
+        InlineKeyboardButton("♾️ All Time", callback_data="export_period:all")
+    )
+    return kb
+
+
+def export_format_menu(period):
+    kb = InlineKeyboardMarkup()
+    kb.add(
+        InlineKeyboardButton("📄 CSV", callback_data=f"export:csv:{period}"),
+        InlineKeyboardButton("🗜️ CSV (gzip)", callback_data=f"export:gz:{period}"),
+        InlineKeyboardButton("📊 Excel", callback_data=f"export:xlsx:{period}")
+    )
+    return kb
+
+
+def reports_menu():
+    kb = InlineKeyboardMarkup()
+    kb.add(
+        InlineKeyboardButton("📅 Monthly", callback_data="report:monthly"),
+        InlineKeyboardButton("📁 Categories", callback_data="report:categories"),
+        InlineKeyboardButton("🏪 Top Places", callback_data="report:places")
+    )
+    return kb
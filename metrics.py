@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Counters / histograms / gauges in Prometheus text format on
+# http://METRICS_HOST:METRICS_PORT/metrics (off when METRICS_PORT is unset),
+# plus one JSON trace line per bill with the time spent in each stage.
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+TRACE_LOG = os.getenv("TRACE_LOG", "1") != "0"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+REGISTRY = []
+
+
+def _label_text(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+# ================= METRIC TYPES =================
+
+class Counter:
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+        REGISTRY.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._values = {}   # labels → [bucket counts..., +Inf count, sum]
+        REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 2)
+            row[i] += 1
+            row[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            rows = sorted((k, list(v)) for k, v in self._values.items())
+        for key, row in rows:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), row[:-1]):
+                cumulative += count
+                le = _label_text(self.labels + ("le",), key + (bound,))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _label_text(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {row[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    # Value read when scraped: fn() → number, or {label value: number}
+    # for a gauge with one label
+
+    def __init__(self, name, help, fn, label=None):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.label = label
+        REGISTRY.append(self)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            value = self.fn()
+        except Exception:
+            return lines
+        if self.label:
+            for key, v in sorted(value.items()):
+                lines.append(f"{self.name}{_label_text((self.label,), (key,))} {v}")
+        elif value is not None:
+            lines.append(f"{self.name} {value}")
+        return lines
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ================= BOT METRICS =================
+
+BILLS = Counter("bills_total", "Bill photos handled, by outcome", ["outcome"])
+BILL_SECONDS = Histogram("bill_seconds", "Photo received → reply sent", ["outcome"])
+STAGE_SECONDS = Histogram("bill_stage_seconds", "Time per bill processing stage", ["stage"])
+OCR_FAILURES = Counter("ocr_failures_total", "Bills the OCR / parser could not read")
+BYTES_DOWNLOADED = Counter("telegram_download_bytes_total", "Photo bytes downloaded from Telegram")
+QUEUE_POSITION = Histogram("ocr_queue_position", "Queue position of bills at submit time", buckets=SIZE_BUCKETS)
+STORAGE_SECONDS = Histogram("storage_seconds", "Storage call latency", ["op"])
+TRANSITION_SECONDS = Histogram(
+    "conversation_transition_seconds", "Handler time per conversation transition (state:handler)", ["transition"]
+)
+
+
+# ================= TRACE =================
+
+class Trace:
+    # One per bill; stages are timed into STAGE_SECONDS and logged together
+    # by finish() as a single JSON line
+
+    def __init__(self, kind, **fields):
+        self.kind = kind
+        self.fields = fields
+        self.started = time.monotonic()
+        self.stages = {}
+        self.queued_at = None
+        self.done = False
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0) + seconds
+        STAGE_SECONDS.observe(seconds, stage=stage)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, time.monotonic() - start)
+
+    def queued(self):
+        self.queued_at = time.monotonic()
+
+    def dequeued(self):
+        if self.queued_at is not None:
+            self.add("queue_wait", time.monotonic() - self.queued_at)
+
+    def finish(self, outcome):
+        if self.done:
+            return
+        self.done = True
+        total = time.monotonic() - self.started
+        BILLS.inc(outcome=outcome)
+        BILL_SECONDS.observe(total, outcome=outcome)
+        if TRACE_LOG:
+            record = {"kind": self.kind, "outcome": outcome, "total_ms": round(total * 1000, 1)}
+            record.update(self.fields)
+            record["stages_ms"] = {k: round(v * 1000, 1) for k, v in self.stages.items()}
+            print("🧾 trace " + json.dumps(record, ensure_ascii=False))
+
+
+# ================= HTTP =================
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    print(f"📈 Metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
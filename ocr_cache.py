@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Cache of OCR results (the recognized text) for re-sent bills. Looked up
+# by Telegram's file_unique_id, then by SHA-256 of the image bytes. Memory
+# tier is LRU with TTL; OCR_CACHE_DB adds a SQLite tier that survives
+# restarts.
+#
+# Only OCR output is cached, never the parsed bill: callers parse the text
+# again on every hit (~200µs), so a date / time filled in from the clock
+# and reloaded keyword tables are current.
+#
+# Optional perceptual-hash matching (near-identical re-shot / re-encoded
+# photos) is off by default: receipts with the same layout but different
+# totals hash within a few bits of each other. When turned on with
+# OCR_CACHE_PHASH_DISTANCE > 0 it only matches the same chat's own bills,
+# so a near-miss can never show another user's bill.
+
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", "500"))
+OCR_CACHE_TTL = int(os.getenv("OCR_CACHE_TTL", str(24 * 3600)))
+OCR_CACHE_DB = os.getenv("OCR_CACHE_DB", "")
+OCR_CACHE_PHASH_DISTANCE = int(os.getenv("OCR_CACHE_PHASH_DISTANCE", "0"))   # 0 = off
+
+PHASH_SIZE = 16   # 16x16 difference hash → 256 bits
+
+
+def perceptual_hash(image_bytes):
+    # Difference hash on a 1/8-scale grayscale decode (cheap for JPEGs)
+    import numpy as np
+    import cv2
+
+    img = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if img is None:
+        return None
+    small = cv2.resize(img, (PHASH_SIZE + 1, PHASH_SIZE), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+class CacheKeys:
+
+    def __init__(self, file_unique_id=None, digest=None, phash=None, chat_id=None):
+        self.file_unique_id = file_unique_id
+        self.digest = digest
+        self.phash = phash
+        self.chat_id = chat_id
+
+    @classmethod
+    def for_image(cls, image_bytes, file_unique_id=None, chat_id=None):
+        phash = None
+        if OCR_CACHE_PHASH_DISTANCE > 0 and chat_id is not None:
+            try:
+                phash = perceptual_hash(image_bytes)
+            except Exception:
+                phash = None
+        return cls(file_unique_id, hashlib.sha256(image_bytes).hexdigest(), phash, chat_id)
+
+    @property
+    def near_key(self):
+        # Near-duplicates are only looked for among the same chat's bills
+        return None if self.phash is None else (str(self.chat_id), self.phash)
+
+
+class OcrCache:
+
+    def __init__(self, max_entries=OCR_CACHE_SIZE, ttl=OCR_CACHE_TTL,
+                 db_path=OCR_CACHE_DB, phash_distance=OCR_CACHE_PHASH_DISTANCE):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.phash_distance = phash_distance
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # digest → (expires_at, value, (chat_id, phash) or None)
+        self._file_ids = {}             # file_unique_id → digest
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache ("
+                "key TEXT PRIMARY KEY, digest TEXT NOT NULL, "
+                "value TEXT, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM ocr_cache WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+
+    # ================= MEMORY TIER =================
+
+    def _get_memory(self, digest, now):
+        item = self._entries.get(digest)
+        if item is None:
+            return None
+        if item[0] < now:
+            self._drop(digest)
+            return None
+        self._entries.move_to_end(digest)
+        return item[1]
+
+    def _drop(self, digest):
+        self._entries.pop(digest, None)
+        for fid in [f for f, d in self._file_ids.items() if d == digest]:
+            del self._file_ids[fid]
+
+    def _put_memory(self, digest, value, near_key, expires_at):
+        self._entries[digest] = (expires_at, value, near_key)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _near_duplicate(self, near_key, now):
+        if near_key is None or self.phash_distance <= 0:
+            return None
+        chat_id, phash = near_key
+        for digest, (expires_at, _, other) in self._entries.items():
+            if other is None or other[0] != chat_id or expires_at < now:
+                continue
+            if bin(phash ^ other[1]).count("1") <= self.phash_distance:
+                return digest
+        return None
+
+    # ================= DISK TIER =================
+
+    def _get_disk(self, key, now):
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT k.digest, v.value, v.expires_at FROM ocr_cache k "
+                "JOIN ocr_cache v ON v.key = 'sha:' || k.digest "
+                "WHERE k.key = ? AND k.expires_at >= ?",
+                (key, now)
+            ).fetchone()
+        if row is None:
+            return None
+        digest, value, expires_at = row
+        return digest, json.loads(value), expires_at
+
+    def _put_disk(self, keys, value, expires_at):
+        if self._db is None:
+            return
+        rows = [(f"sha:{keys.digest}", keys.digest, json.dumps(value), expires_at)]
+        if keys.file_unique_id:
+            rows.append((f"fid:{keys.file_unique_id}", keys.digest, None, expires_at))
+        if keys.near_key is not None:
+            rows.append((self._phash_key(keys), keys.digest, None, expires_at))
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO ocr_cache VALUES (?, ?, ?, ?)", rows)
+            self._db.commit()
+
+    @staticmethod
+    def _phash_key(keys):
+        return f"ph:{keys.chat_id}:{keys.phash:x}"
+
+    # ================= API =================
+
+    def get_by_file_id(self, file_unique_id):
+        # Before downloading: Telegram gives the same id to the same file
+        if not file_unique_id:
+            return None
+        now = time.time()
+        with self._lock:
+            digest = self._file_ids.get(file_unique_id)
+            value = self._get_memory(digest, now) if digest else None
+        if value is None:
+            value = self._promote(f"fid:{file_unique_id}", now, file_unique_id)
+        # Misses are counted once, by the content lookup that follows
+        return self._count(value) if value is not None else None
+
+    def get(self, keys):
+        now = time.time()
+        with self._lock:
+            digest = keys.digest
+            value = self._get_memory(digest, now)
+            if value is None:
+                digest = self._near_duplicate(keys.near_key, now)
+                value = self._get_memory(digest, now) if digest else None
+            if value is not None and keys.file_unique_id:
+                self._file_ids[keys.file_unique_id] = digest
+
+        if value is None:
+            value = self._promote(f"sha:{keys.digest}", now, keys.file_unique_id)
+        if value is None and keys.near_key is not None and self.phash_distance > 0:
+            value = self._promote(self._phash_key(keys), now, keys.file_unique_id)
+        return self._count(value)
+
+    def _promote(self, key, now, file_unique_id=None):
+        found = self._get_disk(key, now)
+        if found is None:
+            return None
+        digest, value, expires_at = found
+        with self._lock:
+            self._put_memory(digest, value, None, expires_at)
+            # The next lookup of this file hits the id tier, before downloading
+            if file_unique_id:
+                self._file_ids[file_unique_id] = digest
+        return value
+
+    def _count(self, value):
+        # → the cached OCR text, or None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return "\n".join(value["lines"])
+
+    def put(self, keys, text):
+        value = {"lines": text.split("\n")}
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._put_memory(keys.digest, value, keys.near_key, expires_at)
+            if keys.file_unique_id:
+                self._file_ids[keys.file_unique_id] = keys.digest
+        self._put_disk(keys, value, expires_at)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
@@ -0,0 +1,569 @@
+import os
+import sys
+import time
+import pickle
+import struct
+import queue
+import threading
+import subprocess
+import traceback
+import contextlib
+from concurrent.futures import Future
+
+# OCR engines behind read_bill (flows.py):
+#   process → one worker process per OCR slot, each with its own PaddleOCR
+#             model and its own Paddle/OpenMP thread budget
+#   thread  → a single PaddleOCR model shared by the OCR worker threads;
+#             they decode / preprocess in parallel, predict() one at a time
+#   stub    → no model: the "image" is UTF-8 receipt text (benchmarks / load tests)
+#
+# Run as `python ocr_engine.py --worker N` it is the worker process itself.
+
+OCR_MODE = os.getenv("OCR_MODE", "process")
+OCR_THREADS_PER_WORKER = int(os.getenv("OCR_THREADS_PER_WORKER", "0"))
+OCR_MAX_JOBS_PER_WORKER = int(os.getenv("OCR_MAX_JOBS_PER_WORKER", "500"))
+OCR_MAX_WORKER_RSS_MB = int(os.getenv("OCR_MAX_WORKER_RSS_MB", "2048"))
+
+# Micro-batching: up to OCR_BATCH_SIZE images collected for at most
+# OCR_BATCH_WAIT_MS go through one predict() call (1 = no batching)
+OCR_BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE", "1"))
+OCR_BATCH_WAIT_MS = int(os.getenv("OCR_BATCH_WAIT_MS", "50"))
+OCR_BATCH_REPORT_EVERY = int(os.getenv("OCR_BATCH_REPORT_EVERY", "100"))
+
+# Warm-up inference right after a model loads (optional custom image)
+OCR_WARMUP_IMAGE = os.getenv("OCR_WARMUP_IMAGE", "")
+
+# Simulated model time per predict() call in stub mode
+OCR_STUB_DELAY_MS = float(os.getenv("OCR_STUB_DELAY_MS", "0"))
+WARMUP_LINES = ["SARAVANA STORES", "DATE 01-01-2025 10:30", "TOTAL RS 250.00"]
+
+THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+]
+
+
+# ================= MODEL =================
+
+def build_model(cpu_threads=None):
+    from paddleocr import PaddleOCR
+
+    kwargs = {"use_textline_orientation": True, "lang": "en"}
+    if cpu_threads:
+        kwargs["cpu_threads"] = cpu_threads
+
+    # PaddleOCR (BEST for bills)
+    return PaddleOCR(**kwargs)
+
+
+def decode_image(image_bytes):
+    import numpy as np
+    import cv2
+
+    img = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Unreadable image")
+    return img
+
+
+def collect_text(result):
+    # rec_texts (non-empty, stripped) + matching rec_scores
+    texts, scores = [], []
+    for res in result:
+        if "rec_texts" not in res:
+            continue
+        rec_scores = res["rec_scores"] if "rec_scores" in res else []
+        for i, txt in enumerate(res["rec_texts"]):
+            if txt.strip():
+                texts.append(txt.strip())
+                scores.append(float(rec_scores[i]) if i < len(rec_scores) else None)
+    return texts, scores
+
+
+def run_model(model, images, predict_lock=None):
+    # One predict() call for every image that decodes; per image returns
+    # (texts, scores, timings in ms for decode / each preprocess step / ocr)
+    # or the exception that image failed with. predict_lock, if given, is
+    # held around predict() for a model shared between threads
+    from preprocess import preprocess
+
+    outputs = [None] * len(images)
+    ready, arrays = [], []
+    for i, image_bytes in enumerate(images):
+        try:
+            start = time.perf_counter()
+            img = decode_image(image_bytes)
+            timings = {"decode": (time.perf_counter() - start) * 1000}
+
+            img, step_timings = preprocess(img)
+            timings.update(step_timings)
+        except Exception as e:
+            outputs[i] = RuntimeError(f"{type(e).__name__}: {e}")
+            continue
+        ready.append((i, timings))
+        arrays.append(img)
+
+    if not arrays:
+        return outputs
+
+    with predict_lock or contextlib.nullcontext():
+        start = time.perf_counter()
+        results = list(model.predict(arrays if len(arrays) > 1 else arrays[0]))
+        elapsed = (time.perf_counter() - start) * 1000
+
+    for (i, timings), res in zip(ready, results):
+        timings["ocr"] = elapsed
+        texts, scores = collect_text([res])
+        outputs[i] = (texts, scores, timings)
+    return outputs
+
+
+def _unwrap(output):
+    if isinstance(output, Exception):
+        raise output
+    return output
+
+
+def warmup_image():
+    # Small synthetic receipt shipped with the bot (no file needed)
+    if OCR_WARMUP_IMAGE:
+        with open(OCR_WARMUP_IMAGE, "rb") as f:
+            return f.read()
+
+    import numpy as np
+    import cv2
+
+    img = np.full((80 + 60 * len(WARMUP_LINES), 520, 3), 255, dtype=np.uint8)
+    for i, line in enumerate(WARMUP_LINES):
+        cv2.putText(img, line, (20, 70 + 60 * i), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    ok, buf = cv2.imencode(".png", img)
+    return buf.tobytes()
+
+
+def warm_up_model(model):
+    start = time.perf_counter()
+    try:
+        run_model(model, [warmup_image()])
+    except Exception:
+        traceback.print_exc()
+    return time.perf_counter() - start
+
+
+# ================= ENGINE =================
+
+class Engine:
+    # Models load in the background after start(); recognize() calls made
+    # before that simply wait, so polling never blocks on model load
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.startup_seconds = None
+        self._created = time.monotonic()
+
+    def start(self):
+        threading.Thread(target=self._warm_up_background, name="ocr-warmup", daemon=True).start()
+
+    def _warm_up_background(self):
+        start = time.monotonic()
+        try:
+            self.warm_up()
+        except Exception:
+            traceback.print_exc()
+        self.startup_seconds = time.monotonic() - start
+        self.ready.set()
+        print(f"✅ OCR engine ready in {self.startup_seconds:.1f}s")
+
+    def warm_up(self):
+        raise NotImplementedError
+
+    def recognize(self, image_bytes):
+        return _unwrap(self.recognize_batch([image_bytes])[0])
+
+
+# ================= THREAD MODE =================
+
+class LocalEngine(Engine):
+
+    def __init__(self):
+        super().__init__()
+        self._model = None
+        self._lock = threading.Lock()
+        # PaddleOCR's predictor isn't thread-safe: one call at a time
+        self._predict_lock = threading.Lock()
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                start = time.perf_counter()
+                model = build_model()
+                load = time.perf_counter() - start
+                warm = warm_up_model(model)
+                print(f"🧠 OCR model loaded in {load:.1f}s, warm-up {warm * 1000:.0f}ms")
+                self._model = model
+            return self._model
+
+    def warm_up(self):
+        self._get_model()
+
+    def recognize_batch(self, images):
+        return run_model(self._get_model(), images, self._predict_lock)
+
+    def close(self):
+        pass
+
+
+# ================= STUB MODE =================
+
+class StubEngine(Engine):
+    # Stands in for PaddleOCR where it isn't installed: each image is the
+    # receipt text itself, one OCR line per text line
+
+    def __init__(self, delay_ms=OCR_STUB_DELAY_MS):
+        super().__init__()
+        self.delay_ms = delay_ms
+
+    def warm_up(self):
+        pass
+
+    def recognize_batch(self, images):
+        start = time.perf_counter()
+        if self.delay_ms:
+            time.sleep(self.delay_ms / 1000)
+
+        outputs = []
+        for image_bytes in images:
+            try:
+                text = image_bytes.decode("utf-8")
+            except UnicodeDecodeError as e:
+                outputs.append(RuntimeError(f"{type(e).__name__}: {e}"))
+                continue
+            texts = [l.strip() for l in text.split("\n") if l.strip()]
+            outputs.append((texts, [1.0] * len(texts), {}))
+
+        elapsed = (time.perf_counter() - start) * 1000
+        for output in outputs:
+            if not isinstance(output, Exception):
+                output[2]["ocr"] = elapsed
+        return outputs
+
+    def close(self):
+        pass
+
+
+# ================= PROCESS MODE =================
+
+def _send(stream, obj):
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    stream.write(struct.pack("!I", len(data)) + data)
+    stream.flush()
+
+
+def _recv(stream):
+    header = stream.read(4)
+    if len(header) < 4:
+        raise EOFError("OCR worker pipe closed")
+    (size,) = struct.unpack("!I", header)
+    data = stream.read(size)
+    if len(data) < size:
+        raise EOFError("OCR worker pipe closed")
+    return pickle.loads(data)
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class WorkerProcess:
+    # Parent-side handle for one OCR worker process
+
+    def __init__(self, threads, max_jobs=OCR_MAX_JOBS_PER_WORKER, max_rss_mb=OCR_MAX_WORKER_RSS_MB):
+        self.threads = threads
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.proc = None
+        self.jobs = 0
+        self.starts = 0
+        self._lock = threading.Lock()
+
+    def _start(self):
+        env = dict(os.environ)
+        for var in THREAD_ENV_VARS:
+            env[var] = str(self.threads)
+
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--worker", str(self.threads)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=env
+        )
+        self.jobs = 0
+        self.starts += 1
+
+        status, pid, load, warm = _recv(self.proc.stdout)
+        print(f"🧠 OCR worker {pid} ready ({self.threads} threads): load {load:.1f}s, warm-up {warm * 1000:.0f}ms")
+
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def ensure_started(self):
+        with self._lock:
+            self._ensure_started()
+
+    def _ensure_started(self):
+        if not self.alive():
+            self._start()
+
+    def recognize_batch(self, images):
+        with self._lock:
+            self._ensure_started()
+            return self._recognize(images)
+
+    def _recognize(self, images):
+        try:
+            _send(self.proc.stdin, images)
+            reply = _recv(self.proc.stdout)
+        except (EOFError, OSError):
+            self.stop()
+            raise RuntimeError("OCR worker died while processing")
+
+        self.jobs += len(images)
+        status, payload, rss = reply
+
+        # Recycle to contain leaks; ProcessEngine restarts it in the background
+        if self.jobs >= self.max_jobs or rss >= self.max_rss_mb:
+            print(f"♻️ Recycling OCR worker {self.proc.pid} after {self.jobs} jobs ({rss:.0f} MB)")
+            self.stop()
+
+        if status == "error":
+            raise RuntimeError(payload)
+        return payload
+
+    def stop(self):
+        if self.proc is None:
+            return
+        try:
+            _send(self.proc.stdin, None)
+            self.proc.wait(timeout=10)
+        except Exception:
+            self.proc.kill()
+            self.proc.wait()
+        self.proc = None
+
+
+class ProcessEngine(Engine):
+    # Fixed set of worker processes; a call checks one out for its duration
+
+    def __init__(self, workers, threads_per_worker=OCR_THREADS_PER_WORKER):
+        super().__init__()
+        self.threads = threads_per_worker or max(1, (os.cpu_count() or 1) // max(1, workers))
+        self._procs = [WorkerProcess(self.threads) for _ in range(max(1, workers))]
+        self._idle = queue.Queue()
+        for proc in self._procs:
+            self._idle.put(proc)
+
+    def warm_up(self):
+        # Workers load + warm up their models in parallel
+        threads = [threading.Thread(target=proc.ensure_started, daemon=True) for proc in self._procs]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def recognize_batch(self, images):
+        proc = self._idle.get()
+        try:
+            return proc.recognize_batch(images)
+        finally:
+            if proc.alive():
+                self._idle.put(proc)
+            else:
+                # Recycled or crashed → back in rotation once its replacement is warm
+                threading.Thread(target=self._restart, args=(proc,), daemon=True).start()
+
+    def _restart(self, proc):
+        try:
+            proc.ensure_started()
+        except Exception:
+            traceback.print_exc()
+        finally:
+            self._idle.put(proc)
+
+    def close(self):
+        for proc in self._procs:
+            proc.stop()
+
+
+# ================= MICRO-BATCHING =================
+
+class OcrBatcher:
+    # recognize() callers block while a dispatcher thread (one per engine
+    # slot) gathers their images into a batch and fans the results back
+
+    def __init__(self, engine, slots, max_batch=OCR_BATCH_SIZE, max_wait_ms=OCR_BATCH_WAIT_MS,
+                 report_every=OCR_BATCH_REPORT_EVERY):
+        self.engine = engine
+        self.ready = engine.ready
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self.report_every = report_every
+
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._started = time.monotonic()
+        self.batches = 0
+        self.images = 0
+        self.wait_seconds = 0.0
+        self.max_batch_seen = 0
+
+        self._threads = [
+            threading.Thread(target=self._dispatch_loop, name=f"ocr-batch-{i}", daemon=True)
+            for i in range(max(1, slots))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def start(self):
+        self.engine.start()
+
+    @property
+    def startup_seconds(self):
+        return self.engine.startup_seconds
+
+    def recognize(self, image_bytes):
+        future = Future()
+        self._queue.put((time.monotonic(), image_bytes, future))
+        return future.result()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = first[0] + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _dispatch_loop(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+
+            now = time.monotonic()
+            try:
+                outputs = self.engine.recognize_batch([image for _, image, _ in batch])
+            except Exception as e:
+                outputs = [e] * len(batch)
+
+            for (_, _, future), output in zip(batch, outputs):
+                if isinstance(output, Exception):
+                    future.set_exception(output)
+                else:
+                    future.set_result(output)
+
+            self._record(len(batch), sum(now - queued for queued, _, _ in batch))
+
+    def _record(self, size, waited):
+        with self._stats_lock:
+            self.batches += 1
+            self.images += size
+            self.wait_seconds += waited
+            self.max_batch_seen = max(self.max_batch_seen, size)
+            report = self.report_every and self.batches % self.report_every == 0
+        if report:
+            s = self.stats()
+            print(
+                f"📦 OCR batches: {s['batches']} | avg size {s['avg_batch_size']:.2f} "
+                f"(max {s['max_batch_size']}) | avg wait {s['avg_wait_ms']:.0f}ms | "
+                f"{s['images_per_second']:.2f} img/s"
+            )
+
+    def stats(self):
+        with self._stats_lock:
+            elapsed = time.monotonic() - self._started
+            return {
+                "batches": self.batches,
+                "images": self.images,
+                "avg_batch_size": self.images / self.batches if self.batches else 0.0,
+                "max_batch_size": self.max_batch_seen,
+                "avg_wait_ms": self.wait_seconds / self.images * 1000 if self.images else 0.0,
+                "images_per_second": self.images / elapsed if elapsed > 0 else 0.0,
+            }
+
+    def close(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join(timeout=10)
+        self.engine.close()
+
+
+def create_engine(workers, mode=None, batch_size=OCR_BATCH_SIZE):
+    mode = mode or OCR_MODE
+    if mode == "process":
+        engine = ProcessEngine(workers)
+    elif mode == "thread":
+        engine = LocalEngine()
+    elif mode == "stub":
+        engine = StubEngine()
+    else:
+        raise ValueError(f"Unknown OCR_MODE: {mode}")
+
+    if batch_size > 1:
+        return OcrBatcher(engine, workers, max_batch=batch_size)
+    return engine
+
+
+# ================= WORKER PROCESS =================
+
+def worker_main(threads):
+    # Keep the protocol on the real stdout; Paddle's own logging goes to stderr
+    proto_out = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)
+    proto_in = sys.stdin.buffer
+
+    start = time.perf_counter()
+    model = build_model(cpu_threads=threads)
+    load = time.perf_counter() - start
+    warm = warm_up_model(model)
+    _send(proto_out, ("ready", os.getpid(), load, warm))
+
+    while True:
+        try:
+            images = _recv(proto_in)
+        except EOFError:
+            break
+        if images is None:
+            break
+
+        try:
+            _send(proto_out, ("ok", run_model(model, images), _rss_mb()))
+        except Exception as e:
+            traceback.print_exc()
+            _send(proto_out, ("error", f"{type(e).__name__}: {e}", _rss_mb()))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--worker":
+        worker_main(int(sys.argv[2]))
+    else:
+        print("usage: python ocr_engine.py --worker THREADS")
@@ -0,0 +1,119 @@
+import os
+import time
+
+import cv2
+
+# Image preprocessing before PaddleOCR. Phone photos are often 3000-4000px
+# on the long edge; OCR time grows with pixel count, so shrinking and
+# cropping to the receipt is where most of the latency win comes from.
+#
+# Each step can be switched off on its own (PREPROCESS_<STEP>=0).
+
+PREPROCESS_DOWNSCALE = os.getenv("PREPROCESS_DOWNSCALE", "1") != "0"
+PREPROCESS_MAX_SIDE = int(os.getenv("PREPROCESS_MAX_SIDE", "1600"))
+PREPROCESS_CROP = os.getenv("PREPROCESS_CROP", "1") != "0"
+PREPROCESS_DESKEW = os.getenv("PREPROCESS_DESKEW", "1") != "0"
+PREPROCESS_COLOR = os.getenv("PREPROCESS_COLOR", "color")   # color | gray | threshold
+
+# Receipt crop only when the detected region is a plausible part of the frame
+CROP_MIN_AREA = 0.15
+CROP_MAX_AREA = 0.95
+CROP_MARGIN = 0.02
+
+# Small skews only; PaddleOCR's textline orientation handles the rest
+DESKEW_MIN_ANGLE = 0.5
+DESKEW_MAX_ANGLE = 15
+
+
+# ================= STEPS =================
+
+def downscale(img, max_side=PREPROCESS_MAX_SIDE):
+    h, w = img.shape[:2]
+    longest = max(h, w)
+    if longest <= max_side:
+        return img
+    scale = max_side / longest
+    return cv2.resize(img, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+
+
+def crop_receipt(img):
+    # Receipt paper is usually the largest bright region in the photo
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    blur = cv2.GaussianBlur(gray, (5, 5), 0)
+    _, mask = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (25, 25)))
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return img
+
+    h, w = img.shape[:2]
+    x, y, cw, ch = cv2.boundingRect(max(contours, key=cv2.contourArea))
+    if not CROP_MIN_AREA <= (cw * ch) / (w * h) <= CROP_MAX_AREA:
+        return img
+
+    mx, my = round(w * CROP_MARGIN), round(h * CROP_MARGIN)
+    return img[max(0, y - my):min(h, y + ch + my), max(0, x - mx):min(w, x + cw + mx)]
+
+
+def deskew(img):
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    coords = cv2.findNonZero(ink)
+    if coords is None:
+        return img
+
+    # minAreaRect angles are in (0, 90] on OpenCV 4.5+ but [-90, 0) on
+    # older and 5.x builds: bring either into (-45, 45]
+    angle = cv2.minAreaRect(coords)[-1]
+    if angle > 45:
+        angle -= 90
+    elif angle <= -45:
+        angle += 90
+    if not DESKEW_MIN_ANGLE <= abs(angle) <= DESKEW_MAX_ANGLE:
+        return img
+
+    h, w = img.shape[:2]
+    m = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    return cv2.warpAffine(img, m, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+def to_gray(img):
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+
+def to_threshold(img):
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    bw = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 15)
+    return cv2.cvtColor(bw, cv2.COLOR_GRAY2BGR)
+
+
+def enabled_steps():
+    steps = []
+    if PREPROCESS_DOWNSCALE:
+        steps.append(("downscale", downscale))
+    if PREPROCESS_CROP:
+        steps.append(("crop", crop_receipt))
+    if PREPROCESS_DESKEW:
+        steps.append(("deskew", deskew))
+    if PREPROCESS_COLOR == "gray":
+        steps.append(("gray", to_gray))
+    elif PREPROCESS_COLOR == "threshold":
+        steps.append(("threshold", to_threshold))
+    return steps
+
+
+STEPS = enabled_steps()
+
+
+# ================= PIPELINE =================
+
+def preprocess(img, steps=None):
+    # Returns the processed image and per-step timings in milliseconds
+    timings = {}
+    for name, step in (STEPS if steps is None else steps):
+        start = time.perf_counter()
+        img = step(img)
+        timings[name] = (time.perf_counter() - start) * 1000
+    return img, timings
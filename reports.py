@@ -0,0 +1,120 @@
+import io
+from datetime import datetime
+
+# Summary reports (monthly totals, category breakdown, top merchants) built
+# from the per-user rollups in Storage.summary(), so they cost the same
+# however long the history is. Charts are PNG bar charts drawn with Pillow.
+
+REPORT_MONTHS = 6
+REPORT_TOP = 8
+
+CHART_WIDTH = 720
+CHART_ROW = 44
+CHART_PAD = 24
+CHART_LABEL = 190
+BAR_COLORS = {
+    "monthly": (66, 133, 244),
+    "categories": (52, 168, 83),
+    "places": (251, 140, 0),
+}
+
+
+def month_label(month):
+    try:
+        return datetime.strptime(month, "%Y-%m").strftime("%b %Y")
+    except ValueError:
+        return month.title()
+
+
+def money(amount):
+    return f"{amount:,.2f}"
+
+
+# ================= ROLLUPS → ROWS =================
+
+def monthly_rows(summary, months=REPORT_MONTHS):
+    dated = sorted(m for m in summary["by_month"] if m != "unknown")
+    return [(month_label(m), summary["by_month"][m]) for m in dated[-months:]]
+
+
+def category_rows(summary, top=REPORT_TOP):
+    rows = sorted(summary["by_category"].items(), key=lambda kv: kv[1], reverse=True)
+    return [(c or "Other", v) for c, v in rows[:top]]
+
+
+def place_rows(summary, top=REPORT_TOP):
+    rows = sorted(summary.get("by_place", {}).items(), key=lambda kv: kv[1], reverse=True)
+    return [(p.title() if p else "Unknown", v) for p, v in rows[:top]]
+
+
+REPORTS = {
+    "monthly": ("📅 Monthly Totals", monthly_rows),
+    "categories": ("📁 Spending by Category", category_rows),
+    "places": ("🏪 Top Places", place_rows),
+}
+
+
+def report_text(kind, summary, rows):
+    title = REPORTS[kind][0]
+    lines = [title, ""]
+    total = summary["total"] or 1
+    for label, amount in rows:
+        share = f" ({amount / total:.0%})" if kind != "monthly" else ""
+        lines.append(f"{label}: ₹{money(amount)}{share}")
+    lines += ["", f"💰 Total: ₹{money(summary['total'])} over {summary['count']} expense(s)"]
+    return "\n".join(lines)
+
+
+# ================= CHART =================
+
+def _font(size):
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1: fixed-size bitmap font only
+        return ImageFont.load_default()
+
+
+def bar_chart(title, rows, color=(66, 133, 244)):
+    # Horizontal bars, one row per item → PNG in a BytesIO
+    from PIL import Image, ImageDraw
+
+    height = CHART_PAD * 3 + 30 + CHART_ROW * len(rows)
+    img = Image.new("RGB", (CHART_WIDTH, height), "white")
+    draw = ImageDraw.Draw(img)
+    title_font, font = _font(22), _font(16)
+
+    draw.text((CHART_PAD, CHART_PAD), title, fill=(33, 33, 33), font=title_font)
+
+    top = CHART_PAD * 2 + 30
+    bar_left = CHART_PAD + CHART_LABEL
+    bar_space = CHART_WIDTH - bar_left - CHART_PAD - 110
+    largest = max((v for _, v in rows), default=0) or 1
+
+    for i, (label, value) in enumerate(rows):
+        y = top + i * CHART_ROW
+        draw.text((CHART_PAD, y + 10), label[:22], fill=(66, 66, 66), font=font)
+        width = max(2, round(bar_space * value / largest))
+        draw.rectangle([bar_left, y + 6, bar_left + width, y + CHART_ROW - 10], fill=color)
+        draw.text((bar_left + width + 8, y + 10), f"Rs {money(value)}", fill=(66, 66, 66), font=font)
+
+    buf = io.BytesIO()
+    img.save(buf, "PNG", optimize=True)
+    buf.seek(0)
+    return buf
+
+
+def build_report(kind, summary):
+    # → (caption text, PNG BytesIO or None if the chart can't be drawn)
+    title, rows_fn = REPORTS[kind]
+    rows = rows_fn(summary)
+    text = report_text(kind, summary, rows)
+    try:
+        # Emoji aren't in Pillow's built-in font
+        chart = bar_chart(title.split(" ", 1)[1], rows, BAR_COLORS[kind])
+    except Exception as e:
+        print(f"⚠️ Report chart failed: {type(e).__name__}: {e}")
+        chart = None
+    return text, chart
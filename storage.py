@@ -0,0 +1,804 @@
+import os
+import json
+import queue
+import sqlite3
+import argparse
+import functools
+import threading
+import traceback
+from datetime import datetime
+
+from locks import user_locks
+
+# Pluggable expense storage behind add_expense / get_total_expense / reset_data.
+#   jsonl  → append-only log, one JSON object per line in user_data/<user_id>.jsonl
+#   sqlite → single WAL-mode database with indexed expenses table
+#   columnar → memory-mapped NumPy records in user_data/columnar/ (columnar.py)
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "jsonl")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "")
+
+LOG_FSYNC = os.getenv("LOG_FSYNC", "1") != "0"
+COMPACT_THRESHOLD = int(os.getenv("LOG_COMPACT_THRESHOLD", "1"))
+
+DATE_FORMATS = ["%d-%m-%Y", "%d/%m/%Y", "%d-%m-%y", "%d/%m/%y", "%Y-%m-%d"]
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_date(date):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    return None
+
+
+def normalize_date(date):
+    # "DD-MM-YYYY" (and the OCR variants) → "YYYY-MM-DD", None if unparseable.
+    # Cached: histories and imports repeat the same few hundred dates
+    return _parse_date((date or "").strip())
+
+
+def month_key(date):
+    day = normalize_date(date)
+    return day[:7] if day else "unknown"
+
+
+def in_range(record, start=None, end=None):
+    # start / end are "YYYY-MM-DD", inclusive; undated rows only match no range
+    if not start and not end:
+        return True
+    day = normalize_date(record.get("date"))
+    return day is not None and (not start or day >= start) and (not end or day <= end)
+
+
+def place_key(place):
+    # Merchants grouped case / spacing-insensitively ("KFC " == "kfc")
+    return (place or "").strip().lower()
+
+
+# ================= AGGREGATES =================
+# Running per-user totals kept next to the raw expenses so "💰 Total Expense",
+# the CSV footer and the reports don't have to re-read the whole history.
+
+def empty_summary():
+    return {"total": 0, "count": 0, "by_category": {}, "by_month": {}, "by_place": {}}
+
+
+def apply_to_summary(summary, record):
+    amount = float(record["amount"])
+    category = record.get("category", "")
+    month = month_key(record.get("date"))
+    place = place_key(record.get("place"))
+
+    summary["total"] += amount
+    summary["count"] += 1
+    summary["by_category"][category] = summary["by_category"].get(category, 0) + amount
+    summary["by_month"][month] = summary["by_month"].get(month, 0) + amount
+    summary["by_place"][place] = summary["by_place"].get(place, 0) + amount
+    return summary
+
+
+def _fsync_dir(folder):
+    try:
+        fd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _atomic_write_lines(path, records):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for r in records:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(os.path.dirname(path) or ".")
+
+
+def _atomic_write_json(path, obj):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _read_json_records(path):
+    # Legacy <user_id>.json (one list) or <user_id>.jsonl (one object per line)
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".json"):
+            yield from json.load(f)
+            return
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+class Storage:
+
+    legacy_folder = None   # JSON files to import once on start-up (migrate_all)
+
+    def _lock(self, user_id):
+        # Shared with conversation state (locks.py): one user at a time
+        return user_locks.hold(user_id)
+
+    def load(self, user_id):
+        return list(self.iter_rows(user_id))
+
+    def iter_rows(self, user_id, start=None, end=None):
+        raise NotImplementedError
+
+    def add(self, user_id, record):
+        raise NotImplementedError
+
+    def add_many(self, user_id, records):
+        # records may be a generator; backends write it as one batch.
+        # → number of records written
+        count = 0
+        with self._lock(user_id):
+            for record in records:
+                self.add(user_id, record)
+                count += 1
+        return count
+
+    def reset(self, user_id):
+        raise NotImplementedError
+
+    def summary(self, user_id):
+        summary = empty_summary()
+        for r in self.iter_rows(user_id):
+            apply_to_summary(summary, r)
+        return summary
+
+    def rebuild(self, user_id):
+        return self.summary(user_id)
+
+    def total(self, user_id):
+        return self.summary(user_id)["total"]
+
+    def users(self):
+        return []
+
+    # ================= MIGRATION =================
+
+    def import_json(self, folder):
+        # Import <user_id>.json / <user_id>.jsonl files, each as one add_many
+        # batch; imported files are renamed to *.imported so a restart
+        # doesn't import them twice
+        imported = {}
+        for name in sorted(os.listdir(folder)):
+            stem, ext = os.path.splitext(name)
+            if ext not in (".json", ".jsonl") or not stem.lstrip("-").isdigit():
+                continue
+
+            path = os.path.join(folder, name)
+            user_id = int(stem)
+            count = self.add_many(user_id, _read_json_records(path))
+            os.replace(path, path + ".imported")
+            imported[user_id] = imported.get(user_id, 0) + count
+        return imported
+
+    def migrate_all(self):
+        if not self.legacy_folder:
+            return 0
+        return len(self.import_json(self.legacy_folder))
+
+    def close(self):
+        pass
+
+
+class JsonlStorage(Storage):
+
+    def __init__(self, folder, fsync=LOG_FSYNC, compact_threshold=COMPACT_THRESHOLD):
+        self.folder = folder
+        self.fsync = fsync
+        self.compact_threshold = compact_threshold
+        os.makedirs(folder, exist_ok=True)
+
+        self._compact_guard = threading.Lock()
+        self._compact_queue = queue.Queue()
+        self._compact_pending = set()
+        self._compactor = threading.Thread(target=self._compact_loop, daemon=True)
+        self._compactor.start()
+
+    # ================= PATHS =================
+
+    def log_path(self, user_id):
+        return os.path.join(self.folder, f"{user_id}.jsonl")
+
+    def legacy_path(self, user_id):
+        return os.path.join(self.folder, f"{user_id}.json")
+
+    def agg_path(self, user_id):
+        return os.path.join(self.folder, f"{user_id}.agg.json")
+
+    # ================= MIGRATION =================
+
+    def migrate(self, user_id):
+        # One-time move of <user_id>.json (full JSON list) to the JSONL log
+        legacy = self.legacy_path(user_id)
+        if not os.path.exists(legacy):
+            return False
+
+        with self._lock(user_id):
+            if not os.path.exists(legacy):
+                return False
+            if os.path.exists(self.log_path(user_id)):
+                # Log already written (crash after rename) → legacy file is stale
+                os.remove(legacy)
+                return False
+
+            with open(legacy, "r") as f:
+                data = json.load(f)
+            _atomic_write_lines(self.log_path(user_id), data)
+            os.remove(legacy)
+            return True
+
+    def migrate_all(self):
+        migrated = 0
+        for name in os.listdir(self.folder):
+            if name.endswith(".json") and not name.endswith(".agg.json"):
+                if self.migrate(name[:-len(".json")]):
+                    migrated += 1
+        return migrated
+
+    # ================= READ / WRITE =================
+
+    def _read(self, user_id):
+        path = self.log_path(user_id)
+        records, bad = [], 0
+        if not os.path.exists(path):
+            return records, bad
+
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # Torn write from a crash → skipped, fixed by compaction
+                    bad += 1
+        return records, bad
+
+    def load(self, user_id):
+        self.migrate(user_id)
+        with self._lock(user_id):
+            records, bad = self._read(user_id)
+        if bad >= self.compact_threshold:
+            self.schedule_compaction(user_id)
+        return records
+
+    def iter_rows(self, user_id, start=None, end=None):
+        # Streams the log line by line (bounded memory). Only what was on
+        # disk when iteration started is read; later appends aren't.
+        self.migrate(user_id)
+        with self._lock(user_id):
+            try:
+                f = open(self.log_path(user_id), "rb")
+            except FileNotFoundError:
+                return
+            size = os.fstat(f.fileno()).st_size
+
+        bad, pos = 0, 0
+        with f:
+            for line in f:
+                if pos >= size:
+                    break
+                line = line[:size - pos]
+                pos += len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    bad += 1
+                    continue
+                if in_range(record, start, end):
+                    yield record
+        if bad >= self.compact_threshold:
+            self.schedule_compaction(user_id)
+
+    def add(self, user_id, record):
+        self.migrate(user_id)
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+        with self._lock(user_id):
+            path = self.log_path(user_id)
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                size = os.fstat(fd).st_size
+                summary = self._current_summary(user_id, size)
+
+                # A crash mid-append can leave a line without "\n";
+                # start on a fresh line so the new record stays readable
+                if size:
+                    with open(path, "rb") as f:
+                        f.seek(size - 1)
+                        if f.read(1) != b"\n":
+                            line = b"\n" + line
+                os.write(fd, line)
+                if self.fsync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            apply_to_summary(summary, record)
+            summary["log_size"] = size + len(line)
+            _atomic_write_json(self.agg_path(user_id), summary)
+
+    def add_many(self, user_id, records):
+        # One append, one fsync and one rollup write for the whole batch.
+        # If records raises part-way, the log is cut back to where it was.
+        self.migrate(user_id)
+        with self._lock(user_id):
+            path = self.log_path(user_id)
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                size = os.fstat(fd).st_size
+                summary = self._current_summary(user_id, size)
+                written, count, chunk = 0, 0, []
+
+                if size:
+                    with open(path, "rb") as f:
+                        f.seek(size - 1)
+                        if f.read(1) != b"\n":
+                            chunk.append(b"\n")
+                try:
+                    for record in records:
+                        chunk.append((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+                        apply_to_summary(summary, record)
+                        count += 1
+                        if len(chunk) >= 1000:
+                            written += os.write(fd, b"".join(chunk))
+                            chunk = []
+                    if chunk:
+                        written += os.write(fd, b"".join(chunk))
+                    if self.fsync:
+                        os.fsync(fd)
+                except BaseException:
+                    os.ftruncate(fd, size)
+                    raise
+            finally:
+                os.close(fd)
+
+            if count:
+                summary["log_size"] = size + written
+                _atomic_write_json(self.agg_path(user_id), summary)
+            return count
+
+    def reset(self, user_id):
+        with self._lock(user_id):
+            for path in (self.log_path(user_id), self.legacy_path(user_id), self.agg_path(user_id)):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    # ================= AGGREGATES =================
+    # <user_id>.agg.json records the log size it covers; a mismatch
+    # (crash between the two writes, manual edits) triggers a rebuild.
+
+    def _log_size(self, user_id):
+        try:
+            return os.path.getsize(self.log_path(user_id))
+        except OSError:
+            return 0
+
+    def _current_summary(self, user_id, log_size):
+        try:
+            with open(self.agg_path(user_id), "r", encoding="utf-8") as f:
+                summary = json.load(f)
+            # Files written before a rollup existed are rebuilt once
+            if summary.get("log_size") == log_size and "by_place" in summary:
+                return summary
+        except (OSError, ValueError):
+            pass
+        return self._rebuild(user_id)
+
+    def _rebuild(self, user_id):
+        summary = empty_summary()
+        for r in self._read(user_id)[0]:
+            apply_to_summary(summary, r)
+        summary["log_size"] = self._log_size(user_id)
+        if summary["count"]:
+            _atomic_write_json(self.agg_path(user_id), summary)
+        return summary
+
+    @staticmethod
+    def _public(summary):
+        # log_size is the rollup file's own bookkeeping, not part of the summary
+        summary.pop("log_size", None)
+        return summary
+
+    def summary(self, user_id):
+        self.migrate(user_id)
+        with self._lock(user_id):
+            return self._public(self._current_summary(user_id, self._log_size(user_id)))
+
+    def rebuild(self, user_id):
+        self.migrate(user_id)
+        with self._lock(user_id):
+            return self._public(self._rebuild(user_id))
+
+    def users(self):
+        return [name[:-len(".jsonl")] for name in os.listdir(self.folder) if name.endswith(".jsonl")]
+
+    # ================= COMPACTION =================
+
+    def compact(self, user_id):
+        # Rewrite the log without damaged lines (tmp file + fsync + atomic rename)
+        with self._lock(user_id):
+            records, bad = self._read(user_id)
+            if bad:
+                _atomic_write_lines(self.log_path(user_id), records)
+                self._rebuild(user_id)
+            return bad
+
+    def schedule_compaction(self, user_id):
+        with self._compact_guard:
+            if user_id in self._compact_pending:
+                return
+            self._compact_pending.add(user_id)
+        self._compact_queue.put(user_id)
+
+    def _compact_loop(self):
+        while True:
+            user_id = self._compact_queue.get()
+            if user_id is None:
+                return
+            try:
+                self.compact(user_id)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                with self._compact_guard:
+                    self._compact_pending.discard(user_id)
+
+    def close(self):
+        self._compact_queue.put(None)
+        self._compactor.join(timeout=5)
+
+
+# ================= SQLITE =================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS expenses (
+    id       INTEGER PRIMARY KEY,
+    user_id  INTEGER NOT NULL,
+    date     TEXT NOT NULL DEFAULT '',
+    time     TEXT NOT NULL DEFAULT '',
+    day      TEXT,
+    place    TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL DEFAULT '',
+    amount   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_expenses_user_day ON expenses (user_id, day);
+CREATE INDEX IF NOT EXISTS idx_expenses_user_category ON expenses (user_id, category);
+
+CREATE TABLE IF NOT EXISTS user_totals (
+    user_id INTEGER PRIMARY KEY,
+    total   REAL NOT NULL,
+    count   INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS category_totals (
+    user_id  INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    total    REAL NOT NULL,
+    count    INTEGER NOT NULL,
+    PRIMARY KEY (user_id, category)
+);
+CREATE TABLE IF NOT EXISTS month_totals (
+    user_id INTEGER NOT NULL,
+    month   TEXT NOT NULL,
+    total   REAL NOT NULL,
+    count   INTEGER NOT NULL,
+    PRIMARY KEY (user_id, month)
+);
+CREATE TABLE IF NOT EXISTS place_totals (
+    user_id INTEGER NOT NULL,
+    place   TEXT NOT NULL,
+    total   REAL NOT NULL,
+    count   INTEGER NOT NULL,
+    PRIMARY KEY (user_id, place)
+);
+"""
+
+INSERT_EXPENSE = (
+    "INSERT INTO expenses (user_id, date, time, day, place, category, amount) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+AGGREGATE_TABLES = {
+    "user_totals": None,
+    "category_totals": "category",
+    "month_totals": "month",
+    "place_totals": "place",
+}
+
+MONTH_SQL = "COALESCE(substr(day, 1, 7), 'unknown')"
+PLACE_SQL = "place_key(place)"   # storage.place_key, registered per connection
+
+
+class SqliteStorage(Storage):
+
+    def __init__(self, path, legacy_folder=None):
+        self.path = path
+        self.legacy_folder = legacy_folder
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        # One connection per worker thread, reused across requests
+        self._local = threading.local()
+        self._conns = []
+        self._conns_guard = threading.Lock()
+
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+            self._backfill_places(conn)
+
+    def _backfill_places(self, conn):
+        # place_totals is newer than the other rollups; fill it once for
+        # databases created before it existed
+        if conn.execute("SELECT 1 FROM place_totals LIMIT 1").fetchone():
+            return
+        conn.execute(
+            f"INSERT INTO place_totals (user_id, place, total, count) "
+            f"SELECT user_id, {PLACE_SQL}, SUM(amount), COUNT(*) FROM expenses "
+            f"GROUP BY user_id, {PLACE_SQL}"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.create_function("place_key", 1, place_key, deterministic=True)
+            self._local.conn = conn
+            with self._conns_guard:
+                self._conns.append(conn)
+        return conn
+
+    @staticmethod
+    def _row(record):
+        return (
+            record.get("date", ""),
+            record.get("time", ""),
+            normalize_date(record.get("date")),
+            record.get("place", ""),
+            record.get("category", ""),
+            float(record["amount"]),
+        )
+
+    def iter_rows(self, user_id, start=None, end=None):
+        sql = "SELECT date, time, place, category, amount FROM expenses WHERE user_id = ?"
+        params = [user_id]
+        # Date range uses the (user_id, day) index
+        if start:
+            sql += " AND day >= ?"
+            params.append(start)
+        if end:
+            sql += " AND day <= ?"
+            params.append(end)
+        cur = self._conn().execute(sql + " ORDER BY id", params)
+        for date, time, place, category, amount in cur:
+            yield {
+                "date": date,
+                "time": time,
+                "place": place,
+                "category": category,
+                "amount": amount
+            }
+
+    def add(self, user_id, record):
+        row = (user_id,) + self._row(record)
+        amount = row[-1]
+        month = row[3][:7] if row[3] else "unknown"
+
+        # Expense row and aggregates commit in one transaction
+        with self._lock(user_id), self._conn() as conn:
+            conn.execute(INSERT_EXPENSE, row)
+            conn.execute(
+                "INSERT INTO user_totals (user_id, total, count) VALUES (?, ?, 1) "
+                "ON CONFLICT (user_id) DO UPDATE SET "
+                "total = total + excluded.total, count = count + 1",
+                (user_id, amount)
+            )
+            conn.execute(
+                "INSERT INTO category_totals (user_id, category, total, count) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT (user_id, category) DO UPDATE SET "
+                "total = total + excluded.total, count = count + 1",
+                (user_id, row[5], amount)
+            )
+            conn.execute(
+                "INSERT INTO month_totals (user_id, month, total, count) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT (user_id, month) DO UPDATE SET "
+                "total = total + excluded.total, count = count + 1",
+                (user_id, month, amount)
+            )
+            conn.execute(
+                "INSERT INTO place_totals (user_id, place, total, count) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT (user_id, place) DO UPDATE SET "
+                "total = total + excluded.total, count = count + 1",
+                (user_id, place_key(row[4]), amount)
+            )
+
+    def add_many(self, user_id, records):
+        # Rows stream from records straight into one transaction, and the
+        # rollup deltas add up as they pass: memory stays flat however many
+        # rows there are. records must be local by now (a spooled upload, an
+        # album, a migration file), since the write lock is held while it's read
+        deltas = {table: {} for table in AGGREGATE_TABLES}
+        count = 0
+
+        def prepare(record):
+            nonlocal count
+            row = (user_id,) + self._row(record)
+            keys = {
+                "user_totals": None,
+                "category_totals": row[5],
+                "month_totals": row[3][:7] if row[3] else "unknown",
+                "place_totals": place_key(row[4]),
+            }
+            for table, key in keys.items():
+                total, n = deltas[table].get(key, (0, 0))
+                deltas[table][key] = (total + row[-1], n + 1)
+            count += 1
+            return row
+
+        with self._lock(user_id), self._conn() as conn:
+            conn.executemany(INSERT_EXPENSE, (prepare(record) for record in records))
+            for table, column in AGGREGATE_TABLES.items():
+                if column is None:
+                    conn.executemany(
+                        f"INSERT INTO {table} (user_id, total, count) VALUES (?, ?, ?) "
+                        f"ON CONFLICT (user_id) DO UPDATE SET "
+                        f"total = total + excluded.total, count = count + excluded.count",
+                        [(user_id, total, n) for total, n in deltas[table].values()]
+                    )
+                    continue
+                conn.executemany(
+                    f"INSERT INTO {table} (user_id, {column}, total, count) VALUES (?, ?, ?, ?) "
+                    f"ON CONFLICT (user_id, {column}) DO UPDATE SET "
+                    f"total = total + excluded.total, count = count + excluded.count",
+                    [(user_id, key, total, n) for key, (total, n) in deltas[table].items()]
+                )
+        return count
+
+    def reset(self, user_id):
+        with self._lock(user_id), self._conn() as conn:
+            conn.execute("DELETE FROM expenses WHERE user_id = ?", (user_id,))
+            for table in AGGREGATE_TABLES:
+                conn.execute(f"DELETE FROM {table} WHERE user_id = ?", (user_id,))
+
+    def total(self, user_id):
+        row = self._conn().execute(
+            "SELECT total FROM user_totals WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def summary(self, user_id):
+        conn = self._conn()
+        summary = empty_summary()
+
+        row = conn.execute(
+            "SELECT total, count FROM user_totals WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row:
+            summary["total"], summary["count"] = row
+
+        summary["by_category"] = dict(conn.execute(
+            "SELECT category, total FROM category_totals WHERE user_id = ?", (user_id,)
+        ))
+        summary["by_month"] = dict(conn.execute(
+            "SELECT month, total FROM month_totals WHERE user_id = ? ORDER BY month", (user_id,)
+        ))
+        summary["by_place"] = dict(conn.execute(
+            "SELECT place, total FROM place_totals WHERE user_id = ?", (user_id,)
+        ))
+        return summary
+
+    def _rebuild(self, conn, user_id):
+        for table in AGGREGATE_TABLES:
+            conn.execute(f"DELETE FROM {table} WHERE user_id = ?", (user_id,))
+        conn.execute(
+            "INSERT INTO user_totals (user_id, total, count) "
+            "SELECT user_id, SUM(amount), COUNT(*) FROM expenses "
+            "WHERE user_id = ? GROUP BY user_id",
+            (user_id,)
+        )
+        conn.execute(
+            "INSERT INTO category_totals (user_id, category, total, count) "
+            "SELECT user_id, category, SUM(amount), COUNT(*) FROM expenses "
+            "WHERE user_id = ? GROUP BY category",
+            (user_id,)
+        )
+        conn.execute(
+            f"INSERT INTO month_totals (user_id, month, total, count) "
+            f"SELECT user_id, {MONTH_SQL}, SUM(amount), COUNT(*) FROM expenses "
+            f"WHERE user_id = ? GROUP BY {MONTH_SQL}",
+            (user_id,)
+        )
+        conn.execute(
+            f"INSERT INTO place_totals (user_id, place, total, count) "
+            f"SELECT user_id, {PLACE_SQL}, SUM(amount), COUNT(*) FROM expenses "
+            f"WHERE user_id = ? GROUP BY {PLACE_SQL}",
+            (user_id,)
+        )
+
+    def rebuild(self, user_id):
+        with self._lock(user_id), self._conn() as conn:
+            self._rebuild(conn, user_id)
+        return self.summary(user_id)
+
+    def users(self):
+        return [r[0] for r in self._conn().execute("SELECT DISTINCT user_id FROM expenses")]
+
+    def close(self):
+        with self._conns_guard:
+            for conn in self._conns:
+                conn.close()
+            self._conns = []
+
+
+def open_storage(folder, backend=None):
+    backend = backend or STORAGE_BACKEND
+    if backend == "jsonl":
+        return JsonlStorage(folder)
+    if backend == "sqlite":
+        return SqliteStorage(
+            SQLITE_PATH or os.path.join(folder, "expenses.db"),
+            legacy_folder=folder
+        )
+    if backend == "columnar":
+        # NumPy is only needed for this backend
+        from columnar import ColumnarStorage
+        return ColumnarStorage(os.path.join(folder, "columnar"), legacy_folder=folder)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+
+# ================= CLI =================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Expense storage maintenance")
+    parser.add_argument("--folder", default="user_data")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import-json", help="import JSON/JSONL user files into SQLite")
+    p.add_argument("--db", default="")
+
+    p = sub.add_parser("rebuild", help="recompute per-user aggregates from the raw expenses")
+    p.add_argument("--backend", default=None)
+    p.add_argument("--user", default=None)
+
+    args = parser.parse_args()
+
+    if args.command == "import-json":
+        db = SqliteStorage(args.db or SQLITE_PATH or os.path.join(args.folder, "expenses.db"))
+        result = db.import_json(args.folder)
+        for user_id, count in result.items():
+            print(f"{user_id}: {count} expense(s)")
+        print(f"✅ Imported {sum(result.values())} expense(s) for {len(result)} user(s)")
+        db.close()
+
+    elif args.command == "rebuild":
+        store = open_storage(args.folder, args.backend)
+        for user_id in ([args.user] if args.user else store.users()):
+            summary = store.rebuild(user_id)
+            print(f"{user_id}: {summary['count']} expense(s), total ₹{summary['total']}")
+        store.close()
@@ -0,0 +1,136 @@
+import os
+import hmac
+import re
+import json
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from telebot import types
+
+from workers import BoundedExecutor, QueueFull
+
+# Webhook serving (BOT_MODE=webhook): Telegram POSTs updates to
+# WEBHOOK_HOST:WEBHOOK_PORT/WEBHOOK_PATH; each one runs through
+# bot.process_new_updates on a bounded worker pool. Any number of
+# instances can sit behind a load balancer (GET /healthz for its checks).
+#
+# WEBHOOK_URL, if set, is registered with Telegram on start-up. Put TLS in
+# front (reverse proxy / load balancer); this server speaks plain HTTP.
+# WEBHOOK_SECRET is required: updates without Telegram's matching secret
+# header are refused, so nobody else can post fake updates to the port.
+
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_PATH = "/" + os.getenv("WEBHOOK_PATH", "telegram").strip("/")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "8"))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "200"))
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+WEBHOOK_DRAIN_SECONDS = float(os.getenv("WEBHOOK_DRAIN_SECONDS", "30"))
+
+MAX_BODY_BYTES = 1024 * 1024
+SECRET_RE = re.compile(r"[A-Za-z0-9_-]{1,256}")   # what setWebhook accepts
+
+
+class WebhookServer:
+
+    def __init__(self, bot, host=WEBHOOK_HOST, port=WEBHOOK_PORT, path=WEBHOOK_PATH,
+                 secret=WEBHOOK_SECRET, workers=WEBHOOK_WORKERS, max_queue=WEBHOOK_QUEUE_SIZE):
+        if not secret:
+            raise ValueError("WEBHOOK_SECRET must be set in webhook mode (1-256 of A-Z a-z 0-9 _ -)")
+        if not SECRET_RE.fullmatch(secret):
+            raise ValueError("WEBHOOK_SECRET may only use 1-256 of A-Z a-z 0-9 _ -")
+
+        self.bot = bot
+        self.path = path
+        self.secret = secret
+        self.executor = BoundedExecutor("webhook", workers, max_queue)
+        self._stopping = False
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path == "/healthz":
+                    server._respond(self, 503 if server._stopping else 200)
+                else:
+                    server._respond(self, 404)
+
+            def do_POST(self):
+                server._handle_update(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+
+    # ================= HTTP =================
+
+    def _respond(self, request, status, body=b""):
+        request.send_response(status)
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        if body:
+            request.wfile.write(body)
+
+    def _handle_update(self, request):
+        if request.path.split("?")[0] != self.path:
+            return self._respond(request, 404)
+
+        # Telegram sends the secret given to setWebhook in this header
+        token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+        if not hmac.compare_digest(token.encode(), self.secret.encode()):
+            return self._respond(request, 403)
+
+        length = int(request.headers.get("Content-Length") or 0)
+        if length <= 0 or length > MAX_BODY_BYTES:
+            return self._respond(request, 413 if length > 0 else 400)
+
+        try:
+            update = types.Update.de_json(json.loads(request.rfile.read(length)))
+        except Exception:
+            traceback.print_exc()
+            return self._respond(request, 400)
+
+        if self._stopping:
+            return self._respond(request, 503)
+
+        # Non-2xx makes Telegram retry later, so a full queue sheds load safely
+        try:
+            self.executor.submit(self.bot.process_new_updates, [update])
+        except (QueueFull, RuntimeError):
+            return self._respond(request, 503)
+        self._respond(request, 200)
+
+    # ================= RUN / STOP =================
+
+    def register(self, url=WEBHOOK_URL):
+        if not url:
+            return
+        self.bot.set_webhook(
+            url=url.rstrip("/") + self.path,
+            secret_token=self.secret,
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+        )
+        print(f"🔗 Webhook registered: {url.rstrip('/')}{self.path}")
+
+    def serve_forever(self):
+        print(f"🌐 Webhook listening on {WEBHOOK_HOST}:{self.port}{self.path} "
+              f"({self.executor.workers} workers, queue {self.executor.max_queue})")
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+            print("🛑 Webhook stopped: finishing queued updates...")
+            self.executor.shutdown(wait=True, timeout=WEBHOOK_DRAIN_SECONDS)
+
+    def stop(self):
+        # Safe from a signal handler: shutdown() waits for serve_forever,
+        # so it must not run on the serving thread itself
+        self._stopping = True
+        threading.Thread(target=self._httpd.shutdown, name="webhook-stop", daemon=True).start()
@@ -0,0 +1,151 @@
+import math
+import time
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import Future
+
+# Fixed-size thread pool with a bounded FIFO queue.
+# submit() rejects with QueueFull instead of piling up unbounded work.
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+
+    def __init__(self, fn, args, kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+        self.position = 0     # 1-based place among waiting jobs at submit time
+        self.waiting = False  # True if every worker was busy at submit time
+        self.eta = None       # seconds until done (estimate), None until timed
+
+
+class BoundedExecutor:
+
+    def __init__(self, name, workers, max_queue):
+        self.name = name
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+
+        self._cond = threading.Condition()
+        self._pending = deque()
+        self._running = 0
+        self._closed = False
+        self._avg_duration = None
+
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+        self._threads = [
+            threading.Thread(target=self._worker_loop, name=f"{name}-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    # ================= SUBMIT =================
+
+    def submit(self, fn, *args, **kwargs):
+        job = Job(fn, args, kwargs)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"{self.name} executor is shut down")
+            if len(self._pending) >= self.max_queue:
+                self.rejected += 1
+                raise QueueFull(f"{self.name} queue is full ({self.max_queue} waiting)")
+
+            self._pending.append(job)
+            job.position = len(self._pending)
+            job.waiting = self._running + len(self._pending) > self.workers
+            job.eta = self._eta(job.position)
+            self._cond.notify()
+        return job
+
+    def _eta(self, position):
+        # Rounds of `workers` jobs ahead of this one (running + waiting) plus its own
+        if self._avg_duration is None:
+            return None
+        rounds = math.ceil((self._running + position) / self.workers)
+        return rounds * self._avg_duration
+
+    # ================= WORKERS =================
+
+    def _next_jobs(self):
+        # Called with self._cond held; returns [] once closed and drained
+        while not self._pending and not self._closed:
+            self._cond.wait()
+        if not self._pending:
+            return []
+        return [self._pending.popleft()]
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                jobs = self._next_jobs()
+                if not jobs:
+                    return
+                self._running += len(jobs)
+
+            start = time.monotonic()
+            try:
+                self._execute(jobs)
+            finally:
+                elapsed = (time.monotonic() - start) / len(jobs)
+                with self._cond:
+                    self._running -= len(jobs)
+                    # Exponential moving average → queue ETA
+                    if self._avg_duration is None:
+                        self._avg_duration = elapsed
+                    else:
+                        self._avg_duration = 0.7 * self._avg_duration + 0.3 * elapsed
+
+    def _execute(self, jobs):
+        for job in jobs:
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = job.fn(*job.args, **job.kwargs)
+            except BaseException as e:
+                traceback.print_exc()
+                self.failed += 1
+                job.future.set_exception(e)
+            else:
+                self.completed += 1
+                job.future.set_result(result)
+
+    # ================= STATUS / SHUTDOWN =================
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._pending)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "queued": len(self._pending),
+                "running": self._running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_seconds": self._avg_duration,
+            }
+
+    def shutdown(self, wait=True, cancel_pending=False, timeout=None):
+        with self._cond:
+            self._closed = True
+            if cancel_pending:
+                while self._pending:
+                    self._pending.popleft().future.cancel()
+            self._cond.notify_all()
+
+        if wait:
+            for t in self._threads:
+                t.join(timeout)